@@ -1,5 +1,14 @@
 from django.contrib import admin
-from .models import Category, Product, Review, Order, OrderItem
+from .models import (
+	Category,
+	Product,
+	Review,
+	Order,
+	OrderItem,
+	StockReservation,
+	WebhookEvent,
+)
+from .webhooks import replay_webhook_events
 
 
 @admin.register(Category)
@@ -11,4 +20,25 @@ class CategoryAdmin(admin.ModelAdmin):
 admin.site.register(Product)
 admin.site.register(Review)
 admin.site.register(Order)
-admin.site.register(OrderItem)
\ No newline at end of file
+admin.site.register(OrderItem)
+
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+	list_display = ("ref", "product", "quantity", "status", "expires_at")
+	list_filter = ("status",)
+	search_fields = ("ref",)
+
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+	list_display = ("event_key", "source", "event_type", "status", "attempts", "received_at")
+	list_filter = ("source", "status", "event_type")
+	search_fields = ("event_key",)
+	readonly_fields = ("received_at", "processed_at", "locked_at")
+	actions = ["replay"]
+
+	@admin.action(description="Replay selected events")
+	def replay(self, request, queryset):
+		count = replay_webhook_events(queryset)
+		self.message_user(request, f"Re-queued {count} event(s).")
@@ -0,0 +1,122 @@
+"""
+Platform-wide exports for finance staff.
+
+Each dataset is a base queryset plus its ``(column, lookup)`` pairs. The
+rows are read with ``values_list(...).iterator(chunk_size=...)`` in primary
+key order and encoded by ``store.exports``, so even a million-row export
+runs in bounded memory (``manage.py export_data`` or the staff-only
+``/api/admin/export/<dataset>/`` endpoint).
+
+``paystack_response`` holds the raw Paystack payload and is by far the
+largest column, so it is only selected when asked for.
+"""
+from django.conf import settings
+
+from userprofile.models import SubscriptionHistory
+
+from .dates import date_range_lookups
+from .models import Order, OrderItem, Payment
+
+
+class ExportError(ValueError):
+    """Raised for an unknown dataset."""
+
+
+DATASETS = {
+    "orders": (
+        Order,
+        "created_at",
+        (
+            ("id", "pk"),
+            ("ref", "ref"),
+            ("created_at", "created_at"),
+            ("is_paid", "is_paid"),
+            ("total_cost", "total_cost"),
+            ("buyer_id", "created_by_id"),
+            ("first_name", "first_name"),
+            ("last_name", "last_name"),
+            ("phone", "phone"),
+            ("pickup_location", "pickup_location"),
+            ("merchant_id", "merchant_id"),
+        ),
+    ),
+    "order_items": (
+        OrderItem,
+        "order__created_at",
+        (
+            ("id", "pk"),
+            ("order_id", "order_id"),
+            ("order_ref", "order__ref"),
+            ("order_created_at", "order__created_at"),
+            ("order_paid", "order__is_paid"),
+            ("product_id", "product_id"),
+            ("product_title", "product__title"),
+            ("vendor_id", "product__vendor_id"),
+            ("store_name", "product__vendor__store_name"),
+            ("quantity", "quantity"),
+            ("price", "price"),
+            ("fulfilled", "fulfilled"),
+        ),
+    ),
+    "payments": (
+        Payment,
+        "created_at",
+        (
+            ("id", "pk"),
+            ("ref", "ref"),
+            ("order_id", "order_id"),
+            ("user_id", "user_id"),
+            ("email", "user__email"),
+            ("amount", "amount"),
+            ("status", "status"),
+            ("created_at", "created_at"),
+        ),
+    ),
+    "subscriptions": (
+        SubscriptionHistory,
+        "created_at",
+        (
+            ("id", "pk"),
+            ("vendor_id", "vendor_id"),
+            ("store_name", "vendor__store_name"),
+            ("event_type", "event_type"),
+            ("previous_plan", "previous_plan__name"),
+            ("new_plan", "new_plan__name"),
+            ("previous_status", "previous_status"),
+            ("new_status", "new_status"),
+            ("amount", "amount"),
+            ("payment_reference", "payment_reference"),
+            ("notes", "notes"),
+            ("created_at", "created_at"),
+        ),
+    ),
+}
+
+# Datasets whose model has a paystack_response column.
+WITH_PAYSTACK_RESPONSE = ("payments", "subscriptions")
+
+
+def export_rows(dataset, start=None, end=None, include_paystack_response=False):
+    """
+    Column names and a row iterator for ``dataset``.
+
+    ``start`` / ``end`` are inclusive dates on the dataset's creation date.
+    Raises ``ExportError`` for an unknown dataset.
+    """
+    try:
+        model, date_field, columns = DATASETS[dataset]
+    except KeyError:
+        raise ExportError(
+            f"Unknown dataset '{dataset}'. Choose from: {', '.join(DATASETS)}."
+        )
+    columns = list(columns)
+    if include_paystack_response and dataset in WITH_PAYSTACK_RESPONSE:
+        columns.append(("paystack_response", "paystack_response"))
+
+    rows = (
+        model.objects.filter(**date_range_lookups(date_field, start, end))
+        .order_by("pk")
+        .values_list(*(lookup for _, lookup in columns))
+        .iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+    )
+    return [name for name, _ in columns], rows
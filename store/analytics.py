@@ -0,0 +1,214 @@
+"""
+Daily sales rollups and the vendor analytics time series.
+
+``VendorDailySales`` and ``ProductDailySales`` hold one row per vendor (or
+product) per day with paid orders, units sold and revenue:
+
+* ``record_order_sales`` adds a newly paid order inside
+  ``finalize_payment``'s transaction, with ``F()`` increments on rows keyed by
+  the order's local date;
+* ``backfill_sales_rollups`` rebuilds a date range from ``OrderItem`` (run by
+  ``manage.py backfill_sales_rollups``);
+* ``vendor_sales_series`` answers the analytics API from the rollups alone,
+  so its cost depends on the number of days requested, not on order volume.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .dates import date_range_lookups
+from .models import OrderItem, ProductDailySales, VendorDailySales
+
+logger = logging.getLogger(__name__)
+
+DAY = "day"
+WEEK = "week"
+MONTH = "month"
+GRANULARITIES = {DAY: None, WEEK: TruncWeek, MONTH: TruncMonth}
+
+
+def order_sales_lines(order):
+    """Per-product totals for ``order``: ``product_id``, ``vendor_id``, ``units``, ``revenue``."""
+    return list(
+        OrderItem.objects.filter(order=order)
+        .values("product_id", vendor_id=F("product__vendor"))
+        .annotate(units=Sum("quantity"), revenue=Sum("price"))
+        .order_by("product_id")
+    )
+
+
+def _increment(model, key_field, rows, date):
+    # Insert missing rows zeroed, then add the deltas, so concurrent
+    # finalizations for the same day never overwrite each other.
+    model.objects.bulk_create(
+        [
+            model(date=date, **{key: fields[key] for key in fields if key.endswith("_id")})
+            for fields in rows
+        ],
+        ignore_conflicts=True,
+    )
+    for fields in rows:
+        model.objects.filter(date=date, **{key_field: fields[key_field]}).update(
+            orders=F("orders") + 1,
+            units_sold=F("units_sold") + fields["units_sold"],
+            revenue=F("revenue") + fields["revenue"],
+        )
+
+
+def record_order_sales(order, lines=None):
+    """Add a newly paid order to the daily rollups of its vendors and products."""
+    lines = order_sales_lines(order) if lines is None else lines
+    if not lines:
+        return
+    day = timezone.localdate(order.created_at)
+
+    vendors = defaultdict(lambda: {"units_sold": 0, "revenue": 0})
+    for line in lines:
+        vendors[line["vendor_id"]]["units_sold"] += line["units"]
+        vendors[line["vendor_id"]]["revenue"] += line["revenue"]
+
+    _increment(
+        VendorDailySales,
+        "vendor_id",
+        [{"vendor_id": vendor_id, **totals} for vendor_id, totals in vendors.items()],
+        day,
+    )
+    _increment(
+        ProductDailySales,
+        "product_id",
+        [
+            {
+                "product_id": line["product_id"],
+                "vendor_id": line["vendor_id"],
+                "units_sold": line["units"],
+                "revenue": line["revenue"],
+            }
+            for line in lines
+        ],
+        day,
+    )
+
+
+def backfill_sales_rollups(start, end):
+    """
+    Rebuild the rollups for ``start``..``end`` (inclusive dates) from orders.
+
+    Existing rows in the range are replaced. Returns ``(vendor_rows,
+    product_rows)`` written.
+    """
+    paid = OrderItem.objects.filter(
+        order__is_paid=True,
+        **date_range_lookups("order__created_at", start, end),
+    ).annotate(day=TruncDate("order__created_at"))
+
+    vendor_rows = [
+        VendorDailySales(
+            vendor_id=row["product__vendor"],
+            date=row["day"],
+            orders=row["orders"],
+            units_sold=row["units_sold"],
+            revenue=row["revenue"],
+        )
+        for row in paid.values("product__vendor", "day")
+        .annotate(
+            orders=Count("order", distinct=True),
+            units_sold=Sum("quantity"),
+            revenue=Sum("price"),
+        )
+        .order_by()
+    ]
+    product_rows = [
+        ProductDailySales(
+            product_id=row["product"],
+            vendor_id=row["product__vendor"],
+            date=row["day"],
+            orders=row["orders"],
+            units_sold=row["units_sold"],
+            revenue=row["revenue"],
+        )
+        for row in paid.values("product", "product__vendor", "day")
+        .annotate(
+            orders=Count("order", distinct=True),
+            units_sold=Sum("quantity"),
+            revenue=Sum("price"),
+        )
+        .order_by()
+    ]
+
+    with transaction.atomic():
+        VendorDailySales.objects.filter(date__gte=start, date__lte=end).delete()
+        ProductDailySales.objects.filter(date__gte=start, date__lte=end).delete()
+        VendorDailySales.objects.bulk_create(vendor_rows, batch_size=1000)
+        ProductDailySales.objects.bulk_create(product_rows, batch_size=1000)
+
+    logger.info(
+        f"Backfilled sales rollups {start}..{end}: {len(vendor_rows)} vendor-day "
+        f"and {len(product_rows)} product-day row(s)"
+    )
+    return len(vendor_rows), len(product_rows)
+
+
+def _periods(start, end, granularity):
+    """Every period start between ``start`` and ``end``, so empty periods show as zero."""
+    if granularity == DAY:
+        step = start
+        while step <= end:
+            yield step
+            step += timedelta(days=1)
+    elif granularity == WEEK:
+        step = start - timedelta(days=start.weekday())
+        while step <= end:
+            yield step
+            step += timedelta(weeks=1)
+    else:
+        step = start.replace(day=1)
+        while step <= end:
+            yield step
+            step = (step + timedelta(days=32)).replace(day=1)
+
+
+def vendor_sales_series(vendor, granularity, start, end, top_products=5):
+    """
+    Sales for ``vendor`` between ``start`` and ``end`` (inclusive dates).
+
+    Returns ``{"series": [...], "totals": {...}, "top_products": [...]}``
+    with one series point per day, week (starting Monday) or month. Reads
+    the rollup tables only.
+    """
+    rows = VendorDailySales.objects.filter(
+        vendor=vendor, date__gte=start, date__lte=end
+    )
+    trunc = GRANULARITIES[granularity]
+    period = F("date") if trunc is None else trunc("date")
+    buckets = {
+        row["period"]: row
+        for row in rows.annotate(period=period)
+        .values("period")
+        .annotate(
+            orders=Sum("orders"), units_sold=Sum("units_sold"), revenue=Sum("revenue")
+        )
+        .order_by("period")
+    }
+
+    series = []
+    totals = {"orders": 0, "units_sold": 0, "revenue": 0}
+    for period_start in _periods(start, end, granularity):
+        row = buckets.get(period_start, {})
+        point = {key: row.get(key) or 0 for key in totals}
+        for key in totals:
+            totals[key] += point[key]
+        series.append({"period": period_start.isoformat(), **point})
+
+    products = (
+        ProductDailySales.objects.filter(vendor=vendor, date__gte=start, date__lte=end)
+        .values("product_id", title=F("product__title"))
+        .annotate(units_sold=Sum("units_sold"), revenue=Sum("revenue"))
+        .order_by("-revenue", "product_id")[:top_products]
+    )
+
+    return {"series": series, "totals": totals, "top_products": list(products)}
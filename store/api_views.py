@@ -1,10 +1,10 @@
 # store/api_views.py
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import IsAdminUser, IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework import status
-from .models import Product, Category, Payment, OrderItem, Review, Order
-from userprofile.email_utils import send_receipt_email, send_vendor_order_notification
+from .models import Product, Category, Payment, OrderItem, Review, Order, WebhookEvent
 import logging
 from .serializers import (
     ProductSerializer,
@@ -14,16 +14,38 @@ from .serializers import (
     CheckoutSerializer,
 )
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
-from .pagination import StandardResultsPagination
+from django.db.models import Prefetch, Q
+from .pagination import OrderHistoryPagination, StandardResultsPagination
 from userprofile.models import UserProfile
 from .cart import Cart
+from .services import (
+    FAILED_CHARGE_STATUSES,
+    CheckoutError,
+    build_checkout,
+    create_order_items,
+    finalize_payment,
+    mark_payment_failed,
+)
+from .paystack import paystack_client
+from .banks import get_bank_list, resolve_account
+from .inventory import InsufficientStock, release_reservations, reserve_stock
+from .webhooks import record_webhook_event, verify_paystack_signature
+from .payment_status import await_payment_status, wait_for_payment_status
+from .receipts import receipt_response
+from .admin_exports import DATASETS as EXPORT_DATASETS, ExportError, export_rows
+from .exports import CSV, FORMATS as EXPORT_FORMATS, streaming_export
 import uuid, requests
+from asgiref.sync import sync_to_async
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from django.http import HttpResponseNotAllowed, JsonResponse
 from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
-from collections import defaultdict
 from django.urls import reverse
-import hmac, hashlib, json
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.dateparse import parse_date
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 from drf_yasg.utils import swagger_auto_schema
@@ -823,100 +845,34 @@ def checkout_api(request):
     cart = Cart(request)
     user = request.user
 
-    if len(cart) == 0:
+    # Snapshot the cart once; every total below is derived from this list.
+    cart_lines = list(cart)
+    if not cart_lines:
         return Response(
             {"detail": "Cart is empty. Cannot proceed to checkout."}, status=400
         )
+    cart.persist()
 
     serializer = CheckoutSerializer(data=request.data)
     if serializer.is_valid():
-        total_price = sum(
-            item["product"].price * int(item["quantity"]) for item in cart
-        )
-
         ref = str(uuid.uuid4()).replace("-", "")[:20]
         validated_data = serializer.validated_data
 
-        from store.models import Order
-
-        # Calculate payment amounts before creating DB records
-        total_price_kobo = int(round(float(total_price) * 100))
-        # Paystack fee: 1.5% of (amount + fee) + ₦100 flat, cap ₦2000
-        # Solve: fee = 0.015*(total+fee) + 10000 → fee = (0.015*total + 10000) / 0.985
-        raw_fee = int(round((0.015 * total_price_kobo + 10000) / 0.985))
-        estimated_fee_kobo = min(raw_fee, 200000)
-
-        # Total amount customer pays (includes platform fee)
-        amount_kobo = total_price_kobo + estimated_fee_kobo
-
-        # Calculate vendor shares - only from product prices, NOT platform fees
-        vendor_totals = defaultdict(int)
-        products_without_subaccount = []
-
-        buyer_vendor = getattr(request.user, "vendor_profile", None)
-        for item in cart:
-            product = item["product"]
-            quantity = int(item["quantity"])
-            price_kobo = int(round(float(product.price) * quantity * 100))
+        try:
+            plan = build_checkout(cart_lines, user, ref)
+        except CheckoutError as e:
+            return Response({"detail": e.detail}, status=e.status)
 
-            # Defensive backstop: no payout for buyer's own products
-            if buyer_vendor and product.vendor == buyer_vendor:
-                logger.info(
-                    f"Payment {ref}: skipping payout for self-purchased product {product.id}"
-                )
-                continue
-
-            subaccount_code = product.vendor.subaccount_code
-            if subaccount_code:
-                vendor_totals[subaccount_code] += price_kobo
-            else:
-                products_without_subaccount.append(product.vendor.store_name)
-
-        vendor_totals = {k: v for k, v in vendor_totals.items() if v > 0}
-
-        # Validate admin subaccount config
-        admin_subaccount = getattr(settings, "ADMIN_SUBACCOUNT_CODE", None)
-        if admin_subaccount:
-            admin_subaccount = str(admin_subaccount).strip() or None
-        if admin_subaccount and not admin_subaccount.startswith("ACCT_"):
-            logger.error(f"Invalid admin subaccount format: {admin_subaccount}")
-            return Response({"detail": "Invalid admin subaccount format. Must start with 'ACCT_'"}, status=500)
-        if not admin_subaccount:
-            logger.warning("ADMIN_SUBACCOUNT_CODE not configured. Platform fee will stay in main wallet.")
-
-        # Validate vendor subaccount codes
-        for subaccount_code in vendor_totals:
-            if not isinstance(subaccount_code, str) or not subaccount_code.startswith("ACCT_"):
-                return Response({"detail": f"Invalid subaccount code format: {subaccount_code}"}, status=400)
-
-        # Build split
-        admin_amount = estimated_fee_kobo + (total_price_kobo - sum(vendor_totals.values()))
-        split_subaccounts = list(vendor_totals.items())
-        if admin_subaccount:
-            split_subaccounts.append((admin_subaccount, admin_amount))
-
-        split = None
-        if split_subaccounts:
-            split_total = sum(share for _, share in split_subaccounts)
-            if split_total != amount_kobo:
-                logger.error(f"Payment {ref}: Split total {split_total} != amount {amount_kobo}")
-                return Response({"detail": f"Split mismatch: {split_total} vs {amount_kobo}"}, status=400)
-
-            split = {
-                "type": "flat",
-                "bearer_type": "account",
-                "subaccounts": [{"subaccount": sub, "share": share} for sub, share in split_subaccounts],
-            }
-            if admin_subaccount:
-                split["bearer_type"] = "subaccount"
-                split["bearer_subaccount"] = admin_subaccount
+        total_price = plan["total_price"]
+        amount_kobo = plan["amount_kobo"]
+        split = plan["split"]
 
-        logger.info(
-            f"Payment {ref}: amount=₦{amount_kobo/100:,.2f} vendors={dict(vendor_totals)} "
-            f"admin={admin_amount/100:,.2f} split={'yes' if split else 'no'}"
-        )
-        if products_without_subaccount:
-            logger.info(f"Payment {ref}: products without vendor subaccount: {products_without_subaccount}")
+        # Hold the units before sending the customer to Paystack. Every
+        # early return below must hand them back.
+        try:
+            reserve_stock(ref, cart_lines)
+        except InsufficientStock as e:
+            return Response({"detail": str(e)}, status=status.HTTP_409_CONFLICT)
 
         callback_url = f"https://vendorxprt.com/success?reference={ref}&amount={total_price}&status=success"
         payload = {
@@ -928,18 +884,14 @@ def checkout_api(request):
         if split:
             payload["split"] = split
 
-        headers = {
-            "Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}",
-            "Content-Type": "application/json",
-        }
-
         logger.info(f"Payment {ref}: Sending payload to Paystack: {payload}")
 
-        response = requests.post(
-            f"{settings.PAYSTACK_BASE_URL}/transaction/initialize",
-            json=payload,
-            headers=headers,
-        )
+        try:
+            response = paystack_client.post("transaction/initialize", json=payload)
+        except requests.RequestException as e:
+            logger.error(f"Payment {ref}: Paystack init request failed: {e}")
+            release_reservations(ref)
+            return Response({"detail": "Payment gateway unavailable. Please try again."}, status=502)
 
         logger.info(f"Payment {ref}: Paystack HTTP {response.status_code} — raw response: {response.text}")
 
@@ -947,11 +899,13 @@ def checkout_api(request):
             res_data = response.json()
         except ValueError:
             logger.error(f"Payment {ref}: Paystack returned invalid JSON: {response.text}")
+            release_reservations(ref)
             return Response({"detail": "Paystack returned an invalid response."}, status=502)
 
         if not (response.status_code == 200 and res_data.get("status")):
             error_msg = res_data.get("message", "Unknown Paystack error")
             logger.error(f"Payment {ref}: Paystack init failed. Status: {response.status_code}, Response: {res_data}")
+            release_reservations(ref)
             return Response({"detail": error_msg, "paystack_status": response.status_code}, status=400)
 
         # Only persist order + payment after Paystack confirms
@@ -965,13 +919,7 @@ def checkout_api(request):
                 phone=validated_data.get("phone"),
                 pickup_location=validated_data.get("pickup_location"),
             )
-            for item in cart:
-                OrderItem.objects.create(
-                    order=order,
-                    product=item["product"],
-                    quantity=item["quantity"],
-                    price=item["product"].price * int(item["quantity"]),
-                )
+            create_order_items(order, plan["order_items"])
             payment = Payment.objects.create(
                 user=user, order=order, amount=total_price, ref=ref,
                 status="pending", paystack_response=res_data,
@@ -1013,6 +961,7 @@ def checkout_api(request):
                 },
             ),
         ),
+        202: openapi.Response(description="Payment still in progress on Paystack"),
         400: openapi.Response(description="Payment verification failed"),
         503: openapi.Response(description="Verification service error"),
     },
@@ -1031,11 +980,8 @@ def paystack_callback_api(request):
     if not ref:
         return Response({"detail": "No transaction reference provided"}, status=400)
 
-    url = f"{settings.PAYSTACK_BASE_URL}/transaction/verify/{ref}"
-    headers = {"Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}"}
-
     try:
-        response = requests.get(url, headers=headers)
+        response = paystack_client.get(f"transaction/verify/{ref}")
         data = response.json()
     except Exception as e:
         return Response({"detail": f"Verification error: {str(e)}"}, status=503)
@@ -1050,30 +996,8 @@ def paystack_callback_api(request):
         return Response({"detail": "Already paid", "status": "success"}, status=200)
 
     if payment_data["status"] == "success":
-        payment.status = "paid"
-        payment.save()
-
-        order = payment.order
-        order.is_paid = True
-        if hasattr(order, "status"):
-            order.status = "completed"
-        order.save()
-
-        # Send receipt email to customer
-        try:
-            send_receipt_email(order)
-            logger.info(f"Receipt email sent successfully for order {order.id}")
-        except Exception as e:
-            logger.error(f"Failed to send receipt email for order {order.id}: {e}")
-
-        # Send order notification email to vendor
-        try:
-            send_vendor_order_notification(order)
-            logger.info(f"Vendor notification sent successfully for order {order.id}")
-        except Exception as e:
-            logger.error(
-                f"Failed to send vendor notification for order {order.id}: {e}"
-            )
+        if not finalize_payment(ref, paystack_data=payment_data):
+            return Response({"detail": "Already paid", "status": "success"}, status=200)
 
         cart = Cart(request)
         cart.clear()
@@ -1082,9 +1006,12 @@ def paystack_callback_api(request):
             {"detail": "Payment verified and order marked as paid"}, status=200
         )
 
-    payment.status = "failed"
-    payment.save()
-    return Response({"detail": "Payment failed or was not successful"}, status=400)
+    if payment_data["status"] in FAILED_CHARGE_STATUSES:
+        mark_payment_failed(ref, paystack_data=payment_data)
+        return Response({"detail": "Payment failed or was not successful"}, status=400)
+    return Response(
+        {"detail": "Payment is still being processed", "status": "pending"}, status=202
+    )
 
 
 @swagger_auto_schema(
@@ -1108,79 +1035,25 @@ def paystack_webhook_api(request):
     """
     Handle webhook notifications from Paystack.
 
-    Processes payment status updates sent by Paystack.
-    Validates the webhook signature for security.
+    Validates the webhook signature and stores the event in the webhook
+    inbox; the process_webhooks worker applies it asynchronously.
     """
     signature = request.headers.get("x-paystack-signature")
     if not signature:
         logger.warning("Paystack webhook called without signature")
         return Response(status=400)
 
-    secret_key = settings.PAYSTACK_SECRET_KEY.encode("utf-8")
-    payload = request.body
-    computed_hash = hmac.new(secret_key, payload, hashlib.sha512).hexdigest()
-
-    if not hmac.compare_digest(computed_hash, signature):
+    if not verify_paystack_signature(request.body, signature):
         logger.warning("Invalid Paystack signature")
         return Response(status=403)
 
+    # Persist and acknowledge; process_webhooks applies the event.
     try:
-        data = json.loads(payload.decode("utf-8"))
+        record_webhook_event(WebhookEvent.SOURCE_STORE, request.body)
     except ValueError as e:
         logger.error(f"Invalid JSON in Paystack webhook: {e}")
         return Response(status=400)
 
-    event = data.get("event")
-    if event == "charge.success":
-        reference = data.get("data", {}).get("reference")
-        if reference:
-            try:
-                payment = Payment.objects.get(ref=reference)
-            except Payment.DoesNotExist:
-                logger.error(f"No Payment found for ref {reference}")
-            else:
-                if payment.status != "paid":
-                    payment.status = "paid"
-                    payment.save()
-                    order = payment.order
-                    if order:
-                        order.is_paid = True
-                        order.status = "completed"
-
-                        # Reduce stock for all ordered items
-                        for item in order.items.all():
-                            item.product.reduce_stock(item.quantity)
-
-                        order.save()
-
-                        # Send receipt email for the completed order
-                        try:
-                            send_receipt_email(order)
-                            logger.info(f"Receipt email sent for order {order.ref}")
-                        except Exception as e:
-                            logger.error(
-                                f"Failed to send receipt email for order {order.ref}: {str(e)}"
-                            )
-
-                        # Send order notification email to vendor
-                        try:
-                            send_vendor_order_notification(order)
-                            logger.info(
-                                f"Vendor notification sent for order {order.ref}"
-                            )
-                        except Exception as e:
-                            logger.error(
-                                f"Failed to send vendor notification for order {order.ref}: {str(e)}"
-                            )
-
-                        # Clear the user's cart items for this order
-                        # Note: We can't clear the session-based cart from webhook
-                        # but we can mark the order as paid so the frontend can handle it
-                        logger.info(f"Order {order.ref} marked as paid and completed")
-                    logger.info(f"Payment {reference} marked as paid")
-                else:
-                    logger.info(f"Payment {reference} was already marked paid")
-
     return Response(status=200)
 
 
@@ -1346,6 +1219,159 @@ def receipt_api(request):
     )
 
 
+@swagger_auto_schema(
+    method="get",
+    operation_summary="Download receipt PDF",
+    operation_description=(
+        "Download the itemized receipt PDF for one of the user's paid orders. "
+        "Supports If-None-Match; the response carries an ETag."
+    ),
+    security=[{"Bearer": []}],
+    manual_parameters=[
+        openapi.Parameter(
+            "ref",
+            openapi.IN_PATH,
+            description="Order reference",
+            type=openapi.TYPE_STRING,
+        ),
+    ],
+    responses={
+        200: openapi.Response(description="Receipt PDF (application/pdf)"),
+        304: openapi.Response(description="Not modified"),
+        404: openapi.Response(description="No paid order with this reference"),
+    },
+    tags=["Payment"],
+)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def receipt_pdf_api(request, ref):
+    """
+    Serve the stored receipt PDF for a paid order.
+
+    The PDF is normally rendered by the email worker after payment; it is
+    only rendered here if this download comes first.
+    """
+    payment = (
+        Payment.objects.select_related("order")
+        .filter(ref=ref, user=request.user, status="paid")
+        .first()
+    )
+    if payment is None:
+        return Response(
+            {"detail": "No paid order found with this reference."},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+    return receipt_response(request, payment.order)
+
+
+@swagger_auto_schema(
+    method="get",
+    operation_summary="Export platform data (staff)",
+    operation_description=(
+        "Stream every row of a dataset as CSV or JSON Lines, optionally "
+        "gzipped, in primary key order. Staff only; also works from a logged-in "
+        "admin session. Rows are read in chunks, so memory stays bounded for "
+        "any number of rows."
+    ),
+    security=[{"Bearer": []}],
+    manual_parameters=[
+        openapi.Parameter(
+            "dataset",
+            openapi.IN_PATH,
+            type=openapi.TYPE_STRING,
+            enum=list(EXPORT_DATASETS),
+        ),
+        openapi.Parameter(
+            "fmt",
+            openapi.IN_QUERY,
+            description="Export format (default: csv)",
+            type=openapi.TYPE_STRING,
+            enum=list(EXPORT_FORMATS),
+            required=False,
+        ),
+        openapi.Parameter(
+            "gzip",
+            openapi.IN_QUERY,
+            description="Gzip the file",
+            type=openapi.TYPE_BOOLEAN,
+            required=False,
+        ),
+        openapi.Parameter(
+            "from",
+            openapi.IN_QUERY,
+            description="Rows created on or after this date (YYYY-MM-DD)",
+            type=openapi.TYPE_STRING,
+            format=openapi.FORMAT_DATE,
+            required=False,
+        ),
+        openapi.Parameter(
+            "to",
+            openapi.IN_QUERY,
+            description="Rows created on or before this date (YYYY-MM-DD)",
+            type=openapi.TYPE_STRING,
+            format=openapi.FORMAT_DATE,
+            required=False,
+        ),
+        openapi.Parameter(
+            "paystack_response",
+            openapi.IN_QUERY,
+            description="Include the raw Paystack payload (payments, subscriptions)",
+            type=openapi.TYPE_BOOLEAN,
+            required=False,
+        ),
+    ],
+    responses={
+        200: openapi.Response(description="CSV, JSON Lines or gzip file"),
+        400: openapi.Response(description="Invalid format or date"),
+        403: openapi.Response(description="Staff only"),
+        404: openapi.Response(description="Unknown dataset"),
+    },
+    tags=["Admin"],
+)
+@api_view(["GET"])
+@authentication_classes([JWTAuthentication, SessionAuthentication])
+@permission_classes([IsAdminUser])
+def admin_export_api(request, dataset):
+    # "format" is DRF's renderer override parameter, hence "fmt".
+    fmt = request.GET.get("fmt", CSV)
+    if fmt not in EXPORT_FORMATS:
+        return Response(
+            {"detail": "fmt must be one of: csv, jsonl."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    dates = {}
+    for param in ("from", "to"):
+        value = request.GET.get(param)
+        if value:
+            try:
+                dates[param] = parse_date(value)
+            except ValueError:
+                dates[param] = None
+            if dates[param] is None:
+                return Response(
+                    {"detail": f"'{param}' must be a date in YYYY-MM-DD format."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+    def flag(name):
+        return request.GET.get(name, "").lower() in ("1", "true", "yes")
+
+    try:
+        columns, rows = export_rows(
+            dataset,
+            start=dates.get("from"),
+            end=dates.get("to"),
+            include_paystack_response=flag("paystack_response"),
+        )
+    except ExportError as e:
+        return Response({"detail": str(e)}, status=status.HTTP_404_NOT_FOUND)
+
+    logger.info(f"Staff export of {dataset} by user {request.user.pk}")
+    filename = f"{dataset}-{timezone.localdate().isoformat()}"
+    return streaming_export(columns, rows, fmt, filename, compress=flag("gzip"))
+
+
 @swagger_auto_schema(
     method="post",
     operation_description="Verify payment status after frontend redirect",
@@ -1417,6 +1443,7 @@ def receipt_api(request):
                 },
             ),
         ),
+        202: openapi.Response(description="Payment still in progress on Paystack"),
         400: openapi.Response(description="Payment verification failed"),
         404: openapi.Response(description="Payment not found"),
     },
@@ -1438,23 +1465,35 @@ def verify_payment_api(request):
         )
 
     try:
-        payment = Payment.objects.get(ref=reference, user=request.user)
+        payment = Payment.objects.only("ref", "status", "order_id").get(
+            ref=reference, user=request.user
+        )
     except Payment.DoesNotExist:
         return Response({"success": False, "message": "Payment not found"}, status=404)
 
-    # Verify with Paystack
-    url = f"{settings.PAYSTACK_BASE_URL}/transaction/verify/{reference}"
-    headers = {"Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}"}
-
-    try:
-        response = requests.get(url, headers=headers)
-        data = response.json()
-    except Exception as e:
-        return Response(
-            {"success": False, "message": f"Verification error: {str(e)}"}, status=500
-        )
+    # Already settled (usually by the webhook): answer from the database
+    # without calling Paystack again.
+    if payment.status == "paid":
+        return _paid_payment_response(request, payment)
+    if payment.status == "failed":
+        return _failed_payment_response()
+
+    # Still pending: verify with Paystack, reusing a recent answer for a few
+    # seconds so a polling client does not trigger one Paystack call per poll.
+    verify_key = f"payment:paystack-verify:{reference}"
+    verification = cache.get(verify_key)
+    if verification is None:
+        try:
+            response = paystack_client.get(f"transaction/verify/{reference}")
+            verification = (response.status_code, response.json())
+        except Exception as e:
+            return Response(
+                {"success": False, "message": f"Verification error: {str(e)}"}, status=500
+            )
+        cache.set(verify_key, verification, settings.PAYMENT_VERIFY_CACHE_SECONDS)
+    status_code, data = verification
 
-    if response.status_code != 200 or not data.get("status"):
+    if status_code != 200 or not data.get("status"):
         return Response(
             {"success": False, "message": "Failed to verify payment with Paystack"},
             status=400,
@@ -1463,85 +1502,211 @@ def verify_payment_api(request):
     payment_data = data["data"]
 
     if payment_data["status"] == "success":
-        # Update payment status
-        payment.status = "paid"
-        payment.save()
+        # Claims the payment, commits stock and queues the receipt and vendor
+        # emails exactly once, however many paths race to confirm it.
+        finalize_payment(reference, paystack_data=payment_data)
+        return _paid_payment_response(request, payment)
+    if payment_data["status"] in FAILED_CHARGE_STATUSES:
+        mark_payment_failed(reference, paystack_data=payment_data)
+        return _failed_payment_response()
+    # Checkout not finished yet (ongoing, abandoned, ...): nothing to record.
+    return Response(
+        {
+            "success": False,
+            "status": "pending",
+            "message": "Payment is still being processed",
+        },
+        status=202,
+    )
 
-        # Update order status
-        order = payment.order
-        order.is_paid = True
-        if hasattr(order, "status"):
-            order.status = "completed"
-        order.save()
+
+def _paid_payment_response(request, payment):
+    """
+    Response for a paid payment, cached per reference.
+
+    The first response after payment also clears the buyer's cart; later
+    polls are served from the cache.
+    """
+    cache_key = f"payment:verified:{payment.ref}"
+    body = cache.get(cache_key)
+    if body is None:
+        order = Order.objects.only("ref", "total_cost", "is_paid").get(pk=payment.order_id)
+        order_items = OrderItem.objects.filter(order_id=order.pk).select_related("product")
+        items_data = [
+            {
+                "id": item.id,
+                "product": {
+                    "id": item.product.id,
+                    "title": item.product.title,
+                    "slug": item.product.slug,
+                    "price": item.product.price,
+                    "thumbnail": item.product.get_thumbnail(),
+                },
+                "quantity": item.quantity,
+                "price": item.price,
+                "fulfilled": item.fulfilled,
+            }
+            for item in order_items
+        ]
+        body = {
+            "success": True,
+            "status": "paid",
+            "message": "Payment verified successfully! A receipt has been sent to your email.",
+            "order": {
+                "ref": order.ref,
+                "total_cost": order.total_cost,
+                "is_paid": order.is_paid,
+                "items": items_data,
+            },
+        }
 
         # Clear cart
         cart = Cart(request)
         cart.clear()
 
-        # Send receipt email in the background
-        try:
-            send_receipt_email(order)
-            email_message = "Receipt email sent successfully!"
-        except Exception as e:
-            # Log the error but don't fail the payment verification
-            logger.error(
-                f"Failed to send receipt email for order {order.ref}: {str(e)}"
-            )
-            email_message = "Payment verified (receipt email failed to send)."
+        cache.set(cache_key, body, settings.PAYMENT_VERIFY_RESULT_TTL)
+    return Response(body, status=200)
 
-        # Get order items with product details
-        order_items = OrderItem.objects.filter(order=order).select_related("product")
-        items_data = []
-        for item in order_items:
-            items_data.append(
-                {
-                    "id": item.id,
-                    "product": {
-                        "id": item.product.id,
-                        "title": item.product.title,
-                        "slug": item.product.slug,
-                        "price": item.product.price,
-                        "thumbnail": item.product.get_thumbnail(),
-                    },
-                    "quantity": item.quantity,
-                    "price": item.price,
-                    "fulfilled": item.fulfilled,
-                }
-            )
 
-        return Response(
-            {
-                "success": True,
-                "status": "paid",
-                "message": f"Payment verified successfully! {email_message}",
-                "order": {
-                    "ref": order.ref,
-                    "total_cost": order.total_cost,
-                    "is_paid": order.is_paid,
-                    "items": items_data,
+def _failed_payment_response():
+    return Response(
+        {
+            "success": False,
+            "status": "failed",
+            "message": "Payment was not successful",
+        },
+        status=400,
+    )
+
+
+def _payment_status_params(request):
+    seen = request.GET.get("status", "pending")
+    try:
+        wait = float(request.GET.get("wait", 0))
+    except ValueError:
+        wait = 0
+    return seen, max(0.0, min(wait, settings.PAYMENT_STATUS_MAX_WAIT))
+
+
+def _payment_status_body(ref, seen, current):
+    return {"reference": ref, "status": current, "changed": current != seen}
+
+
+@swagger_auto_schema(
+    method="get",
+    operation_summary="Wait for a payment status change",
+    operation_description=(
+        "Long-poll a payment's status. Returns as soon as the status differs "
+        "from `status` (default `pending`), or after `wait` seconds. Use this "
+        "instead of polling verify-payment after the Paystack redirect."
+    ),
+    security=[{"Bearer": []}],
+    manual_parameters=[
+        openapi.Parameter(
+            "wait",
+            openapi.IN_QUERY,
+            description="Seconds to wait for a change (max 25)",
+            type=openapi.TYPE_NUMBER,
+            required=False,
+        ),
+        openapi.Parameter(
+            "status",
+            openapi.IN_QUERY,
+            description="Status the client already has (default: pending)",
+            type=openapi.TYPE_STRING,
+            required=False,
+        ),
+    ],
+    responses={
+        200: openapi.Response(
+            description="Current payment status",
+            schema=openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    "reference": openapi.Schema(type=openapi.TYPE_STRING),
+                    "status": openapi.Schema(type=openapi.TYPE_STRING),
+                    "changed": openapi.Schema(type=openapi.TYPE_BOOLEAN),
                 },
-            },
-            status=200,
-        )
-    else:
-        payment.status = "failed"
-        payment.save()
-        return Response(
-            {
-                "success": False,
-                "status": "failed",
-                "message": "Payment was not successful",
-            },
-            status=400,
+            ),
+        ),
+        404: openapi.Response(description="Payment not found"),
+    },
+    tags=["Payment"],
+)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def payment_status_api(request, ref):
+    """
+    Long-poll a payment's status (WSGI).
+
+    Holds the worker while it re-checks the status every
+    ``PAYMENT_STATUS_POLL_SECONDS``; each check is a cache read or one
+    indexed query, never a Paystack call.
+    """
+    if not Payment.objects.filter(ref=ref, user=request.user).exists():
+        return Response({"detail": "Payment not found"}, status=404)
+
+    seen, wait = _payment_status_params(request)
+    current = wait_for_payment_status(ref, seen, wait)
+    return Response(_payment_status_body(ref, seen, current), status=200)
+
+
+def _authenticated_user(request):
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    if result is not None:
+        return result[0]
+    return request.user if request.user.is_authenticated else None
+
+
+async def payment_status_async_api(request, ref):
+    """
+    Long-poll a payment's status (ASGI).
+
+    Same contract as ``payment_status_api``, but waiting costs no thread:
+    the request sleeps on an event that ``finalize_payment`` sets, with a
+    periodic re-check for finalizations in other processes.
+    """
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+
+    user = await sync_to_async(_authenticated_user)(request)
+    if user is None:
+        return JsonResponse(
+            {"detail": "Authentication credentials were not provided."}, status=401
         )
+    if not await Payment.objects.filter(ref=ref, user=user).aexists():
+        return JsonResponse({"detail": "Payment not found"}, status=404)
+
+    seen, wait = _payment_status_params(request)
+    current = await await_payment_status(ref, seen, wait)
+    return JsonResponse(_payment_status_body(ref, seen, current), status=200)
 
 
 # Order History API
 @swagger_auto_schema(
     method="get",
     operation_summary="Get User Order History",
-    operation_description="Get all orders for the authenticated user",
+    operation_description="Get the authenticated user's paid orders, newest first (cursor-paginated)",
     security=[{"Bearer": []}],  # Add JWT auth requirement for Swagger
+    manual_parameters=[
+        openapi.Parameter(
+            "cursor",
+            openapi.IN_QUERY,
+            description="Opaque cursor from the previous response's next/previous link",
+            type=openapi.TYPE_STRING,
+            required=False,
+        ),
+        openapi.Parameter(
+            "page_size",
+            openapi.IN_QUERY,
+            description="Orders per page (default 10, max 50)",
+            type=openapi.TYPE_INTEGER,
+            required=False,
+        ),
+    ],
     responses={
         200: openapi.Response(
             description="Orders retrieved successfully",
@@ -1549,6 +1714,8 @@ def verify_payment_api(request):
                 type=openapi.TYPE_OBJECT,
                 properties={
                     "success": openapi.Schema(type=openapi.TYPE_BOOLEAN),
+                    "next": openapi.Schema(type=openapi.TYPE_STRING, x_nullable=True),
+                    "previous": openapi.Schema(type=openapi.TYPE_STRING, x_nullable=True),
                     "orders": openapi.Schema(
                         type=openapi.TYPE_ARRAY,
                         items=openapi.Schema(
@@ -1606,31 +1773,45 @@ def verify_payment_api(request):
 @permission_classes([IsAuthenticated])
 def order_history_api(request):
     """
-    Get all orders for the authenticated user.
+    Get the authenticated user's paid orders, newest first.
 
-    Returns a list of all orders made by the user, including order details
-    and items within each order. Orders are sorted by creation date (newest first).
+    Cursor-paginated (``?cursor=...&page_size=...``). The page is built with
+    a fixed number of queries: the payments with their orders, the items
+    with their products, and the user's reviews for those products.
     """
-    # request.user is already a UserProfile instance (custom user model)
     user_profile = request.user
 
-    # Get all orders for this user, ordered by newest first
-    orders = Payment.objects.filter(user=user_profile, status="paid").order_by(
-        "-created_at"
+    payments = (
+        Payment.objects.filter(user=user_profile, status="paid")
+        .select_related("order")
+        .prefetch_related(
+            Prefetch(
+                "order__items",
+                queryset=OrderItem.objects.select_related("product").order_by("pk"),
+            )
+        )
     )
 
+    paginator = OrderHistoryPagination()
+    page = paginator.paginate_queryset(payments, request)
+
+    product_ids = {item.product_id for payment in page for item in payment.order.items.all()}
+    reviews = {}
+    for review in Review.objects.filter(
+        author=user_profile, product_id__in=product_ids
+    ).order_by("pk"):
+        reviews.setdefault(review.product_id, review)
+
+    thumbnails = {}
     orders_data = []
-    for payment in orders:
-        # Get all items for this order through the payment's order
-        order_items = OrderItem.objects.filter(order=payment.order)
+    for payment in page:
         items_data = []
+        for item in payment.order.items.all():
+            product = item.product
+            if product.pk not in thumbnails:
+                thumbnails[product.pk] = product.get_thumbnail()
 
-        for item in order_items:
-            # Check if the user has reviewed this product
-            user_review = Review.objects.filter(
-                product=item.product, author=user_profile
-            ).first()
-
+            user_review = reviews.get(product.pk)
             review_data = None
             if user_review:
                 review_data = {
@@ -1645,11 +1826,11 @@ def order_history_api(request):
             items_data.append(
                 {
                     "product": {
-                        "id": item.product.pk,
-                        "title": item.product.title,
-                        "slug": item.product.slug,
-                        "price": item.product.price,
-                        "thumbnail": item.product.get_thumbnail(),
+                        "id": product.pk,
+                        "title": product.title,
+                        "slug": product.slug,
+                        "price": product.price,
+                        "thumbnail": thumbnails[product.pk],
                     },
                     "quantity": item.quantity,
                     "price": item.price,
@@ -1671,6 +1852,8 @@ def order_history_api(request):
     return Response(
         {
             "success": True,
+            "next": paginator.get_next_link(),
+            "previous": paginator.get_previous_link(),
             "orders": orders_data,
         },
         status=200,
@@ -1711,7 +1894,7 @@ def order_history_api(request):
                 },
             ),
         ),
-        500: openapi.Response(description="Error fetching banks from Paystack"),
+        304: openapi.Response(description="Bank list unchanged (ETag matched)"),
     },
     tags=["Banking"],
 )
@@ -1721,49 +1904,27 @@ def get_banks_api(request):
     """
     Get list of all banks from Paystack.
 
-    This endpoint fetches the current list of supported banks from Paystack.
+    The list is cached server-side (see ``store.banks``) and falls back to
+    the bundled bank table when Paystack is unavailable. Responses carry an
+    ETag, so clients revalidate with ``If-None-Match`` and get a 304.
     No authentication required.
     """
-    try:
-        url = f"{settings.PAYSTACK_BASE_URL}/bank"
-        headers = {
-            "Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}",
-            "Content-Type": "application/json",
-        }
+    entry = get_bank_list()
+    etag = f'"{entry["etag"]}"'
 
-        response = requests.get(url, headers=headers)
-
-        if response.status_code == 200:
-            data = response.json()
-            return Response(data, status=status.HTTP_200_OK)
-        else:
-            return Response(
-                {
-                    "status": False,
-                    "message": "Failed to fetch banks from Paystack",
-                    "error": response.text,
-                },
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
-
-    except requests.RequestException as e:
-        return Response(
-            {
-                "status": False,
-                "message": "Network error while fetching banks",
-                "error": str(e),
-            },
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-        )
-    except Exception as e:
-        return Response(
-            {
-                "status": False,
-                "message": "An unexpected error occurred",
-                "error": str(e),
-            },
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-        )
+    if etag in request.headers.get("If-None-Match", ""):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(entry["payload"], status=status.HTTP_200_OK)
+
+    response["ETag"] = etag
+    patch_cache_control(
+        response,
+        public=True,
+        max_age=settings.BANK_LIST_BROWSER_MAX_AGE,
+        stale_while_revalidate=settings.BANK_LIST_TTL,
+    )
+    return response
 
 
 @swagger_auto_schema(
@@ -1807,7 +1968,9 @@ def get_banks_api(request):
         400: openapi.Response(
             description="Invalid account details or validation failed"
         ),
-        500: openapi.Response(description="Error verifying account with Paystack"),
+        500: openapi.Response(description="Unexpected error verifying the account"),
+        502: openapi.Response(description="Paystack failed to verify the account"),
+        503: openapi.Response(description="Paystack unreachable or rate limiting"),
     },
     tags=["Banking"],
 )
@@ -1819,6 +1982,7 @@ def verify_account_api(request):
 
     This endpoint verifies if the provided account number and bank code
     correspond to a valid bank account and returns the account holder's name.
+    Lookups are memoized per account (see ``store.banks.resolve_account``).
     """
     account_number = request.data.get("account_number")
     bank_code = request.data.get("bank_code")
@@ -1843,41 +2007,7 @@ def verify_account_api(request):
         )
 
     try:
-        url = f"{settings.PAYSTACK_BASE_URL}/bank/resolve"
-        headers = {
-            "Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}",
-            "Content-Type": "application/json",
-        }
-
-        params = {
-            "account_number": account_number,
-            "bank_code": bank_code,
-        }
-
-        response = requests.get(url, headers=headers, params=params)
-        data = response.json()
-
-        if response.status_code == 200 and data.get("status"):
-            return Response(data, status=status.HTTP_200_OK)
-        else:
-            error_message = data.get("message", "Account verification failed")
-            return Response(
-                {
-                    "status": False,
-                    "message": error_message,
-                },
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-    except requests.RequestException as e:
-        return Response(
-            {
-                "status": False,
-                "message": "Network error while verifying account",
-                "error": str(e),
-            },
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-        )
+        result = resolve_account(account_number, bank_code)
     except Exception as e:
         return Response(
             {
@@ -1887,3 +2017,4 @@ def verify_account_api(request):
             },
             status=status.HTTP_500_INTERNAL_SERVER_ERROR,
         )
+    return Response(result["body"], status=result["status_code"])
@@ -0,0 +1,263 @@
+"""
+Cached Paystack bank list.
+
+``get_bank_list`` serves the list from the cache:
+
+* fresh (younger than ``BANK_LIST_TTL``) – returned as is;
+* stale (younger than ``BANK_LIST_STALE_TTL``) – returned as is while one
+  background thread refreshes it from Paystack (stale-while-revalidate);
+* missing, with Paystack unreachable – built from the bundled
+  ``NIGERIAN_BANK_CODES`` table, so onboarding keeps working during an outage
+  (retried in the background after ``BANK_LIST_FALLBACK_TTL``).
+
+Every entry carries an ETag computed once when it is stored, so the view can
+answer ``If-None-Match`` without serializing the list again.
+
+``resolve_account`` memoizes Paystack's account-name lookups per
+``(bank_code, account_number)``. Successful lookups are cached for
+``ACCOUNT_RESOLVE_TTL`` and accounts Paystack rejects for
+``ACCOUNT_RESOLVE_NEGATIVE_TTL``; outages and rate limiting are not cached.
+Identical lookups running at the same time in one process share a single
+Paystack call.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.text import slugify
+
+from userprofile.bank_codes import NIGERIAN_BANK_CODES
+
+from .paystack import paystack_client
+
+logger = logging.getLogger(__name__)
+
+BANK_LIST_CACHE_KEY = "paystack:banks"
+BANK_LIST_REFRESH_LOCK_KEY = "paystack:banks:refreshing"
+
+SOURCE_PAYSTACK = "paystack"
+SOURCE_FALLBACK = "fallback"
+
+
+def _ttl():
+    return getattr(settings, "BANK_LIST_TTL", 60 * 60 * 24)
+
+
+def _stale_ttl():
+    return getattr(settings, "BANK_LIST_STALE_TTL", 60 * 60 * 24 * 7)
+
+
+def _entry(payload, source):
+    body = json.dumps(payload["data"], sort_keys=True, separators=(",", ":"))
+    return {
+        "payload": payload,
+        "etag": hashlib.md5(body.encode("utf-8")).hexdigest(),
+        "source": source,
+        "fetched_at": time.time(),
+    }
+
+
+def fallback_bank_list():
+    """The bundled bank table in Paystack's ``/bank`` response shape."""
+    return {
+        "status": True,
+        "message": "Banks retrieved",
+        "data": [
+            {
+                "name": name,
+                "slug": slugify(name),
+                "code": code,
+                "active": True,
+                "country": "Nigeria",
+                "currency": "NGN",
+                "type": "nuban",
+            }
+            for code, name in sorted(NIGERIAN_BANK_CODES.items(), key=lambda item: item[1])
+        ],
+    }
+
+
+def refresh_bank_list(timeout=None, retry=True):
+    """
+    Fetch the list from Paystack and cache it.
+
+    Returns the new cache entry, or None if Paystack could not be reached or
+    returned an error or a body that is not JSON (the existing entry is left
+    in place). ``retry=False`` makes a single attempt, for callers that have
+    a fallback and should not sit through the client's backoff.
+    """
+    try:
+        response = paystack_client.get("bank", timeout=timeout, idempotent=retry)
+    except requests.RequestException as e:
+        logger.warning(f"Bank list refresh failed: {e}")
+        return None
+    if response.status_code != 200:
+        logger.warning(f"Bank list refresh failed: Paystack returned {response.status_code}")
+        return None
+
+    try:
+        payload = response.json()
+    except ValueError:
+        logger.warning("Bank list refresh failed: Paystack returned a non-JSON body")
+        return None
+    if not isinstance(payload, dict) or not payload.get("status") or not payload.get("data"):
+        logger.warning("Bank list refresh returned no banks; keeping the cached list")
+        return None
+
+    entry = _entry(payload, SOURCE_PAYSTACK)
+    cache.set(BANK_LIST_CACHE_KEY, entry, _stale_ttl())
+    return entry
+
+
+def _refresh_locked():
+    # On failure the lock is left to expire, which spaces out the retries.
+    try:
+        refreshed = refresh_bank_list()
+    except Exception:
+        logger.exception("Background bank list refresh crashed")
+        return
+    if refreshed is not None:
+        cache.delete(BANK_LIST_REFRESH_LOCK_KEY)
+
+
+def _refresh_in_background():
+    # Only one refresh at a time across workers sharing the cache.
+    if not cache.add(BANK_LIST_REFRESH_LOCK_KEY, True, 60):
+        return
+    threading.Thread(target=_refresh_locked, daemon=True).start()
+
+
+def get_bank_list():
+    """Return the bank list cache entry (``payload``, ``etag``, ``source``)."""
+    entry = cache.get(BANK_LIST_CACHE_KEY)
+    if entry is not None:
+        if entry["source"] == SOURCE_FALLBACK:
+            fresh_for = getattr(settings, "BANK_LIST_FALLBACK_TTL", 300)
+        else:
+            fresh_for = _ttl()
+        if time.time() - entry["fetched_at"] >= fresh_for:
+            _refresh_in_background()
+        return entry
+
+    # A request is waiting and the bundled table is a fine answer, so make one
+    # short attempt instead of the client's full retry schedule.
+    entry = refresh_bank_list(
+        timeout=getattr(settings, "BANK_LIST_COLD_TIMEOUT", 3), retry=False
+    )
+    if entry is None:
+        # Cold cache and Paystack is down: serve the bundled table and retry
+        # Paystack in the background after BANK_LIST_FALLBACK_TTL.
+        entry = _entry(fallback_bank_list(), SOURCE_FALLBACK)
+        cache.set(BANK_LIST_CACHE_KEY, entry, _stale_ttl())
+    return entry
+
+
+# ── Account resolution ───────────────────────────────────────────────────────
+
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def _account_cache_key(account_number, bank_code):
+    return f"paystack:resolve:{bank_code}:{account_number}"
+
+
+def _unavailable(status_code, message, error=None):
+    body = {"status": False, "message": message}
+    if error is not None:
+        body["error"] = error
+    return {"status_code": status_code, "body": body, "cacheable": False}
+
+
+def _resolve_uncached(account_number, bank_code):
+    try:
+        response = paystack_client.get(
+            "bank/resolve",
+            params={"account_number": account_number, "bank_code": bank_code},
+        )
+    except requests.RequestException as e:
+        return _unavailable(503, "Network error while verifying account", str(e))
+
+    # Rate limiting and Paystack-side errors say nothing about the account,
+    # so they are reported as upstream failures and never cached.
+    if response.status_code == 429:
+        return _unavailable(503, "Account verification is busy, please retry shortly")
+    if response.status_code >= 500:
+        return _unavailable(502, "Paystack could not verify the account right now")
+
+    try:
+        data = response.json()
+    except ValueError:
+        return _unavailable(502, "Invalid response while verifying account")
+
+    if response.status_code == 200 and data.get("status"):
+        return {"status_code": 200, "body": data, "cacheable": True}
+    return {
+        "status_code": 400,
+        "body": {
+            "status": False,
+            "message": data.get("message", "Account verification failed"),
+        },
+        "cacheable": True,
+    }
+
+
+def cached_account_resolution(account_number, bank_code):
+    """Return the cached lookup result, or None. Never calls Paystack."""
+    return cache.get(_account_cache_key(account_number, bank_code))
+
+
+def resolve_account(account_number, bank_code):
+    """
+    Resolve an account name through Paystack, memoized and coalesced.
+
+    Returns ``{"status_code": ..., "body": ...}``: 200 with Paystack's
+    response, 400 when Paystack rejects the account (both cached), or an
+    uncached 503 on network errors and rate limiting and 502 on Paystack
+    server errors.
+    """
+    key = _account_cache_key(account_number, bank_code)
+    result = cache.get(key)
+    if result is not None:
+        return result
+
+    with _inflight_lock:
+        call = _inflight.get(key)
+        leader = call is None
+        if leader:
+            call = _inflight[key] = _InFlight()
+
+    if not leader:
+        call.done.wait(timeout=30)
+        if call.result is not None:
+            return call.result
+        result = _resolve_uncached(account_number, bank_code)
+        result.pop("cacheable")
+        return result
+
+    try:
+        result = _resolve_uncached(account_number, bank_code)
+        if result.pop("cacheable"):
+            if result["status_code"] == 200:
+                ttl = getattr(settings, "ACCOUNT_RESOLVE_TTL", 60 * 60 * 24)
+            else:
+                ttl = getattr(settings, "ACCOUNT_RESOLVE_NEGATIVE_TTL", 30)
+            cache.set(key, result, ttl)
+        call.result = result
+        return result
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+        call.done.set()
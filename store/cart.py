@@ -1,147 +1,126 @@
-from django.conf import settings
-from django.db import models
-from .models import Product, CartItem
+from .models import Product
+from .cart_storage import SessionCartStorage, get_cart_storage, get_user_cart_storage
+
+
+def merge_session_cart(request, user):
+    """
+    Move an anonymous session cart into the user's cart storage.
+
+    Quantities already in the user's cart are summed with the session
+    quantities and capped at the product's available stock. All lines are
+    written with one ``set_many`` call (a single bulk upsert for the database
+    backend) and the session entry is cleared afterwards, so this is safe to
+    call on every login.
+
+    Returns the number of cart lines merged.
+    """
+    session_storage = SessionCartStorage(request.session)
+    wanted = {
+        product_id: quantity
+        for product_id, quantity in session_storage.load().items()
+        if quantity > 0
+    }
+    if not wanted:
+        session_storage.clear()
+        return 0
+
+    storage = get_user_cart_storage(user)
+    existing = storage.load()
+    products = (
+        Product.objects.filter(pk__in=wanted)
+        .exclude(status=Product.DELETED)
+        .exclude(vendor__user=user)
+        .only("id", "quantity")
+    )
+
+    merged = {}
+    for product in products:
+        quantity = min(
+            existing.get(product.id, 0) + wanted[product.id], product.quantity
+        )
+        if quantity > 0:
+            merged[product.id] = quantity
+
+    storage.set_many(merged)
+    # Don't leave a freshly merged cart only in a write-behind buffer.
+    storage.flush()
+    session_storage.clear()
+    return len(merged)
 
 
 class Cart(object):
+    """
+    Shopping cart for the current request.
+
+    Storage is delegated to a backend from ``store.cart_storage``: the session
+    for anonymous visitors and ``settings.CART_STORAGE_BACKEND`` for
+    authenticated users.
+    """
+
     def __init__(self, request):
         self.session = request.session
         self.request = request
         self.user = request.user if request.user.is_authenticated else None
+        self.storage = get_cart_storage(request)
 
-        # For authenticated users, use database storage
-        if self.user:
-            self.cart = None  # We'll load from database
-        else:
-            # For anonymous users, use session storage
-            cart = self.session.get(settings.CART_SESSION_ID)
-            if not cart:
-                cart = self.session[settings.CART_SESSION_ID] = {}
-            self.cart = cart
+    def _lines(self):
+        quantities = self.storage.load()
+        products = Product.objects.select_related("vendor").in_bulk(list(quantities))
+        for product_id, quantity in quantities.items():
+            product = products.get(product_id)
+            if product is None:
+                continue
+            yield product, quantity
 
     def __iter__(self):
-        if self.user:
-            # For authenticated users, iterate through CartItem objects
-            cart_items = CartItem.objects.filter(user=self.user).select_related(
-                "product"
-            )
-            for cart_item in cart_items:
-                yield {
-                    "product": cart_item.product,
-                    "quantity": cart_item.quantity,
-                    "total_price": cart_item.total_price,
-                    "id": str(cart_item.product.id),
-                }
-        else:
-            # For anonymous users, use session-based iteration
-            if self.cart:
-                for p in self.cart.keys():
-                    self.cart[str(p)]["product"] = Product.objects.get(pk=p)
-
-                for item in self.cart.values():
-                    item["total_price"] = int(item["product"].price * item["quantity"])
-                    yield item
+        for product, quantity in self._lines():
+            yield {
+                "product": product,
+                "quantity": quantity,
+                "total_price": int(product.price * quantity),
+                "id": str(product.id),
+            }
 
     def __len__(self):
-        if self.user:
-            # For authenticated users, count CartItem objects
-            return (
-                CartItem.objects.filter(user=self.user).aggregate(
-                    total=models.Sum("quantity")
-                )["total"]
-                or 0
-            )
-        else:
-            # For anonymous users, use session-based count
-            if self.cart:
-                return sum(item["quantity"] for item in self.cart.values())
-            return 0
+        return sum(self.storage.load().values())
 
     def save(self):
-        if not self.user and self.cart is not None:
-            # Only save session for anonymous users
-            self.session[settings.CART_SESSION_ID] = self.cart
-            self.session.modified = True
+        """Kept for callers that mutate the session directly."""
+        self.session.modified = True
 
     def add(self, product_id, quantity=1, update_quantity=False):
-        if self.user:
-            # For authenticated users, use database storage
-            try:
-                product = Product.objects.get(id=product_id)
-                cart_item, created = CartItem.objects.get_or_create(
-                    user=self.user, product=product, defaults={"quantity": quantity}
-                )
-
-                if not created and update_quantity:
-                    cart_item.quantity += int(quantity)
-                    if cart_item.quantity <= 0:
-                        cart_item.delete()
-                        return
-                elif not created:
-                    cart_item.quantity = int(quantity)
-
-                cart_item.save()
-            except Product.DoesNotExist:
-                pass
-        else:
-            # For anonymous users, use session storage
-            if self.cart is not None:
-                product_id = str(product_id)
+        try:
+            product_id = int(product_id)
+            quantity = int(quantity)
+        except (TypeError, ValueError):
+            return
 
-                if product_id not in self.cart:
-                    self.cart[product_id] = {"quantity": quantity, "id": product_id}
+        if not Product.objects.filter(pk=product_id).exists():
+            return
 
-                if update_quantity:
-                    self.cart[product_id]["quantity"] += int(quantity)
+        current = self.storage.load().get(product_id)
+        if current is not None and update_quantity:
+            quantity = current + quantity
 
-                    if self.cart[product_id]["quantity"] == 0:
-                        self.remove(product_id)
-
-                self.save()
+        if quantity <= 0:
+            self.storage.remove(product_id)
+        else:
+            self.storage.set(product_id, quantity)
 
     def get_total_cost(self):
-        if self.user:
-            # For authenticated users, calculate from CartItem objects
-            total = 0
-            cart_items = CartItem.objects.filter(user=self.user).select_related(
-                "product"
-            )
-            for cart_item in cart_items:
-                total += cart_item.total_price
-            return int(total)
-        else:
-            # For anonymous users, use session-based calculation
-            if self.cart:
-                for p in self.cart.keys():
-                    self.cart[str(p)]["product"] = Product.objects.get(pk=p)
-
-                return int(
-                    sum(
-                        item["product"].price * item["quantity"]
-                        for item in self.cart.values()
-                    )
-                )
-            return 0
+        return int(
+            sum(product.price * quantity for product, quantity in self._lines())
+        )
 
     def remove(self, product_id):
-        if self.user:
-            # For authenticated users, remove from database
-            try:
-                CartItem.objects.filter(user=self.user, product_id=product_id).delete()
-            except CartItem.DoesNotExist:
-                pass
-        else:
-            # For anonymous users, remove from session
-            if self.cart and str(product_id) in self.cart:
-                del self.cart[str(product_id)]
-                self.save()
+        try:
+            self.storage.remove(int(product_id))
+        except (TypeError, ValueError):
+            pass
 
     def clear(self):
-        if self.user:
-            # For authenticated users, clear database entries
-            CartItem.objects.filter(user=self.user).delete()
-        else:
-            # For anonymous users, clear session
-            if settings.CART_SESSION_ID in self.session:
-                del self.session[settings.CART_SESSION_ID]
-                self.session.modified = True
+        self.storage.clear()
+
+    def persist(self):
+        """Write any buffered cart changes to the database (see ``CacheCartStorage``)."""
+        self.storage.flush()
@@ -0,0 +1,298 @@
+"""
+Cart storage backends.
+
+``Cart`` delegates persistence to one of these backends. Each backend deals
+only in ``{product_id: quantity}`` mappings; resolving products, prices and
+totals stays in ``Cart`` so every backend behaves the same way.
+
+Anonymous visitors always use ``SessionCartStorage``. Authenticated users use
+the backend named by ``settings.CART_STORAGE_BACKEND``:
+
+* ``store.cart_storage.DatabaseCartStorage`` – one ``CartItem`` row per line
+  (default).
+* ``store.cart_storage.CacheCartStorage`` – a compact per-user hash in Django's
+  cache, persisted to ``CartItem`` behind the writes.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+from .models import CartItem
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CART_STORAGE_BACKEND = "store.cart_storage.DatabaseCartStorage"
+
+
+class BaseCartStorage:
+    """Interface shared by all cart storage backends."""
+
+    def load(self):
+        """Return the cart as an ordered ``{product_id: quantity}`` dict."""
+        raise NotImplementedError
+
+    def set(self, product_id, quantity):
+        """Set the quantity of a single line."""
+        self.set_many({product_id: quantity})
+
+    def set_many(self, quantities):
+        """Set the quantity of several lines at once."""
+        raise NotImplementedError
+
+    def remove(self, product_id):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def flush(self):
+        """Persist buffered writes. No-op for write-through backends."""
+
+
+class SessionCartStorage(BaseCartStorage):
+    """Anonymous carts kept in the session under ``CART_SESSION_ID``."""
+
+    def __init__(self, session):
+        self.session = session
+
+    def _cart(self):
+        return self.session.get(settings.CART_SESSION_ID) or {}
+
+    def _save(self, cart):
+        self.session[settings.CART_SESSION_ID] = cart
+        self.session.modified = True
+
+    def load(self):
+        quantities = {}
+        for key, item in self._cart().items():
+            try:
+                quantities[int(item.get("id", key))] = int(item["quantity"])
+            except (TypeError, ValueError, KeyError, AttributeError):
+                continue
+        return quantities
+
+    def set_many(self, quantities):
+        cart = self._cart()
+        for product_id, quantity in quantities.items():
+            cart[str(product_id)] = {"quantity": quantity, "id": str(product_id)}
+        self._save(cart)
+
+    def remove(self, product_id):
+        cart = self._cart()
+        if str(product_id) in cart:
+            del cart[str(product_id)]
+            self._save(cart)
+
+    def clear(self):
+        if settings.CART_SESSION_ID in self.session:
+            del self.session[settings.CART_SESSION_ID]
+            self.session.modified = True
+
+
+class DatabaseCartStorage(BaseCartStorage):
+    """Write-through storage on the ``CartItem`` table."""
+
+    def __init__(self, user):
+        self.user = user
+
+    def load(self):
+        return dict(
+            CartItem.objects.filter(user=self.user).values_list("product_id", "quantity")
+        )
+
+    def set_many(self, quantities):
+        if not quantities:
+            return
+        CartItem.objects.bulk_create(
+            [
+                CartItem(user=self.user, product_id=product_id, quantity=quantity)
+                for product_id, quantity in quantities.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["user", "product"],
+            update_fields=["quantity", "updated_at"],
+        )
+
+    def remove(self, product_id):
+        CartItem.objects.filter(user=self.user, product_id=product_id).delete()
+
+    def clear(self):
+        CartItem.objects.filter(user=self.user).delete()
+
+    def replace(self, quantities):
+        """Make the table match ``quantities`` exactly (used by write-behind)."""
+        CartItem.objects.filter(user=self.user).exclude(
+            product_id__in=list(quantities)
+        ).delete()
+        self.set_many(quantities)
+
+
+class CacheCartStorage(BaseCartStorage):
+    """
+    Per-user ``{product_id: quantity}`` hash in the cache, written behind to
+    ``CartItem``.
+
+    Reads never touch the database once the hash is warm. Writes mark the cart
+    dirty; the hash is copied to ``CartItem`` once it has been dirty for
+    ``CART_WRITE_BEHIND_SECONDS``, on ``clear()``, at checkout and login
+    merge (``Cart.persist`` / ``merge_session_cart``), or by the ``flush_cart_storage`` management
+    command. A cache miss (eviction or restart) reloads the hash from
+    ``CartItem``, so at most the changes since the last flush can be lost.
+
+    The first write after a flush sets the user's dirty flag with
+    ``cache.add`` and appends the user to the dirty list: ``cache.incr`` on a
+    counter hands out a slot number and the slot key holds the user id.
+    Neither step reads and rewrites shared state, so concurrent writers cannot
+    drop each other, and ``flush_dirty`` reads only the slots added since its
+    last run. The command runs in its own process, so this backend needs a
+    cache shared between processes (see ``store.checks``).
+    """
+
+    DIRTY_SEQ_KEY = "cart:dirty:seq"
+    DIRTY_CURSOR_KEY = "cart:dirty:cursor"
+    FLUSH_LOCK_KEY = "cart:dirty:flushing"
+    FLUSH_BATCH_SIZE = 500
+
+    def __init__(self, user):
+        self.user = user
+        self.cache = caches[getattr(settings, "CART_CACHE_ALIAS", "default")]
+        self.timeout = getattr(settings, "CART_CACHE_TIMEOUT", 60 * 60 * 24 * 7)
+        self.write_behind_seconds = getattr(settings, "CART_WRITE_BEHIND_SECONDS", 30)
+        self.key = f"cart:{user.pk}"
+        self.dirty_key = self.dirty_key_for(user.pk)
+        self._db = DatabaseCartStorage(user)
+
+    @staticmethod
+    def dirty_key_for(user_pk):
+        return f"cart:{user_pk}:dirty"
+
+    @staticmethod
+    def _slot_key(slot):
+        return f"cart:dirty:slot:{slot}"
+
+    def load(self):
+        quantities = self.cache.get(self.key)
+        if quantities is None:
+            quantities = self._db.load()
+            self.cache.set(self.key, quantities, self.timeout)
+        return dict(quantities)
+
+    def _next_slot(self):
+        # The counter never expires; add() only seeds it when it is missing.
+        self.cache.add(self.DIRTY_SEQ_KEY, 0, None)
+        try:
+            return self.cache.incr(self.DIRTY_SEQ_KEY)
+        except ValueError:
+            # Evicted between add() and incr().
+            self.cache.add(self.DIRTY_SEQ_KEY, 0, None)
+            return self.cache.incr(self.DIRTY_SEQ_KEY)
+
+    def _mark_dirty(self, now):
+        """Flag the cart dirty; returns the time it became dirty."""
+        if not self.cache.add(self.dirty_key, now, self.timeout):
+            return self.cache.get(self.dirty_key) or now
+        self.cache.set(self._slot_key(self._next_slot()), self.user.pk, self.timeout)
+        return now
+
+    def _write(self, quantities):
+        self.cache.set(self.key, quantities, self.timeout)
+
+        now = time.time()
+        if now - self._mark_dirty(now) >= self.write_behind_seconds:
+            self.flush()
+
+    def set_many(self, quantities):
+        if not quantities:
+            return
+        cart = self.load()
+        cart.update(quantities)
+        self._write(cart)
+
+    def remove(self, product_id):
+        cart = self.load()
+        if cart.pop(int(product_id), None) is not None:
+            self._write(cart)
+
+    def clear(self):
+        # Clearing happens after payment, so persist it immediately rather
+        # than risk a paid cart reappearing after an eviction.
+        self.cache.set(self.key, {}, self.timeout)
+        self.cache.delete(self.dirty_key)
+        self._db.clear()
+
+    def flush(self):
+        # Drop the flag before reading, so a write that lands mid-flush marks
+        # the cart dirty again instead of being silently dropped.
+        self.cache.delete(self.dirty_key)
+        quantities = self.cache.get(self.key)
+        if quantities is not None:
+            self._db.replace(quantities)
+
+    @classmethod
+    def flush_dirty(cls, user_model):
+        """Flush every cart on the dirty list. Returns the count."""
+        cache = caches[getattr(settings, "CART_CACHE_ALIAS", "default")]
+        if not cache.add(cls.FLUSH_LOCK_KEY, True, 60 * 5):
+            logger.info("Cart flush already running; skipping")
+            return 0
+        try:
+            return cls._flush_dirty_list(cache, user_model)
+        finally:
+            cache.delete(cls.FLUSH_LOCK_KEY)
+
+    @classmethod
+    def _flush_dirty_list(cls, cache, user_model):
+        seq = cache.get(cls.DIRTY_SEQ_KEY) or 0
+        cursor, recheck = cache.get(cls.DIRTY_CURSOR_KEY) or (0, [])
+        if cursor > seq:
+            # The counter was lost and restarted; so were the old slots.
+            cursor, recheck = 0, []
+
+        # A slot can be missing because its writer has taken the number but
+        # not stored the slot yet; look for those once more on the next run.
+        slots = recheck + list(range(cursor + 1, seq + 1))
+        missing = []
+        flushed = 0
+        for start in range(0, len(slots), cls.FLUSH_BATCH_SIZE):
+            keys = {cls._slot_key(slot): slot for slot in slots[start:start + cls.FLUSH_BATCH_SIZE]}
+            found = cache.get_many(list(keys))
+            missing += [slot for key, slot in keys.items() if key not in found and slot > cursor]
+            flushed += cls._flush_users(cache, user_model, set(found.values()))
+            cache.delete_many(list(found))
+
+        cache.set(cls.DIRTY_CURSOR_KEY, (seq, missing), None)
+        return flushed
+
+    @classmethod
+    def _flush_users(cls, cache, user_model, user_ids):
+        # Carts flushed in-request since they were listed are already clean.
+        dirty = cache.get_many([cls.dirty_key_for(user_id) for user_id in user_ids])
+        dirty_ids = [user_id for user_id in user_ids if cls.dirty_key_for(user_id) in dirty]
+        if not dirty_ids:
+            return 0
+
+        flushed = 0
+        for user in user_model.objects.filter(pk__in=dirty_ids):
+            try:
+                cls(user).flush()
+                flushed += 1
+            except Exception as e:
+                logger.error(f"Failed to flush cart for user {user.pk}: {e}")
+        return flushed
+
+
+def get_cart_storage(request):
+    """Return the storage backend for the current request's cart."""
+    if request.user.is_authenticated:
+        return get_user_cart_storage(request.user)
+    return SessionCartStorage(request.session)
+
+
+def get_user_cart_storage(user):
+    backend_path = getattr(
+        settings, "CART_STORAGE_BACKEND", DEFAULT_CART_STORAGE_BACKEND
+    )
+    return import_string(backend_path)(user)
@@ -0,0 +1,37 @@
+"""System checks for store settings."""
+from django.conf import settings
+from django.core.checks import Error, register
+
+from .cart_storage import DEFAULT_CART_STORAGE_BACKEND
+
+# Caches that live inside one process (or store nothing), so the
+# flush_cart_storage command never sees what the web workers buffered.
+PROCESS_LOCAL_CACHES = frozenset(
+    {
+        "django.core.cache.backends.locmem.LocMemCache",
+        "django.core.cache.backends.dummy.DummyCache",
+    }
+)
+
+
+@register()
+def check_cart_cache(app_configs, **kwargs):
+    backend = getattr(settings, "CART_STORAGE_BACKEND", DEFAULT_CART_STORAGE_BACKEND)
+    if backend != "store.cart_storage.CacheCartStorage":
+        return []
+
+    alias = getattr(settings, "CART_CACHE_ALIAS", "default")
+    cache_backend = settings.CACHES.get(alias, {}).get("BACKEND")
+    if cache_backend in PROCESS_LOCAL_CACHES:
+        return [
+            Error(
+                f"CacheCartStorage needs a cache shared between processes, but "
+                f"CACHES['{alias}'] uses {cache_backend}.",
+                hint=(
+                    "Point CACHE_BACKEND at Redis, Memcached or the database cache, "
+                    "or keep CART_STORAGE_BACKEND at DatabaseCartStorage."
+                ),
+                id="store.E001",
+            )
+        ]
+    return []
@@ -0,0 +1,27 @@
+"""
+Index-friendly date filters.
+
+``created_at__date__gte=day`` wraps the column in a cast to a local date,
+so no index on ``created_at`` can serve it. ``date_range_lookups`` turns
+inclusive local dates into a half-open range on the raw datetime column
+instead: ``>= start of the first day`` and ``< start of the day after the
+last``.
+"""
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+
+def local_day_start(day):
+    """Midnight at the start of ``day`` in the current time zone, as an aware datetime."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def date_range_lookups(field, start=None, end=None):
+    """Filter kwargs selecting ``field`` values on local dates ``start``..``end`` (inclusive)."""
+    lookups = {}
+    if start is not None:
+        lookups[f"{field}__gte"] = local_day_start(start)
+    if end is not None:
+        lookups[f"{field}__lt"] = local_day_start(end + timedelta(days=1))
+    return lookups
@@ -0,0 +1,174 @@
+"""
+Stock reservations for checkout.
+
+Checkout calls ``reserve_stock`` before handing the customer to Paystack.
+Each product is decremented with one conditional UPDATE
+(``Product.decrement_stock``), so two buyers racing for the last unit cannot
+both win. The held units are recorded as ``StockReservation`` rows keyed by
+the payment reference and are then either:
+
+* committed by ``commit_reservations`` once the payment succeeds, or
+* returned by ``release_reservations`` (Paystack init failed) or
+  ``release_expired_reservations`` (payment never arrived).
+"""
+import logging
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from userprofile.vendor_stats import product_stock_changed
+
+from .models import Product, StockReservation
+
+logger = logging.getLogger(__name__)
+
+
+class InsufficientStock(Exception):
+    """Raised when a cart line asks for more units than are left."""
+
+    def __init__(self, product, requested):
+        self.product = product
+        self.requested = requested
+        super().__init__(
+            f"Only {product.quantity} unit(s) of '{product.title}' left; "
+            f"{requested} requested."
+        )
+
+
+def _reservation_ttl():
+    return timedelta(minutes=getattr(settings, "STOCK_RESERVATION_MINUTES", 30))
+
+
+def _quantities_by_product(lines):
+    wanted = Counter()
+    for item in lines:
+        wanted[item["product"].id] += int(item["quantity"])
+    return wanted
+
+
+def reserve_stock(ref, cart_lines):
+    """
+    Take the units for every cart line or none of them.
+
+    Products are decremented in primary-key order so concurrent checkouts
+    always lock rows in the same order. Raises ``InsufficientStock`` (and
+    rolls back every decrement) if any line cannot be satisfied.
+    """
+    wanted = _quantities_by_product(cart_lines)
+    products = {item["product"].id: item["product"] for item in cart_lines}
+    expires_at = timezone.now() + _reservation_ttl()
+
+    with transaction.atomic():
+        for product_id in sorted(wanted):
+            if not Product.decrement_stock(product_id, wanted[product_id]):
+                product = products[product_id]
+                product.refresh_from_db(fields=["quantity", "stock"])
+                raise InsufficientStock(product, wanted[product_id])
+
+        product_stock_changed({product_id: -quantity for product_id, quantity in wanted.items()})
+        return StockReservation.objects.bulk_create(
+            [
+                StockReservation(
+                    ref=ref,
+                    product_id=product_id,
+                    quantity=quantity,
+                    expires_at=expires_at,
+                )
+                for product_id, quantity in wanted.items()
+            ]
+        )
+
+
+def _release(reservations):
+    released = 0
+    for reservation in reservations:
+        with transaction.atomic():
+            # Claim the row first so a concurrent commit or release cannot
+            # return the same units twice.
+            claimed = StockReservation.objects.filter(
+                pk=reservation.pk, status=StockReservation.HELD
+            ).update(status=StockReservation.RELEASED)
+            if claimed:
+                Product.increment_stock(reservation.product_id, reservation.quantity)
+                product_stock_changed({reservation.product_id: reservation.quantity})
+                released += 1
+    return released
+
+
+def release_reservations(ref):
+    """Return every unit still held for ``ref``. Returns the number released."""
+    return _release(
+        StockReservation.objects.filter(ref=ref, status=StockReservation.HELD)
+    )
+
+
+def release_expired_reservations(now=None, batch_size=500):
+    """Return units held past their expiry. Returns the number released."""
+    now = now or timezone.now()
+    expired = StockReservation.objects.filter(
+        status=StockReservation.HELD, expires_at__lte=now
+    ).only("pk", "product_id", "quantity")[:batch_size]
+    released = _release(list(expired))
+    if released:
+        logger.info(f"Released {released} expired stock reservation(s)")
+    return released
+
+
+def commit_reservations(ref, order_items):
+    """
+    Make the stock movement for a paid order permanent.
+
+    Units still held for ``ref`` are simply marked committed. Any line without
+    a live reservation (it expired before payment arrived, or the order
+    predates reservations) is decremented now instead, all such lines in a
+    single UPDATE. If the stock has gone in the meantime the oversell is
+    logged for manual follow-up rather than failing the payment.
+    """
+    with transaction.atomic():
+        held = list(
+            StockReservation.objects.select_for_update()
+            .filter(ref=ref, status=StockReservation.HELD)
+            .values_list("pk", "product_id", "quantity")
+        )
+        StockReservation.objects.filter(
+            pk__in=[pk for pk, _, _ in held]
+        ).update(status=StockReservation.COMMITTED)
+
+        covered = Counter()
+        for _, product_id, quantity in held:
+            covered[product_id] += quantity
+
+        ordered = Counter()
+        for item in order_items:
+            ordered[item.product_id] += item.quantity
+
+        shortfall = {
+            product_id: quantity - covered[product_id]
+            for product_id, quantity in ordered.items()
+            if quantity > covered[product_id]
+        }
+        if not shortfall:
+            return
+
+        # Locked, so the clamped amount actually taken below is exact.
+        on_hand = dict(
+            Product.objects.select_for_update()
+            .filter(pk__in=list(shortfall))
+            .values_list("pk", "quantity")
+        )
+        for product_id, quantity in shortfall.items():
+            if on_hand.get(product_id, 0) < quantity:
+                logger.error(
+                    f"Payment {ref}: oversold product {product_id} by "
+                    f"{quantity - on_hand.get(product_id, 0)} unit(s)"
+                )
+        Product.decrement_stock_many(shortfall)
+        product_stock_changed(
+            {
+                product_id: -min(quantity, on_hand.get(product_id, 0))
+                for product_id, quantity in shortfall.items()
+            }
+        )
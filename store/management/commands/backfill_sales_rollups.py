@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from store.analytics import backfill_sales_rollups
+from store.models import Order
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the VendorDailySales and ProductDailySales rollups from paid "
+        "orders. Replaces existing rows in the range, one chunk of days at a time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--from",
+            dest="start",
+            help="First day, YYYY-MM-DD (default: the first paid order).",
+        )
+        parser.add_argument("--to", dest="end", help="Last day, YYYY-MM-DD (default: today).")
+        parser.add_argument(
+            "--chunk-days",
+            type=int,
+            default=31,
+            help="Days rebuilt per transaction (default: 31).",
+        )
+
+    def _date(self, value, name):
+        parsed = parse_date(value)
+        if parsed is None:
+            raise CommandError(f"--{name} must be a date in YYYY-MM-DD format.")
+        return parsed
+
+    def handle(self, *args, **options):
+        end = self._date(options["end"], "to") if options["end"] else timezone.localdate()
+        if options["start"]:
+            start = self._date(options["start"], "from")
+        else:
+            first = Order.objects.filter(is_paid=True).aggregate(first=Min("created_at"))["first"]
+            if first is None:
+                self.stdout.write("No paid orders; nothing to backfill.")
+                return
+            start = timezone.localdate(first)
+
+        vendor_rows = product_rows = 0
+        chunk = timedelta(days=options["chunk_days"])
+        while start <= end:
+            chunk_end = min(start + chunk - timedelta(days=1), end)
+            vendors, products = backfill_sales_rollups(start, chunk_end)
+            vendor_rows += vendors
+            product_rows += products
+            start = chunk_end + timedelta(days=1)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {vendor_rows} vendor-day and {product_rows} product-day row(s)."
+            )
+        )
@@ -0,0 +1,141 @@
+import statistics
+import time
+from datetime import datetime, time as dt_time, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from store.analytics import DAY, backfill_sales_rollups, vendor_sales_series
+from store.models import Category, Order, OrderItem, Product
+from userprofile.models import UserProfile, VendorProfile
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark vendor_sales_series (rollup tables) against scanning "
+        "OrderItem for 30, 90 and 365 day windows. Seeds a synthetic vendor "
+        "with --days of history inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--orders-per-day", type=int, default=20)
+        parser.add_argument("--items-per-order", type=int, default=2)
+        parser.add_argument("--products", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def _seed(self, options):
+        user = UserProfile.objects.create_user(
+            email="bench-vendor@example.com",
+            user_name="bench-vendor",
+            first_name="Bench",
+            last_name="Vendor",
+            password="unused-password",
+        )
+        vendor = VendorProfile.objects.create(
+            user=user, store_name="Benchmark Store", store_description="Synthetic data"
+        )
+        category = Category.objects.create(title="Benchmark", slug="benchmark-category")
+        products = Product.objects.bulk_create(
+            [
+                Product(
+                    vendor=vendor,
+                    category=category,
+                    title=f"Bench product {n}",
+                    slug=f"bench-product-{n}",
+                    description="Synthetic",
+                    price=1000 + n,
+                    product_image="bench/image.jpg",
+                    quantity=100,
+                )
+                for n in range(options["products"])
+            ]
+        )
+
+        today = timezone.localdate()
+        tz = timezone.get_current_timezone()
+        for offset in range(options["days"]):
+            day = today - timedelta(days=offset)
+            orders = Order.objects.bulk_create(
+                [
+                    Order(
+                        first_name="Bench",
+                        last_name="Buyer",
+                        total_cost=0,
+                        is_paid=True,
+                        ref=f"bench-{offset}-{n}",
+                    )
+                    for n in range(options["orders_per_day"])
+                ]
+            )
+            Order.objects.filter(pk__in=[order.pk for order in orders]).update(
+                created_at=timezone.make_aware(datetime.combine(day, dt_time(12)), tz)
+            )
+            OrderItem.objects.bulk_create(
+                [
+                    OrderItem(
+                        order=order,
+                        product=products[(n + i) % len(products)],
+                        price=products[(n + i) % len(products)].price,
+                        quantity=1 + i,
+                    )
+                    for n, order in enumerate(orders)
+                    for i in range(options["items_per_order"])
+                ]
+            )
+        backfill_sales_rollups(today - timedelta(days=options["days"]), today)
+        return vendor
+
+    def _time(self, fn, repeat):
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - started) * 1000)
+        return statistics.median(samples)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            started = time.perf_counter()
+            vendor = self._seed(options)
+            rows = options["days"] * options["orders_per_day"] * options["items_per_order"]
+            self.stdout.write(
+                f"Seeded {rows} order lines over {options['days']} days "
+                f"in {time.perf_counter() - started:.1f}s"
+            )
+
+            today = timezone.localdate()
+            self.stdout.write(f"{'window':>8} {'rollup ms':>10} {'scan ms':>10}")
+            for window in (30, 90, 365):
+                start = today - timedelta(days=window - 1)
+
+                def rollup():
+                    vendor_sales_series(vendor, DAY, start, today)
+
+                def scan():
+                    list(
+                        OrderItem.objects.filter(
+                            product__vendor=vendor,
+                            order__is_paid=True,
+                            order__created_at__date__gte=start,
+                            order__created_at__date__lte=today,
+                        )
+                        .annotate(day=TruncDate("order__created_at"))
+                        .values("day")
+                        .annotate(
+                            orders=Count("order", distinct=True),
+                            units_sold=Sum("quantity"),
+                            revenue=Sum("price"),
+                        )
+                        .order_by("day")
+                    )
+
+                self.stdout.write(
+                    f"{window:>7}d {self._time(rollup, options['repeat']):>10.2f} "
+                    f"{self._time(scan, options['repeat']):>10.2f}"
+                )
+
+            transaction.set_rollback(True)
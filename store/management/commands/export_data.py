@@ -0,0 +1,66 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from store.admin_exports import DATASETS, ExportError, export_rows
+from store.exports import CSV, FORMATS, export_filename, write_export
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream orders, order items, payments or subscription history to CSV "
+        "or JSON Lines, optionally gzipped. Rows are read and written in "
+        "chunks, so memory stays bounded for any number of rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=list(DATASETS))
+        parser.add_argument("--format", choices=list(FORMATS), default=CSV)
+        parser.add_argument("--gzip", action="store_true", help="Gzip the output.")
+        parser.add_argument("--from", dest="start", help="First day, YYYY-MM-DD.")
+        parser.add_argument("--to", dest="end", help="Last day, YYYY-MM-DD.")
+        parser.add_argument(
+            "--include-paystack-response",
+            action="store_true",
+            help="Add the raw Paystack payload (payments and subscriptions).",
+        )
+        parser.add_argument(
+            "--output",
+            help="File to write, or - for stdout (default: <dataset>-<date>.<format>[.gz]).",
+        )
+
+    def _date(self, value, name):
+        if value is None:
+            return None
+        try:
+            parsed = parse_date(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise CommandError(f"--{name} must be a date in YYYY-MM-DD format.")
+        return parsed
+
+    def handle(self, *args, **options):
+        dataset, fmt, compress = options["dataset"], options["format"], options["gzip"]
+        try:
+            columns, rows = export_rows(
+                dataset,
+                start=self._date(options["start"], "from"),
+                end=self._date(options["end"], "to"),
+                include_paystack_response=options["include_paystack_response"],
+            )
+        except ExportError as e:
+            raise CommandError(str(e))
+
+        output = options["output"] or export_filename(
+            f"{dataset}-{timezone.localdate().isoformat()}", fmt, compress
+        )
+        if output == "-":
+            write_export(sys.stdout.buffer, columns, rows, fmt, compress)
+            return
+
+        with open(output, "wb") as fileobj:
+            written = write_export(fileobj, columns, rows, fmt, compress)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} bytes to {output}"))
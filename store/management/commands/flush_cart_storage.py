@@ -0,0 +1,16 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from store.cart_storage import CacheCartStorage
+
+
+class Command(BaseCommand):
+    help = (
+        "Persist carts buffered by CacheCartStorage to the CartItem table. "
+        "Run periodically (e.g. every minute) when CART_STORAGE_BACKEND is "
+        "the cache backend."
+    )
+
+    def handle(self, *args, **options):
+        flushed = CacheCartStorage.flush_dirty(get_user_model())
+        self.stdout.write(self.style.SUCCESS(f"Flushed {flushed} cart(s)."))
@@ -0,0 +1,78 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from store.models import WebhookEvent
+from store.webhooks import process_webhook_events, replay_webhook_events
+
+
+class Command(BaseCommand):
+    help = (
+        "Drain the Paystack webhook inbox. Processes due events in batches, "
+        "retrying failures with backoff and dead-lettering events that keep "
+        "failing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=None,
+            help="Attempts before an event is dead-lettered (default: WEBHOOK_MAX_ATTEMPTS).",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling instead of exiting once the inbox is drained.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=2.0,
+            help="Seconds to wait between polls when --loop is set (default: 2).",
+        )
+        parser.add_argument(
+            "--replay",
+            metavar="EVENT_KEY",
+            action="append",
+            default=[],
+            help="Re-queue the event with this key before processing. Repeatable.",
+        )
+        parser.add_argument(
+            "--replay-dead",
+            action="store_true",
+            help="Re-queue every dead-lettered event before processing.",
+        )
+
+    def handle(self, *args, **options):
+        if options["replay"]:
+            count = replay_webhook_events(
+                WebhookEvent.objects.filter(event_key__in=options["replay"])
+            )
+            self.stdout.write(f"Re-queued {count} event(s).")
+        if options["replay_dead"]:
+            count = replay_webhook_events(
+                WebhookEvent.objects.filter(status=WebhookEvent.DEAD)
+            )
+            self.stdout.write(f"Re-queued {count} dead-lettered event(s).")
+
+        while True:
+            counts = process_webhook_events(
+                batch_size=options["batch_size"],
+                max_attempts=options["max_attempts"],
+            )
+            handled = sum(counts.values())
+            if handled:
+                self.stdout.write(
+                    f"processed={counts[WebhookEvent.PROCESSED]} "
+                    f"retrying={counts[WebhookEvent.PENDING]} "
+                    f"dead={counts[WebhookEvent.DEAD]}"
+                )
+            if handled >= options["batch_size"]:
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["sleep"])
+
+        self.stdout.write(self.style.SUCCESS("Webhook inbox drained."))
@@ -0,0 +1,55 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from store.reconciliation import reconcile_pending_payments
+
+
+class Command(BaseCommand):
+    help = (
+        "Verify payments still pending against Paystack. Finalizes successful "
+        "charges, fails payments that are declined or too old, and releases "
+        "their stock. Run every few minutes from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--min-age-minutes",
+            type=int,
+            default=15,
+            help="Skip payments younger than this, still in checkout (default: 15).",
+        )
+        parser.add_argument(
+            "--fail-after-hours",
+            type=int,
+            default=24,
+            help="Mark payments unpaid for this long as failed (default: 24).",
+        )
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=8,
+            help="Concurrent Paystack verifications (default: 8).",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=None,
+            help="Stop after this many payments.",
+        )
+
+    def handle(self, *args, **options):
+        counts = reconcile_pending_payments(
+            min_age=timedelta(minutes=options["min_age_minutes"]),
+            fail_after=timedelta(hours=options["fail_after_hours"]),
+            batch_size=options["batch_size"],
+            max_workers=options["workers"],
+            limit=options["limit"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"finalized={counts['finalized']} failed={counts['failed']} "
+                f"pending={counts['pending']} errors={counts['errors']}"
+            )
+        )
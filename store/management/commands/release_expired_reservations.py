@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from store.inventory import release_expired_reservations
+
+
+class Command(BaseCommand):
+    help = (
+        "Return stock held by checkouts whose payment never arrived. "
+        "Run every few minutes from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Maximum reservations released per batch (default: 500).",
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            released = release_expired_reservations(batch_size=options["batch_size"])
+            total += released
+            if released < options["batch_size"]:
+                break
+        self.stdout.write(self.style.SUCCESS(f"Released {total} reservation(s)."))
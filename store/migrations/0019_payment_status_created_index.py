@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-19 01:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0018_webhookevent'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['status', 'created_at'], name='store_payme_status_26b5b1_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-19 01:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0019_payment_status_created_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['user', 'status', 'created_at'], name='store_payme_user_id_34b9de_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2 on 2026-10-19 01:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0020_payment_user_status_created_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['created_at'], name='store_order_created_4ba192_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['pickup_location', 'created_at'], name='store_order_pickup__45b76d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['product', 'fulfilled'], name='store_order_product_0ef424_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2 on 2026-10-19 01:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userprofile', '0019_vendorstats'),
+        ('store', '0021_vendor_order_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VendorDailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('units_sold', models.PositiveIntegerField(default=0)),
+                ('revenue', models.BigIntegerField(default=0)),
+                ('vendor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='userprofile.vendorprofile')),
+            ],
+            options={
+                'verbose_name_plural': 'Vendor daily sales',
+                'ordering': ['date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductDailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('units_sold', models.PositiveIntegerField(default=0)),
+                ('revenue', models.BigIntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='store.product')),
+                ('vendor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='product_daily_sales', to='userprofile.vendorprofile')),
+            ],
+            options={
+                'verbose_name_plural': 'Product daily sales',
+                'ordering': ['date'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='vendordailysales',
+            constraint=models.UniqueConstraint(fields=('vendor', 'date'), name='uniq_vendor_daily_sales'),
+        ),
+        migrations.AddIndex(
+            model_name='productdailysales',
+            index=models.Index(fields=['vendor', 'date'], name='store_produ_vendor__829a53_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='productdailysales',
+            constraint=models.UniqueConstraint(fields=('product', 'date'), name='uniq_product_daily_sales'),
+        ),
+    ]
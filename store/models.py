@@ -6,6 +6,7 @@ from PIL import Image
 from django.utils import timezone
 from django.urls import reverse
 from django.db.models import Avg
+from django.db.models.functions import Greatest
 from django.core.validators import MinValueValidator
 from phonenumber_field.modelfields import PhoneNumberField
 from django.conf import settings
@@ -123,18 +124,80 @@ class Product(models.Model):
         """Returns 'in stock' or 'out of stock' based on quantity"""
         return self.IN_STOCK if self.is_in_stock else self.OUT_OF_STOCK
 
+    @classmethod
+    def decrement_stock(cls, product_id, amount):
+        """
+        Atomically take ``amount`` units if at least that many are left.
+
+        Runs a single conditional ``UPDATE ... SET quantity = quantity - n
+        WHERE quantity >= n`` (no read-modify-write, no ``full_clean``), so
+        concurrent buyers can never push quantity below zero. Returns True if
+        the units were taken.
+        """
+        return bool(
+            cls.objects.filter(pk=product_id, quantity__gte=amount).update(
+                # ``stock`` is listed first so it is computed from the
+                # pre-update quantity on every backend.
+                stock=models.Case(
+                    models.When(quantity__gt=amount, then=models.Value(cls.IN_STOCK)),
+                    default=models.Value(cls.OUT_OF_STOCK),
+                ),
+                quantity=models.F("quantity") - amount,
+            )
+        )
+
+    @classmethod
+    def increment_stock(cls, product_id, amount):
+        """Atomically return ``amount`` units to stock."""
+        return bool(
+            cls.objects.filter(pk=product_id).update(
+                stock=cls.IN_STOCK if amount > 0 else models.F("stock"),
+                quantity=models.F("quantity") + amount,
+            )
+        )
+
+    @classmethod
+    def decrement_stock_many(cls, quantities):
+        """
+        Take ``quantities[product_id]`` units from several products in one
+        UPDATE, clamping at zero. Used when a payment lands after its
+        reservation has lapsed, so the sale must be recorded regardless.
+        """
+        if not quantities:
+            return 0
+        return cls.objects.filter(pk__in=list(quantities)).update(
+            stock=models.Case(
+                *[
+                    models.When(pk=product_id, quantity__gt=amount, then=models.Value(cls.IN_STOCK))
+                    for product_id, amount in quantities.items()
+                ],
+                default=models.Value(cls.OUT_OF_STOCK),
+                output_field=models.CharField(),
+            ),
+            quantity=models.Case(
+                *[
+                    models.When(
+                        pk=product_id,
+                        then=Greatest(models.F("quantity") - amount, models.Value(0)),
+                    )
+                    for product_id, amount in quantities.items()
+                ],
+                default=models.F("quantity"),
+                output_field=models.PositiveIntegerField(),
+            ),
+        )
+
     def reduce_stock(self, amount):
         """Reduce stock by specified amount"""
-        if self.quantity >= amount:
-            self.quantity -= amount
-            self.save()
-            return True
-        return False
+        if not Product.decrement_stock(self.pk, amount):
+            return False
+        self.refresh_from_db(fields=["quantity", "stock"])
+        return True
 
     def add_stock(self, amount):
         """Add stock by specified amount"""
-        self.quantity += amount
-        self.save()
+        Product.increment_stock(self.pk, amount)
+        self.refresh_from_db(fields=["quantity", "stock"])
 
     def clean(self):
         from django.core.exceptions import ValidationError
@@ -244,6 +307,13 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     ref = models.CharField(max_length=50, db_index=True)
 
+    class Meta:
+        indexes = [
+            # vendor order dashboard: date range and pickup location filters
+            models.Index(fields=["created_at"]),
+            models.Index(fields=["pickup_location", "created_at"]),
+        ]
+
 
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, related_name="items", on_delete=models.CASCADE)
@@ -252,6 +322,10 @@ class OrderItem(models.Model):
     quantity = models.IntegerField(default=1)
     fulfilled = models.BooleanField(default=False, db_index=True)
 
+    class Meta:
+        # vendor order dashboard: a vendor's products filtered by fulfilled
+        indexes = [models.Index(fields=["product", "fulfilled"])]
+
     def display_price(self):
         return self.price / 100
 
@@ -267,6 +341,100 @@ class Payment(models.Model):
         null=True, blank=True
     )  # raw API response for reference
 
+    class Meta:
+        indexes = [
+            # reconcile_payments scans pending payments by age
+            models.Index(fields=["status", "created_at"]),
+            # order_history_api pages through a user's paid payments
+            models.Index(fields=["user", "status", "created_at"]),
+        ]
+
+
+class StockReservation(models.Model):
+    """
+    Units held for a pending payment.
+
+    Checkout takes the units out of ``Product.quantity`` up front and records
+    them here against the payment reference. Payment commits the
+    reservation; if payment never arrives the reservation expires and the
+    units are returned (see ``store.inventory``).
+    """
+
+    HELD = "held"
+    COMMITTED = "committed"
+    RELEASED = "released"
+
+    STATUS_CHOICES = (
+        (HELD, "Held"),
+        (COMMITTED, "Committed"),
+        (RELEASED, "Released"),
+    )
+
+    ref = models.CharField(max_length=20, db_index=True)
+    product = models.ForeignKey(
+        Product, related_name="reservations", on_delete=models.CASCADE
+    )
+    quantity = models.PositiveIntegerField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=HELD)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "expires_at"])]
+
+    def __str__(self):
+        return f"{self.ref} - {self.product_id} x{self.quantity} ({self.status})"
+
+
+class WebhookEvent(models.Model):
+    """
+    Inbox row for a verified Paystack webhook.
+
+    Webhook endpoints only verify the signature and insert the raw event
+    here; the ``process_webhooks`` command does the actual work. ``event_key``
+    is unique, so Paystack's redeliveries of the same event are dropped on
+    insert.
+    """
+
+    SOURCE_STORE = "store"
+    SOURCE_SUBSCRIPTION = "subscription"
+
+    SOURCE_CHOICES = (
+        (SOURCE_STORE, "Store payments"),
+        (SOURCE_SUBSCRIPTION, "Vendor subscriptions"),
+    )
+
+    PENDING = "pending"
+    PROCESSING = "processing"
+    PROCESSED = "processed"
+    DEAD = "dead"
+
+    STATUS_CHOICES = (
+        (PENDING, "Pending"),
+        (PROCESSING, "Processing"),
+        (PROCESSED, "Processed"),
+        (DEAD, "Dead letter"),
+    )
+
+    event_key = models.CharField(max_length=255, unique=True)
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    event_type = models.CharField(max_length=100, db_index=True)
+    payload = models.JSONField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    received_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-received_at"]
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
+
+    def __str__(self):
+        return f"{self.event_key} ({self.status})"
+
 
 class CartItem(models.Model):
     """
@@ -293,3 +461,58 @@ class CartItem(models.Model):
     @property
     def total_price(self):
         return self.product.price * self.quantity
+
+
+class VendorDailySales(models.Model):
+    """
+    One vendor's paid sales for one day (the order's local date).
+
+    Filled incrementally by ``finalize_payment`` and rebuilt by
+    ``manage.py backfill_sales_rollups``; ``vendor_analytics_api`` reads only
+    this table. ``revenue`` is in naira: the sum of ``OrderItem.price`` line
+    totals.
+    """
+
+    vendor = models.ForeignKey(
+        VendorProfile, on_delete=models.CASCADE, related_name="daily_sales"
+    )
+    date = models.DateField()
+    orders = models.PositiveIntegerField(default=0)
+    units_sold = models.PositiveIntegerField(default=0)
+    revenue = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["vendor", "date"], name="uniq_vendor_daily_sales")
+        ]
+        ordering = ["date"]
+        verbose_name_plural = "Vendor daily sales"
+
+    def __str__(self):
+        return f"{self.vendor_id} {self.date}: {self.revenue}"
+
+
+class ProductDailySales(models.Model):
+    """One product's paid sales for one day; see ``VendorDailySales``."""
+
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name="daily_sales"
+    )
+    vendor = models.ForeignKey(
+        VendorProfile, on_delete=models.CASCADE, related_name="product_daily_sales"
+    )
+    date = models.DateField()
+    orders = models.PositiveIntegerField(default=0)
+    units_sold = models.PositiveIntegerField(default=0)
+    revenue = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["product", "date"], name="uniq_product_daily_sales")
+        ]
+        indexes = [models.Index(fields=["vendor", "date"])]
+        ordering = ["date"]
+        verbose_name_plural = "Product daily sales"
+
+    def __str__(self):
+        return f"{self.product_id} {self.date}: {self.revenue}"
@@ -1,6 +1,19 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 class StandardResultsPagination(PageNumberPagination):
     page_size = 12
     page_size_query_param = 'page_size'
     max_page_size = 100
+
+
+class OrderHistoryPagination(CursorPagination):
+    """
+    Keyset pages over a user's payments, newest first.
+
+    Cursor pages cost the same however far back the user scrolls, and do not
+    skip or repeat orders when a new one is paid between requests.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 50
+    ordering = ('-created_at', '-pk')
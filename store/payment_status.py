@@ -0,0 +1,95 @@
+"""
+Long-poll support for ``/api/payment-status/<ref>/``.
+
+Instead of polling ``verify_payment_api`` (one Paystack round trip per
+poll), the frontend asks for the payment's status and the server holds the
+request until it differs from the status the client already has, or the
+wait expires.
+
+``finalize_payment`` and ``mark_payment_failed`` call
+``notify_payment_status`` once their transaction commits. That records the
+new status in the cache (visible to every process sharing the cache) and
+wakes async waiters in this process immediately. Waiters also re-check
+every ``PAYMENT_STATUS_POLL_SECONDS``: a cache read, falling back to one
+indexed ``Payment`` lookup. This covers finalizations that happen in
+another process, such as the webhook worker.
+"""
+import asyncio
+import threading
+import time
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Payment
+
+_waiters = defaultdict(set)
+_waiters_lock = threading.Lock()
+
+
+def _status_cache_key(ref):
+    return f"payment:status:{ref}"
+
+
+def _poll_interval():
+    return getattr(settings, "PAYMENT_STATUS_POLL_SECONDS", 1.0)
+
+
+def notify_payment_status(ref, status):
+    """Publish a payment's new status and wake anyone waiting on it."""
+    cache.set(_status_cache_key(ref), status, 60 * 60)
+    with _waiters_lock:
+        waiters = list(_waiters.get(ref, ()))
+    for loop, event in waiters:
+        loop.call_soon_threadsafe(event.set)
+
+
+def current_payment_status(ref):
+    """Return the payment's status, or None if there is no such payment."""
+    status = cache.get(_status_cache_key(ref))
+    if status is None:
+        status = Payment.objects.filter(ref=ref).values_list("status", flat=True).first()
+    return status
+
+
+def wait_for_payment_status(ref, seen, timeout):
+    """
+    Block until the status differs from ``seen`` or ``timeout`` seconds pass.
+
+    Used under WSGI, where holding the worker thread is unavoidable; each
+    check is a cache read or one indexed query.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        status = current_payment_status(ref)
+        remaining = deadline - time.monotonic()
+        if status != seen or remaining <= 0:
+            return status
+        time.sleep(min(_poll_interval(), remaining))
+
+
+async def await_payment_status(ref, seen, timeout):
+    """Async version of ``wait_for_payment_status``, woken by notifications."""
+    event = asyncio.Event()
+    waiter = (asyncio.get_running_loop(), event)
+    with _waiters_lock:
+        _waiters[ref].add(waiter)
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            event.clear()
+            status = await sync_to_async(current_payment_status)(ref)
+            remaining = deadline - time.monotonic()
+            if status != seen or remaining <= 0:
+                return status
+            try:
+                await asyncio.wait_for(event.wait(), min(_poll_interval(), remaining))
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        with _waiters_lock:
+            _waiters[ref].discard(waiter)
+            if not _waiters[ref]:
+                del _waiters[ref]
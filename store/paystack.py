@@ -1,26 +1,153 @@
-from django.conf import settings
+"""
+Shared Paystack HTTP client.
+
+All Paystack calls go through ``paystack_client`` so they reuse one pooled,
+keep-alive ``requests.Session``, always carry a timeout, retry transient
+failures on idempotent calls, and feed the same latency/error metrics.
+
+Methods return the underlying ``requests.Response`` so call sites keep
+reading ``status_code`` and ``json()`` as before; network failures still raise
+``requests.RequestException``.
+"""
+import logging
+import random
+import time
+
 import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
 
+from vendorxpert.http_metrics import HttpClientMetrics
 
-class Paystack:
-    PAYSTACK_SK = settings.PAYSTACK_SECRET_KEY
-    base_url = settings.PAYSTACK_BASE_URL + "/"
+logger = logging.getLogger(__name__)
 
-    def verify_payment(self, ref, *args, **kwargs):
-        path = f'transaction/verify/{ref}'
-        headers = {
-            "Authorization": f"Bearer {self.PAYSTACK_SK}",
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+class PaystackClient:
+    def __init__(
+        self,
+        base_url=None,
+        secret_key=None,
+        timeout=None,
+        max_retries=None,
+        backoff_base=0.25,
+        backoff_max=4.0,
+        pool_maxsize=20,
+    ):
+        self._base_url = base_url
+        self._secret_key = secret_key
+        self.timeout = timeout or getattr(settings, "PAYSTACK_TIMEOUT", (5, 30))
+        self.max_retries = (
+            max_retries
+            if max_retries is not None
+            else getattr(settings, "PAYSTACK_MAX_RETRIES", 2)
+        )
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.metrics = HttpClientMetrics()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @property
+    def base_url(self):
+        return (self._base_url or settings.PAYSTACK_BASE_URL).rstrip("/")
+
+    def _headers(self):
+        # Read the key per call so rotated keys and override_settings apply.
+        secret_key = self._secret_key or settings.PAYSTACK_SECRET_KEY
+        return {
+            "Authorization": f"Bearer {secret_key}",
             "Content-Type": "application/json",
         }
-        url = self.base_url + path
-        response = requests.get(url, headers=headers)
 
-        if response.status_code == 200:
-            response_data = response.json()
-            return response_data['status'], response_data['data']
+    @staticmethod
+    def _endpoint(method, path):
+        # "transaction/verify/<ref>" -> "GET transaction/verify" so metrics
+        # aggregate per endpoint rather than per reference.
+        segments = [s for s in path.strip("/").split("/") if s][:2]
+        return f"{method} {'/'.join(segments)}"
 
-        response_data = response.json()
+    def _backoff(self, attempt):
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(0, ceiling)
 
-        return response_data['status'], response_data['message']
+    def request(self, method, path, params=None, json=None, timeout=None, idempotent=None):
+        """
+        Send a request to ``PAYSTACK_BASE_URL/path``.
 
+        Idempotent calls (GET/PUT/DELETE by default, or ``idempotent=True``)
+        are retried on connection errors, timeouts, 429 and 5xx responses with
+        full-jitter exponential backoff. Other calls are sent exactly once.
+        """
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        attempts = 1 + (self.max_retries if idempotent else 0)
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        endpoint = self._endpoint(method, path)
 
+        for attempt in range(attempts):
+            is_last = attempt == attempts - 1
+            started = time.monotonic()
+            try:
+                response = self.session.request(
+                    method,
+                    url,
+                    params=params,
+                    json=json,
+                    headers=self._headers(),
+                    timeout=timeout or self.timeout,
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                elapsed_ms = (time.monotonic() - started) * 1000
+                self.metrics.record(endpoint, elapsed_ms, error=True, retry=not is_last)
+                if is_last:
+                    logger.error(f"Paystack {endpoint} failed after {attempt + 1} attempt(s): {e}")
+                    raise
+                logger.warning(f"Paystack {endpoint} attempt {attempt + 1} failed: {e}; retrying")
+                time.sleep(self._backoff(attempt))
+                continue
+
+            elapsed_ms = (time.monotonic() - started) * 1000
+            retryable = response.status_code in RETRY_STATUS_CODES and not is_last
+            self.metrics.record(
+                endpoint,
+                elapsed_ms,
+                error=response.status_code >= 400,
+                retry=retryable,
+            )
+            logger.debug(f"Paystack {endpoint} -> {response.status_code} in {elapsed_ms:.0f}ms")
+            if not retryable:
+                return response
+            logger.warning(
+                f"Paystack {endpoint} returned {response.status_code} on attempt {attempt + 1}; retrying"
+            )
+            time.sleep(self._backoff(attempt))
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self.request("PUT", path, **kwargs)
+
+
+paystack_client = PaystackClient()
+
+
+class Paystack:
+    def verify_payment(self, ref, *args, **kwargs):
+        response = paystack_client.get(f"transaction/verify/{ref}")
+        response_data = response.json()
+
+        if response.status_code == 200:
+            return response_data['status'], response_data['data']
+
+        return response_data['status'], response_data['message']
@@ -0,0 +1,178 @@
+"""
+Receipt PDFs.
+
+A paid order's receipt is rendered once and stored by order ref in
+``RECEIPT_STORAGE_ROOT`` (a local stand-in for object storage):
+
+* the receipt email carries a ``receipt_attachment`` spec instead of the
+  bytes, so the ``send_emails`` worker renders the PDF after payment, off the
+  request path, and attaches the stored file;
+* downloads (``receipt_pdf_api`` and ``views.payment_receipt``) stream the
+  stored file with an ETag and only render it if the worker has not yet.
+"""
+import io
+import logging
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.text import get_valid_filename
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import mm
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from .models import Payment
+
+logger = logging.getLogger(__name__)
+
+RECEIPT_MIME_TYPE = "application/pdf"
+
+
+def receipt_storage():
+    return FileSystemStorage(location=settings.RECEIPT_STORAGE_ROOT)
+
+
+def receipt_filename(ref):
+    return get_valid_filename(f"receipt-{ref}.pdf")
+
+
+def _naira(amount):
+    return f"NGN {amount:,.2f}"
+
+
+def render_receipt_pdf(order, order_context=None):
+    """
+    Render an itemized receipt for ``order``, grouped by vendor.
+
+    ``Paragraph`` parses its text as markup, so every interpolated value is
+    escaped: a product called ``A<B`` would otherwise fail the whole render.
+    """
+    from userprofile.email_utils import build_order_email_context
+
+    context = order_context or build_order_email_context(order)
+    styles = getSampleStyleSheet()
+
+    story = [
+        Paragraph(f"{escape(context['site_name'])} Receipt", styles["Title"]),
+        Paragraph(f"Order #{escape(context['order_ref'])}", styles["Heading3"]),
+        Paragraph(f"Date: {escape(context['order_date'])}", styles["Normal"]),
+        Paragraph(f"Customer: {escape(context['customer_name'])}", styles["Normal"]),
+        Paragraph(f"Phone: {escape(str(context['customer_phone']))}", styles["Normal"]),
+        Paragraph(f"Pickup location: {escape(str(context['pickup_location']))}", styles["Normal"]),
+        Paragraph("Status: PAID", styles["Normal"]),
+        Spacer(1, 6 * mm),
+    ]
+
+    for group in context["vendor_groups"]:
+        story.append(Paragraph(escape(group["vendor"].store_name), styles["Heading4"]))
+        rows = [["Item", "Qty", "Unit price", "Total"]]
+        rows += [
+            [
+                Paragraph(escape(line["product_name"]), styles["Normal"]),
+                line["quantity"],
+                _naira(line["unit_price"]),
+                _naira(line["total_price"]),
+            ]
+            for line in group["items"]
+        ]
+        rows.append(["", "", "Subtotal", _naira(group["total"])])
+        table = Table(rows, colWidths=[85 * mm, 15 * mm, 35 * mm, 35 * mm], repeatRows=1)
+        table.setStyle(
+            TableStyle(
+                [
+                    ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+                    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+                    ("FONTNAME", (0, -1), (-1, -1), "Helvetica-Bold"),
+                    ("ALIGN", (1, 0), (-1, -1), "RIGHT"),
+                    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+                    ("LINEBELOW", (0, 0), (-1, -2), 0.25, colors.grey),
+                ]
+            )
+        )
+        story += [table, Spacer(1, 4 * mm)]
+
+    story += [
+        Paragraph(f"Total paid: {_naira(context['total_amount'])}", styles["Heading3"]),
+        Paragraph(
+            f"Questions? Contact {escape(context['support_email'])}", styles["Italic"]
+        ),
+    ]
+
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        title=f"Receipt {order.ref}",
+        author=context["site_name"],
+        leftMargin=15 * mm,
+        rightMargin=15 * mm,
+        topMargin=15 * mm,
+        bottomMargin=15 * mm,
+    )
+    doc.build(story)
+    return buffer.getvalue()
+
+
+def ensure_receipt(order, order_context=None):
+    """Render and store ``order``'s receipt if needed; returns its storage name."""
+    storage = receipt_storage()
+    name = receipt_filename(order.ref)
+    if not storage.exists(name):
+        pdf = render_receipt_pdf(order, order_context)
+        # A concurrent render may have stored it first; either copy is fine.
+        if not storage.exists(name):
+            storage.save(name, ContentFile(pdf))
+            logger.info(f"Rendered receipt PDF for order {order.ref}")
+    return name
+
+
+def get_receipt_pdf(order, order_context=None):
+    """Return the stored receipt bytes, rendering them on first use."""
+    name = ensure_receipt(order, order_context)
+    with receipt_storage().open(name) as fh:
+        return fh.read()
+
+
+def receipt_attachment_spec(ref):
+    """Outbox attachment spec that resolves to the receipt for ``ref``."""
+    return {"loader": "store.receipts.receipt_attachment", "key": ref}
+
+
+def receipt_attachment(ref):
+    """Outbox attachment loader: ``(filename, mime_type, content)``."""
+    order = Payment.objects.select_related("order").get(ref=ref).order
+    return receipt_filename(ref), RECEIPT_MIME_TYPE, get_receipt_pdf(order)
+
+
+def _etag(storage, name):
+    modified = storage.get_modified_time(name).timestamp()
+    return f'"{int(modified * 1000):x}-{storage.size(name):x}"'
+
+
+def receipt_response(request, order):
+    """
+    Serve ``order``'s stored receipt PDF.
+
+    Answers ``If-None-Match`` with 304 and streams the file otherwise.
+    """
+    storage = receipt_storage()
+    name = ensure_receipt(order)
+    etag = _etag(storage, name)
+
+    if request.headers.get("If-None-Match") == etag:
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(
+            storage.open(name),
+            as_attachment=True,
+            filename=receipt_filename(order.ref),
+            content_type=RECEIPT_MIME_TYPE,
+        )
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, max_age=0, must_revalidate=True)
+    return response
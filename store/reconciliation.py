@@ -0,0 +1,104 @@
+"""
+Reconciliation of payments left pending.
+
+A payment stays ``pending`` when its webhook is lost and the customer never
+comes back through the callback. ``reconcile_pending_payments`` (run by the
+``reconcile_payments`` management command) walks those payments in
+primary-key batches and asks Paystack about each one:
+
+* Paystack calls run concurrently in a bounded thread pool; all database
+  writes stay on the calling thread;
+* successful charges are finalized with ``finalize_payment``, exactly like
+  the webhook path;
+* failed charges, and anything still unpaid after ``fail_after``, are marked
+  failed with ``mark_payment_failed`` and their stock reservation released;
+* lookups that error out are left pending for the next run.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .inventory import release_reservations
+from .models import Payment
+from .paystack import Paystack
+from .services import FAILED_CHARGE_STATUSES, finalize_payment, mark_payment_failed
+
+logger = logging.getLogger(__name__)
+
+FINALIZED = "finalized"
+FAILED = "failed"
+PENDING = "pending"
+ERRORS = "errors"
+
+
+def _verify(ref):
+    """Return ``(verified, data_or_message)`` or ``(None, error)`` on network failure."""
+    try:
+        return Paystack().verify_payment(ref)
+    except Exception as e:
+        return None, str(e)
+
+
+def _apply(ref, created_at, verified, data, fail_before):
+    if verified is None:
+        logger.warning(f"Reconcile {ref}: verification error: {data}")
+        return ERRORS
+
+    charge_status = data.get("status") if verified and isinstance(data, dict) else None
+    if charge_status == "success":
+        finalize_payment(ref, paystack_data=data)
+        return FINALIZED
+
+    if charge_status in FAILED_CHARGE_STATUSES or created_at < fail_before:
+        mark_payment_failed(ref, paystack_data=data if isinstance(data, dict) else None)
+        release_reservations(ref)
+        return FAILED
+
+    return PENDING
+
+
+def reconcile_pending_payments(
+    min_age=timedelta(minutes=15),
+    fail_after=timedelta(hours=24),
+    batch_size=200,
+    max_workers=8,
+    limit=None,
+):
+    """
+    Verify pending payments older than ``min_age`` against Paystack.
+
+    Returns a dict of counts: ``finalized``, ``failed``, ``pending`` (still
+    open at Paystack) and ``errors`` (lookup failed; retried next run).
+    """
+    now = timezone.now()
+    fail_before = now - fail_after
+    pending = Payment.objects.filter(status="pending", created_at__lte=now - min_age)
+
+    counts = {FINALIZED: 0, FAILED: 0, PENDING: 0, ERRORS: 0}
+    last_pk = 0
+    seen = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while limit is None or seen < limit:
+            size = batch_size if limit is None else min(batch_size, limit - seen)
+            batch = list(
+                pending.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("pk", "ref", "created_at")[:size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+            seen += len(batch)
+
+            results = pool.map(_verify, [ref for _, ref, _ in batch])
+            for (_, ref, created_at), (verified, data) in zip(batch, results):
+                try:
+                    counts[_apply(ref, created_at, verified, data, fail_before)] += 1
+                except Exception as e:
+                    logger.error(f"Reconcile {ref}: {e}")
+                    counts[ERRORS] += 1
+
+    logger.info(f"Payment reconciliation: {counts}")
+    return counts
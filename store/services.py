@@ -0,0 +1,256 @@
+"""Checkout and payment business logic shared by the API and template views."""
+
+import logging
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from userprofile.vendor_stats import record_order_paid
+
+from .models import Order, OrderItem, Payment
+from .analytics import order_sales_lines, record_order_sales
+from .inventory import commit_reservations
+from .payment_status import notify_payment_status
+
+logger = logging.getLogger(__name__)
+
+# Paystack local card fee: 1.5% + ₦100, capped at ₦2,000 (all in kobo).
+PAYSTACK_FEE_PERCENT_BPS = 150
+PAYSTACK_FEE_FLAT_KOBO = 10000
+PAYSTACK_FEE_CAP_KOBO = 200000
+
+# Paystack transaction statuses that mean the charge will never succeed.
+# Anything else short of "success" (ongoing, pending, processing, abandoned,
+# queued) can still complete, so the payment stays pending.
+FAILED_CHARGE_STATUSES = frozenset({"failed", "reversed"})
+
+
+class CheckoutError(Exception):
+    """Raised when a cart cannot be turned into a Paystack payment."""
+
+    def __init__(self, detail, status=400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status = status
+
+
+def estimate_paystack_fee_kobo(total_kobo):
+    """
+    Fee that lets the customer bear Paystack's charge on the grossed-up amount.
+
+    Solves ``fee = 1.5% * (total + fee) + ₦100`` for ``fee``, i.e.
+    ``fee = (0.015 * total + 10000) / 0.985``, rounded half-up in integer kobo
+    and capped at ₦2,000.
+    """
+    numerator = PAYSTACK_FEE_PERCENT_BPS * total_kobo + PAYSTACK_FEE_FLAT_KOBO * 10000
+    denominator = 10000 - PAYSTACK_FEE_PERCENT_BPS
+    fee = (2 * numerator + denominator) // (2 * denominator)
+    return min(fee, PAYSTACK_FEE_CAP_KOBO)
+
+
+def _admin_subaccount():
+    admin_subaccount = getattr(settings, "ADMIN_SUBACCOUNT_CODE", None)
+    if admin_subaccount:
+        admin_subaccount = str(admin_subaccount).strip() or None
+    if admin_subaccount and not admin_subaccount.startswith("ACCT_"):
+        logger.error(f"Invalid admin subaccount format: {admin_subaccount}")
+        raise CheckoutError(
+            "Invalid admin subaccount format. Must start with 'ACCT_'", status=500
+        )
+    if not admin_subaccount:
+        logger.warning(
+            "ADMIN_SUBACCOUNT_CODE not configured. Platform fee will stay in main wallet."
+        )
+    return admin_subaccount
+
+
+def build_checkout(cart_lines, buyer, ref):
+    """
+    Price a cart snapshot in a single pass.
+
+    ``cart_lines`` is the list produced by iterating ``Cart`` once. Products
+    must have ``vendor`` loaded. Everything is computed in integer kobo, and
+    the unsaved ``OrderItem`` rows are built in the same pass so they can be
+    inserted with ``create_order_items``.
+
+    Returns a dict with ``total_price`` (naira), ``amount_kobo`` (what the
+    customer pays), ``fee_kobo``, ``vendor_totals``, ``split`` (``None`` when
+    there is nothing to split) and ``order_items``.
+
+    Raises ``CheckoutError`` for misconfigured subaccounts or an inconsistent
+    split.
+    """
+    buyer_vendor = getattr(buyer, "vendor_profile", None)
+    buyer_vendor_id = buyer_vendor.pk if buyer_vendor else None
+
+    total_price = 0
+    vendor_totals = defaultdict(int)
+    products_without_subaccount = []
+    order_items = []
+
+    for item in cart_lines:
+        product = item["product"]
+        quantity = int(item["quantity"])
+        line_total = product.price * quantity
+
+        total_price += line_total
+        order_items.append(
+            OrderItem(product=product, quantity=quantity, price=line_total)
+        )
+
+        # Defensive backstop: no payout for buyer's own products
+        if buyer_vendor_id and product.vendor_id == buyer_vendor_id:
+            logger.info(
+                f"Payment {ref}: skipping payout for self-purchased product {product.id}"
+            )
+            continue
+
+        subaccount_code = product.vendor.subaccount_code
+        if not subaccount_code:
+            products_without_subaccount.append(product.vendor.store_name)
+        elif not isinstance(subaccount_code, str) or not subaccount_code.startswith("ACCT_"):
+            raise CheckoutError(f"Invalid subaccount code format: {subaccount_code}")
+        elif line_total > 0:
+            vendor_totals[subaccount_code] += line_total * 100
+
+    total_kobo = total_price * 100
+    fee_kobo = estimate_paystack_fee_kobo(total_kobo)
+    amount_kobo = total_kobo + fee_kobo
+
+    admin_subaccount = _admin_subaccount()
+    vendor_share_kobo = sum(vendor_totals.values())
+    # Admin receives the platform fee plus any lines without a vendor payout.
+    admin_amount = amount_kobo - vendor_share_kobo
+
+    split_subaccounts = list(vendor_totals.items())
+    if admin_subaccount:
+        split_subaccounts.append((admin_subaccount, admin_amount))
+
+    split = None
+    if split_subaccounts:
+        split_total = sum(share for _, share in split_subaccounts)
+        if split_total != amount_kobo:
+            logger.error(f"Payment {ref}: Split total {split_total} != amount {amount_kobo}")
+            raise CheckoutError(f"Split mismatch: {split_total} vs {amount_kobo}")
+
+        split = {
+            "type": "flat",
+            "bearer_type": "account",
+            "subaccounts": [
+                {"subaccount": sub, "share": share} for sub, share in split_subaccounts
+            ],
+        }
+        if admin_subaccount:
+            split["bearer_type"] = "subaccount"
+            split["bearer_subaccount"] = admin_subaccount
+
+    logger.info(
+        f"Payment {ref}: amount=₦{amount_kobo / 100:,.2f} vendors={dict(vendor_totals)} "
+        f"admin={admin_amount / 100:,.2f} split={'yes' if split else 'no'}"
+    )
+    if products_without_subaccount:
+        logger.info(
+            f"Payment {ref}: products without vendor subaccount: {products_without_subaccount}"
+        )
+
+    return {
+        "total_price": total_price,
+        "amount_kobo": amount_kobo,
+        "fee_kobo": fee_kobo,
+        "vendor_totals": dict(vendor_totals),
+        "split": split,
+        "order_items": order_items,
+    }
+
+
+def create_order_items(order, order_items):
+    """Attach the priced lines from ``build_checkout`` to ``order`` in one INSERT."""
+    for order_item in order_items:
+        order_item.order = order
+    return OrderItem.objects.bulk_create(order_items)
+
+
+# ── Payment finalization ─────────────────────────────────────────────────────
+
+
+def _send_order_notifications(order):
+    from userprofile.email_utils import (
+        build_order_email_context,
+        send_receipt_email,
+        send_vendor_order_notification,
+    )
+
+    try:
+        # One query and one context for the buyer and every vendor.
+        order_context = build_order_email_context(order)
+    except Exception as e:
+        logger.error(f"Failed to build email context for order {order.ref}: {str(e)}")
+        return
+
+    try:
+        send_receipt_email(order, order_context=order_context)
+    except Exception as e:
+        logger.error(f"Failed to queue receipt email for order {order.ref}: {str(e)}")
+
+    try:
+        send_vendor_order_notification(order, order_context=order_context)
+    except Exception as e:
+        logger.error(f"Failed to queue vendor notification for order {order.ref}: {str(e)}")
+
+
+def finalize_payment(ref, paystack_data=None):
+    """
+    Mark a successful payment as paid, exactly once.
+
+    Every finalization path (webhooks, callbacks, client verification) calls
+    this. The payment is claimed with a single conditional
+    ``UPDATE ... WHERE status <> 'paid'``; only the caller whose UPDATE hits
+    the row goes on to mark the order paid, commit the stock reservation and
+    queue the receipt/vendor emails in the email outbox, all in the same
+    transaction.
+    Concurrent callers see zero rows updated and return immediately, so no
+    table or row locks are held while waiting on each other.
+
+    Returns True if this call finalized the payment, False if it was already
+    paid or does not exist.
+    """
+    updates = {"status": "paid"}
+    if paystack_data is not None:
+        updates["paystack_response"] = paystack_data
+
+    with transaction.atomic():
+        claimed = Payment.objects.filter(ref=ref).exclude(status="paid").update(**updates)
+        if not claimed:
+            logger.info(f"Payment {ref} already finalized or unknown")
+            return False
+
+        order = Order.objects.filter(payments__ref=ref).first()
+        if order is None:
+            logger.error(f"Payment {ref} finalized without an order")
+            return True
+
+        Order.objects.filter(pk=order.pk).update(is_paid=True)
+        order.is_paid = True
+        commit_reservations(
+            ref, OrderItem.objects.filter(order=order).only("product_id", "quantity")
+        )
+        sales = order_sales_lines(order)
+        record_order_paid(order, sales)
+        record_order_sales(order, sales)
+        _send_order_notifications(order)
+        transaction.on_commit(lambda: notify_payment_status(ref, "paid"))
+
+    logger.info(f"Payment {ref} marked as paid")
+    return True
+
+
+def mark_payment_failed(ref, paystack_data=None):
+    """Record a failed attempt without overwriting a payment already paid."""
+    updates = {"status": "failed"}
+    if paystack_data is not None:
+        updates["paystack_response"] = paystack_data
+    updated = Payment.objects.filter(ref=ref).exclude(status="paid").update(**updates)
+    if updated:
+        transaction.on_commit(lambda: notify_payment_status(ref, "failed"))
+    return bool(updated)
@@ -1,18 +1,69 @@
-from django.test import TestCase
-from unittest.mock import patch
+import hashlib
+import hmac
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
 
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.db import connection
+from django.test import TestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from unittest.mock import patch, MagicMock
+
+import requests
+from asgiref.sync import async_to_sync
+
+from rest_framework.test import APITestCase
+
+from userprofile.email_outbox import send_pending_emails
 from userprofile.models import UserProfile, VendorProfile, VendorPlan
-from .models import Category, Product
+from .models import (
+    Category,
+    Product,
+    CartItem,
+    Order,
+    OrderItem,
+    Payment,
+    Review,
+    StockReservation,
+    WebhookEvent,
+)
+from .cart import Cart
+from .cart_storage import CacheCartStorage
+from .services import (
+    build_checkout,
+    create_order_items,
+    estimate_paystack_fee_kobo,
+    finalize_payment,
+    mark_payment_failed,
+)
+from .paystack import PaystackClient
+from .banks import BANK_LIST_CACHE_KEY, get_bank_list, resolve_account
+from .webhooks import process_webhook_events
+from .reconciliation import reconcile_pending_payments
+from .receipts import render_receipt_pdf
+from .payment_status import await_payment_status, current_payment_status, notify_payment_status
+from .inventory import (
+    InsufficientStock,
+    commit_reservations,
+    release_expired_reservations,
+    reserve_stock,
+)
 
 
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
 
-def make_user():
+def make_user(email="vendor@example.com", username="vendoruser"):
     return UserProfile.objects.create_user(
-        email="vendor@example.com",
-        user_name="vendoruser",
+        email=email,
+        user_name=username,
         first_name="Vendor",
         last_name="User",
         password="strongpass123",
@@ -20,7 +71,9 @@ def make_user():
 
 
 def make_vendor(user):
-    plan = VendorPlan.objects.create(name=VendorPlan.BASIC, price=2000, is_active=True)
+    plan, _ = VendorPlan.objects.get_or_create(
+        name=VendorPlan.BASIC, defaults={"price": 2000, "is_active": True}
+    )
     return VendorProfile.objects.create(
         user=user,
         store_name="Test Shop",
@@ -106,3 +159,1271 @@ class ProductSlugTests(TestCase):
     def test_stock_set_to_out_of_stock_when_quantity_zero(self):
         product = make_product(self.vendor, self.category, quantity=0)
         self.assertEqual(product.stock, Product.OUT_OF_STOCK)
+
+
+# ---------------------------------------------------------------------------
+# Guest cart merge on login
+# ---------------------------------------------------------------------------
+
+class SessionCartMergeTests(APITestCase):
+    """The anonymous session cart is folded into CartItem rows at login."""
+
+    def setUp(self):
+        self.vendor = make_vendor(make_user())
+        self.category = make_category()
+        self.buyer = make_user("buyer@example.com", "buyer")
+        self.in_stock = make_product(self.vendor, self.category, title="Mug", quantity=10)
+        self.scarce = make_product(self.vendor, self.category, title="Lamp", quantity=3)
+
+    def _set_session_cart(self, cart):
+        session = self.client.session
+        session[settings.CART_SESSION_ID] = cart
+        session.save()
+
+    def _login(self):
+        return self.client.post(
+            "/api/login",
+            {"email": "buyer@example.com", "password": "strongpass123"},
+            format="json",
+        )
+
+    def test_session_cart_moved_to_database_and_cleared(self):
+        self._set_session_cart({
+            str(self.in_stock.id): {"quantity": 2, "id": str(self.in_stock.id)},
+        })
+
+        resp = self._login()
+
+        self.assertEqual(resp.status_code, 200)
+        item = CartItem.objects.get(user=self.buyer, product=self.in_stock)
+        self.assertEqual(item.quantity, 2)
+        self.assertNotIn(settings.CART_SESSION_ID, self.client.session)
+
+    def test_quantities_summed_and_capped_by_stock(self):
+        CartItem.objects.create(user=self.buyer, product=self.in_stock, quantity=4)
+        CartItem.objects.create(user=self.buyer, product=self.scarce, quantity=2)
+        self._set_session_cart({
+            str(self.in_stock.id): {"quantity": 3, "id": str(self.in_stock.id)},
+            str(self.scarce.id): {"quantity": 5, "id": str(self.scarce.id)},
+        })
+
+        self._login()
+
+        quantities = dict(
+            CartItem.objects.filter(user=self.buyer).values_list("product_id", "quantity")
+        )
+        self.assertEqual(quantities[self.in_stock.id], 7)
+        self.assertEqual(quantities[self.scarce.id], 3)
+
+
+# ---------------------------------------------------------------------------
+# Cart storage backends
+# ---------------------------------------------------------------------------
+
+CACHE_CART = "store.cart_storage.CacheCartStorage"
+
+
+class CartStorageTests(TestCase):
+    """Cart behaves the same on every backend; the cache one writes behind."""
+
+    def setUp(self):
+        cache.clear()
+        self.vendor = make_vendor(make_user())
+        self.category = make_category()
+        self.buyer = make_user("buyer@example.com", "buyer")
+        self.product = make_product(self.vendor, self.category, title="Mug", quantity=10)
+
+    def _cart(self):
+        request = RequestFactory().get("/")
+        request.user = self.buyer
+        request.session = self.client.session
+        return Cart(request)
+
+    def _exercise(self):
+        cart = self._cart()
+        cart.add(self.product.id, 2, update_quantity=True)
+        cart.add(self.product.id, 1, update_quantity=True)
+        self.assertEqual(len(cart), 3)
+        self.assertEqual(cart.get_total_cost(), 3 * self.product.price)
+        self.assertEqual([item["quantity"] for item in cart], [3])
+        return cart
+
+    def test_database_backend_writes_through(self):
+        self._exercise()
+        self.assertEqual(CartItem.objects.get(user=self.buyer).quantity, 3)
+
+    @override_settings(CART_STORAGE_BACKEND=CACHE_CART, CART_WRITE_BEHIND_SECONDS=3600)
+    def test_cache_backend_buffers_writes_until_flush(self):
+        self._exercise()
+        self.assertFalse(CartItem.objects.filter(user=self.buyer).exists())
+
+        CacheCartStorage.flush_dirty(UserProfile)
+
+        self.assertEqual(CartItem.objects.get(user=self.buyer).quantity, 3)
+
+    @override_settings(CART_STORAGE_BACKEND=CACHE_CART, CART_WRITE_BEHIND_SECONDS=3600)
+    def test_flush_walks_only_the_dirty_list(self):
+        other = make_user("other@example.com", "other")
+        CacheCartStorage(self.buyer).set(self.product.id, 2)
+        CacheCartStorage(self.buyer).set(self.product.id, 3)  # already listed
+        CacheCartStorage(other).set(self.product.id, 5)
+        for n in range(5):
+            CacheCartStorage(make_user(f"idle{n}@example.com", f"idle{n}")).load()
+
+        with patch.object(CacheCartStorage, "FLUSH_BATCH_SIZE", 1), \
+                CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(CacheCartStorage.flush_dirty(UserProfile), 2)
+
+        self.assertEqual(
+            dict(CartItem.objects.values_list("user__email", "quantity")),
+            {"buyer@example.com": 3, "other@example.com": 5},
+        )
+        user_queries = [q for q in ctx.captured_queries if 'FROM "userprofile_userprofile"' in q["sql"]]
+        self.assertEqual(len(user_queries), 2)  # one per listed user, never a scan
+        self.assertEqual(CacheCartStorage.flush_dirty(UserProfile), 0)
+
+    @override_settings(CART_STORAGE_BACKEND=CACHE_CART, CART_WRITE_BEHIND_SECONDS=3600)
+    def test_slot_taken_but_not_yet_stored_is_picked_up_next_run(self):
+        storage = CacheCartStorage(self.buyer)
+        with patch.object(CacheCartStorage, "_slot_key", return_value="cart:lost"):
+            storage.set(self.product.id, 2)  # the slot is stored late, below
+
+        self.assertEqual(CacheCartStorage.flush_dirty(UserProfile), 0)
+        cache.set(CacheCartStorage._slot_key(1), self.buyer.pk)
+        self.assertEqual(CacheCartStorage.flush_dirty(UserProfile), 1)
+        self.assertEqual(CartItem.objects.get(user=self.buyer).quantity, 2)
+
+    @override_settings(CART_STORAGE_BACKEND=CACHE_CART, CART_WRITE_BEHIND_SECONDS=3600)
+    def test_login_merge_persists_immediately(self):
+        from .cart import merge_session_cart
+
+        request = RequestFactory().get("/")
+        request.session = self.client.session
+        request.session[settings.CART_SESSION_ID] = {
+            str(self.product.id): {"quantity": 2, "id": str(self.product.id)}
+        }
+
+        merge_session_cart(request, self.buyer)
+
+        self.assertEqual(CartItem.objects.get(user=self.buyer).quantity, 2)
+
+    def test_cache_backend_refused_on_a_process_local_cache(self):
+        from .checks import check_cart_cache
+
+        with override_settings(CART_STORAGE_BACKEND=CACHE_CART):
+            self.assertEqual([e.id for e in check_cart_cache(None)], ["store.E001"])
+        shared = {"default": {"BACKEND": "django.core.cache.backends.db.DatabaseCache"}}
+        with override_settings(CART_STORAGE_BACKEND=CACHE_CART, CACHES=shared):
+            self.assertEqual(check_cart_cache(None), [])
+
+    @override_settings(CART_STORAGE_BACKEND=CACHE_CART, CART_WRITE_BEHIND_SECONDS=3600)
+    def test_cache_backend_reloads_from_database_after_eviction(self):
+        CartItem.objects.create(user=self.buyer, product=self.product, quantity=4)
+
+        self.assertEqual(len(self._cart()), 4)
+
+    @override_settings(CART_STORAGE_BACKEND=CACHE_CART, CART_WRITE_BEHIND_SECONDS=3600)
+    def test_cache_backend_clear_is_persisted_immediately(self):
+        CartItem.objects.create(user=self.buyer, product=self.product, quantity=4)
+        cart = self._cart()
+        cart.clear()
+
+        self.assertEqual(len(cart), 0)
+        self.assertFalse(CartItem.objects.filter(user=self.buyer).exists())
+
+
+# ---------------------------------------------------------------------------
+# Checkout
+# ---------------------------------------------------------------------------
+
+CHECKOUT_DATA = {
+    "first_name": "Ada",
+    "last_name": "Obi",
+    "phone": "09012345678",
+    "pickup_location": "hall_1",
+}
+
+
+def paystack_init_response(reference="ref"):
+    response = MagicMock()
+    response.status_code = 200
+    response.json.return_value = {
+        "status": True,
+        "data": {
+            "authorization_url": "https://paystack.com/pay/test",
+            "access_code": "access",
+            "reference": reference,
+        },
+    }
+    return response
+
+
+class CheckoutFeeTests(TestCase):
+    """Integer-kobo Paystack fee estimate."""
+
+    def test_fee_grossed_up_and_rounded(self):
+        # (0.015 * 150000 + 10000) / 0.985 = 12436.55...
+        self.assertEqual(estimate_paystack_fee_kobo(150000), 12437)
+
+    def test_fee_capped(self):
+        self.assertEqual(estimate_paystack_fee_kobo(50_000_000), 200000)
+
+
+@override_settings(ADMIN_SUBACCOUNT_CODE="ACCT_admin")
+class CheckoutAPITests(APITestCase):
+    """POST /api/checkout/ prices the cart once and bulk-inserts order lines."""
+
+    def setUp(self):
+        self.vendor = make_vendor(make_user())
+        self.vendor.subaccount_code = "ACCT_vendor"
+        self.vendor.save()
+        self.category = make_category()
+        self.buyer = make_user("buyer@example.com", "buyer")
+        self.client.force_authenticate(user=self.buyer)
+        self.mug = make_product(self.vendor, self.category, title="Mug", quantity=10)
+        self.lamp = make_product(self.vendor, self.category, title="Lamp", quantity=10)
+        CartItem.objects.create(user=self.buyer, product=self.mug, quantity=2)
+        CartItem.objects.create(user=self.buyer, product=self.lamp, quantity=1)
+
+    @patch("store.api_views.paystack_client.post")
+    def test_checkout_creates_order_lines_and_balanced_split(self, mock_post):
+        mock_post.return_value = paystack_init_response()
+
+        resp = self.client.post("/api/checkout/", CHECKOUT_DATA, format="json")
+
+        self.assertEqual(resp.status_code, 200)
+        order = Order.objects.get(created_by=self.buyer)
+        self.assertEqual(order.total_cost, 4500)
+        self.assertEqual(
+            sorted(order.items.values_list("quantity", "price")), [(1, 1500), (2, 3000)]
+        )
+
+        payload = mock_post.call_args.kwargs["json"]
+        fee = estimate_paystack_fee_kobo(450000)
+        self.assertEqual(payload["amount"], 450000 + fee)
+        shares = {s["subaccount"]: s["share"] for s in payload["split"]["subaccounts"]}
+        self.assertEqual(shares, {"ACCT_vendor": 450000, "ACCT_admin": fee})
+
+    @patch("store.api_views.paystack_client.post")
+    def test_order_lines_inserted_in_one_query(self, mock_post):
+        mock_post.return_value = paystack_init_response()
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post("/api/checkout/", CHECKOUT_DATA, format="json")
+
+        item_inserts = [
+            q for q in queries.captured_queries
+            if q["sql"].startswith('INSERT INTO "store_orderitem"')
+        ]
+        self.assertEqual(len(item_inserts), 1)
+
+    @patch("store.api_views.paystack_client.post")
+    def test_checkout_reserves_stock(self, mock_post):
+        mock_post.return_value = paystack_init_response()
+
+        self.client.post("/api/checkout/", CHECKOUT_DATA, format="json")
+
+        self.mug.refresh_from_db()
+        self.assertEqual(self.mug.quantity, 8)
+        self.assertEqual(
+            StockReservation.objects.filter(status=StockReservation.HELD).count(), 2
+        )
+
+    @patch("store.api_views.paystack_client.post")
+    def test_checkout_rejected_when_stock_runs_out(self, mock_post):
+        Product.objects.filter(pk=self.mug.pk).update(quantity=1)
+
+        resp = self.client.post("/api/checkout/", CHECKOUT_DATA, format="json")
+
+        self.assertEqual(resp.status_code, 409)
+        mock_post.assert_not_called()
+        self.assertFalse(Order.objects.exists())
+
+    @patch("store.api_views.paystack_client.post")
+    def test_failed_paystack_init_releases_stock(self, mock_post):
+        mock_post.side_effect = requests.ConnectionError("down")
+
+        resp = self.client.post("/api/checkout/", CHECKOUT_DATA, format="json")
+
+        self.assertEqual(resp.status_code, 502)
+        self.mug.refresh_from_db()
+        self.assertEqual(self.mug.quantity, 10)
+
+
+# ---------------------------------------------------------------------------
+# Paystack client
+# ---------------------------------------------------------------------------
+
+def http_response(status_code, payload=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.json.return_value = payload or {}
+    return response
+
+
+@patch("store.paystack.time.sleep")
+class PaystackClientTests(TestCase):
+    """Pooled client: timeouts always sent, retries only for idempotent calls."""
+
+    def setUp(self):
+        self.paystack = PaystackClient(base_url="https://paystack.test", secret_key="sk_test", max_retries=2)
+
+    def test_idempotent_get_retried_on_server_error(self, mock_sleep):
+        with patch.object(self.paystack.session, "request") as mock_request:
+            mock_request.side_effect = [
+                requests.ConnectionError("reset"),
+                http_response(503),
+                http_response(200, {"status": True}),
+            ]
+            response = self.paystack.get("transaction/verify/abc")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_request.call_count, 3)
+        self.assertEqual(mock_sleep.call_count, 2)
+        _, kwargs = mock_request.call_args
+        self.assertEqual(kwargs["headers"]["Authorization"], "Bearer sk_test")
+        self.assertIsNotNone(kwargs["timeout"])
+
+        stats = self.paystack.metrics.snapshot()["GET transaction/verify"]
+        self.assertEqual(stats["calls"], 3)
+        self.assertEqual(stats["errors"], 2)
+        self.assertEqual(stats["retries"], 2)
+
+    def test_post_not_retried(self, mock_sleep):
+        with patch.object(self.paystack.session, "request") as mock_request:
+            mock_request.side_effect = requests.Timeout("slow")
+            with self.assertRaises(requests.Timeout):
+                self.paystack.post("transaction/initialize", json={})
+
+        self.assertEqual(mock_request.call_count, 1)
+        mock_sleep.assert_not_called()
+
+
+# ---------------------------------------------------------------------------
+# Stock reservations
+# ---------------------------------------------------------------------------
+
+class StockReservationTests(TestCase):
+    """Conditional decrements, all-or-nothing reservation, expiry and commit."""
+
+    def setUp(self):
+        self.vendor = make_vendor(make_user())
+        self.category = make_category()
+        self.mug = make_product(self.vendor, self.category, title="Mug", quantity=5)
+        self.lamp = make_product(self.vendor, self.category, title="Lamp", quantity=1)
+
+    def _lines(self, *pairs):
+        return [{"product": product, "quantity": quantity} for product, quantity in pairs]
+
+    def test_reserving_last_units_marks_product_out_of_stock(self):
+        reserve_stock("ref1", self._lines((self.lamp, 1)))
+
+        self.lamp.refresh_from_db()
+        self.assertEqual(self.lamp.quantity, 0)
+        self.assertEqual(self.lamp.stock, Product.OUT_OF_STOCK)
+
+    def test_reservation_is_all_or_nothing(self):
+        with self.assertRaises(InsufficientStock):
+            reserve_stock("ref1", self._lines((self.mug, 2), (self.lamp, 2)))
+
+        self.mug.refresh_from_db()
+        self.assertEqual(self.mug.quantity, 5)
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_second_buyer_cannot_take_reserved_units(self):
+        reserve_stock("ref1", self._lines((self.lamp, 1)))
+
+        with self.assertRaises(InsufficientStock):
+            reserve_stock("ref2", self._lines((self.lamp, 1)))
+
+    def test_expired_reservation_returns_stock(self):
+        reserve_stock("ref1", self._lines((self.mug, 3)))
+
+        released = release_expired_reservations(now=timezone.now() + timedelta(days=1))
+
+        self.assertEqual(released, 1)
+        self.mug.refresh_from_db()
+        self.assertEqual(self.mug.quantity, 5)
+        self.assertEqual(release_expired_reservations(now=timezone.now() + timedelta(days=1)), 0)
+
+    def test_commit_keeps_held_units_and_retakes_expired_ones(self):
+        reserve_stock("ref1", self._lines((self.mug, 2)))
+        release_expired_reservations(now=timezone.now() + timedelta(days=1))
+        reserve_stock("ref1", self._lines((self.lamp, 1)))
+        order_items = [
+            OrderItem(product=self.mug, quantity=2, price=3000),
+            OrderItem(product=self.lamp, quantity=1, price=1500),
+        ]
+
+        commit_reservations("ref1", order_items)
+
+        self.mug.refresh_from_db()
+        self.lamp.refresh_from_db()
+        self.assertEqual(self.mug.quantity, 3)
+        self.assertEqual(self.lamp.quantity, 0)
+        self.assertEqual(
+            StockReservation.objects.get(product=self.lamp).status,
+            StockReservation.COMMITTED,
+        )
+
+
+# ---------------------------------------------------------------------------
+# Webhook inbox
+# ---------------------------------------------------------------------------
+
+def make_paid_order(buyer, product, ref="ref123", quantity=1):
+    order = Order.objects.create(
+        created_by=buyer,
+        first_name="Ada",
+        last_name="Obi",
+        phone="+2349012345678",
+        total_cost=product.price * quantity,
+        ref=ref,
+    )
+    OrderItem.objects.create(
+        order=order, product=product, quantity=quantity, price=product.price * quantity
+    )
+    payment = Payment.objects.create(
+        user=buyer, order=order, ref=ref, amount=order.total_cost, status="pending"
+    )
+    return order, payment
+
+
+def signed_webhook(client, url, payload):
+    body = json.dumps(payload).encode()
+    signature = hmac.new(
+        settings.PAYSTACK_SECRET_KEY.encode(), body, hashlib.sha512
+    ).hexdigest()
+    return client.generic(
+        "POST", url, body, content_type="application/json",
+        HTTP_X_PAYSTACK_SIGNATURE=signature,
+    )
+
+
+CHARGE_SUCCESS = {"event": "charge.success", "data": {"id": 991, "reference": "ref123"}}
+
+
+@patch("userprofile.email_utils.send_vendor_order_notification")
+@patch("userprofile.email_utils.send_receipt_email")
+class WebhookInboxTests(APITestCase):
+    """Webhooks are recorded and acknowledged; the worker applies them."""
+
+    url = "/api/paystack_webhook/"
+
+    def setUp(self):
+        self.vendor = make_vendor(make_user())
+        self.category = make_category()
+        self.buyer = make_user("buyer@example.com", "buyer")
+        self.product = make_product(self.vendor, self.category, quantity=5)
+        self.order, self.payment = make_paid_order(self.buyer, self.product)
+
+    def test_webhook_is_recorded_not_applied(self, mock_receipt, mock_vendor):
+        resp = signed_webhook(self.client, self.url, CHARGE_SUCCESS)
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(WebhookEvent.objects.get().status, WebhookEvent.PENDING)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, "pending")
+
+    def test_redelivery_is_deduplicated(self, mock_receipt, mock_vendor):
+        signed_webhook(self.client, self.url, CHARGE_SUCCESS)
+        resp = signed_webhook(self.client, self.url, CHARGE_SUCCESS)
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(WebhookEvent.objects.count(), 1)
+
+    def test_bad_signature_rejected(self, mock_receipt, mock_vendor):
+        resp = self.client.generic(
+            "POST", self.url, json.dumps(CHARGE_SUCCESS),
+            content_type="application/json", HTTP_X_PAYSTACK_SIGNATURE="bad",
+        )
+        self.assertEqual(resp.status_code, 403)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_worker_applies_event(self, mock_receipt, mock_vendor):
+        signed_webhook(self.client, self.url, CHARGE_SUCCESS)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            counts = process_webhook_events()
+
+        self.assertEqual(counts[WebhookEvent.PROCESSED], 1)
+        self.payment.refresh_from_db()
+        self.order.refresh_from_db()
+        self.assertEqual(self.payment.status, "paid")
+        self.assertTrue(self.order.is_paid)
+        mock_receipt.assert_called_once()
+
+    def test_failures_back_off_then_dead_letter(self, mock_receipt, mock_vendor):
+        signed_webhook(self.client, self.url, CHARGE_SUCCESS)
+
+        with patch("store.services.commit_reservations", side_effect=RuntimeError("boom")):
+            process_webhook_events(max_attempts=2)
+            event = WebhookEvent.objects.get()
+            self.assertEqual(event.status, WebhookEvent.PENDING)
+            self.assertGreater(event.next_attempt_at, timezone.now())
+            self.payment.refresh_from_db()
+            self.assertEqual(self.payment.status, "pending")  # rolled back
+
+            WebhookEvent.objects.update(next_attempt_at=timezone.now())
+            process_webhook_events(max_attempts=2)
+
+        event.refresh_from_db()
+        self.assertEqual(event.status, WebhookEvent.DEAD)
+        self.assertIn("boom", event.last_error)
+
+
+# ---------------------------------------------------------------------------
+# Payment finalization
+# ---------------------------------------------------------------------------
+
+@patch("userprofile.email_utils.send_vendor_order_notification")
+@patch("userprofile.email_utils.send_receipt_email")
+class FinalizePaymentTests(TestCase):
+    """finalize_payment is safe to call from every path, any number of times."""
+
+    def setUp(self):
+        self.vendor = make_vendor(make_user())
+        self.category = make_category()
+        self.buyer = make_user("buyer@example.com", "buyer")
+        self.product = make_product(self.vendor, self.category, quantity=5)
+        self.order, self.payment = make_paid_order(self.buyer, self.product, quantity=2)
+
+    def test_second_call_is_a_no_op(self, mock_receipt, mock_vendor):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(finalize_payment("ref123", paystack_data={"status": "success"}))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertFalse(finalize_payment("ref123"))
+
+        self.payment.refresh_from_db()
+        self.order.refresh_from_db()
+        self.product.refresh_from_db()
+        self.assertEqual(self.payment.status, "paid")
+        self.assertEqual(self.payment.paystack_response, {"status": "success"})
+        self.assertTrue(self.order.is_paid)
+        self.assertEqual(self.product.quantity, 3)
+        mock_receipt.assert_called_once()
+        mock_vendor.assert_called_once()
+
+    def test_stock_for_all_lines_is_taken_in_one_update(self, mock_receipt, mock_vendor):
+        other = make_product(self.vendor, self.category, title="Other", quantity=4)
+        OrderItem.objects.create(order=self.order, product=other, quantity=1, price=other.price)
+
+        with CaptureQueriesContext(connection) as ctx:
+            finalize_payment("ref123")
+
+        updates = [q for q in ctx.captured_queries if 'UPDATE "store_product"' in q["sql"]]
+        self.assertEqual(len(updates), 1)
+        other.refresh_from_db()
+        self.assertEqual(other.quantity, 3)
+
+    def test_failure_does_not_overwrite_paid(self, mock_receipt, mock_vendor):
+        finalize_payment("ref123")
+
+        self.assertFalse(mark_payment_failed("ref123"))
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, "paid")
+
+    def test_order_emails_share_one_context(self, mock_receipt, mock_vendor):
+        finalize_payment("ref123")
+
+        receipt_context = mock_receipt.call_args.kwargs["order_context"]
+        self.assertIs(mock_vendor.call_args.kwargs["order_context"], receipt_context)
+        self.assertEqual(receipt_context["items"][0]["product_name"], self.product.title)
+
+
+class OrderEmailTests(TestCase):
+    """Receipt and vendor emails are queued with the payment."""
+
+    def test_receipt_and_each_vendor_email_queued(self):
+        from userprofile.models import EmailOutbox
+
+        category = make_category()
+        first = make_vendor(make_user())
+        second = make_vendor(make_user("second@example.com", "second"))
+        buyer = make_user("buyer@example.com", "buyer")
+        mug = make_product(first, category, title="Mug", quantity=5)
+        lamp = make_product(second, category, title="Lamp", quantity=5)
+        order, _ = make_paid_order(buyer, mug)
+        OrderItem.objects.create(order=order, product=lamp, quantity=1, price=lamp.price)
+
+        with CaptureQueriesContext(connection) as ctx:
+            finalize_payment("ref123")
+
+        item_queries = [
+            q for q in ctx.captured_queries
+            if q["sql"].startswith("SELECT") and 'FROM "store_orderitem"' in q["sql"]
+        ]
+        # stock commit, vendor sales counters, one shared email context
+        self.assertEqual(len(item_queries), 3)
+        self.assertEqual(
+            sorted(EmailOutbox.objects.values_list("to_email", flat=True)),
+            ["buyer@example.com", "second@example.com", "vendor@example.com"],
+        )
+
+
+# ---------------------------------------------------------------------------
+# Bank list
+# ---------------------------------------------------------------------------
+
+PAYSTACK_BANKS = {
+    "status": True,
+    "message": "Banks retrieved",
+    "data": [{"name": "Access Bank", "code": "044", "slug": "access-bank"}],
+}
+
+
+@patch("store.banks.threading.Thread")
+@patch("store.banks.paystack_client.get")
+class BankListTests(APITestCase):
+    """The bank list is cached, revalidated in the background and has a fallback."""
+
+    url = "/api/banks/"
+
+    def setUp(self):
+        cache.clear()
+
+    def test_list_is_fetched_once_and_cached(self, mock_get, mock_thread):
+        mock_get.return_value = http_response(200, PAYSTACK_BANKS)
+
+        first = self.client.get(self.url)
+        second = self.client.get(self.url)
+
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(second.json(), PAYSTACK_BANKS)
+        self.assertEqual(first["ETag"], second["ETag"])
+        self.assertIn("max-age=", first["Cache-Control"])
+        self.assertIn("stale-while-revalidate=", first["Cache-Control"])
+
+    def test_matching_etag_returns_304(self, mock_get, mock_thread):
+        mock_get.return_value = http_response(200, PAYSTACK_BANKS)
+        etag = self.client.get(self.url)["ETag"]
+
+        resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(resp.status_code, 304)
+        self.assertFalse(resp.content)
+
+    def test_cold_cache_outage_serves_bundled_banks(self, mock_get, mock_thread):
+        mock_get.side_effect = requests.ConnectionError("down")
+
+        resp = self.client.get(self.url)
+
+        self.assertEqual(resp.status_code, 200)
+        codes = {bank["code"] for bank in resp.json()["data"]}
+        self.assertIn("058", codes)
+
+    def test_cold_cache_non_json_body_serves_bundled_banks(self, mock_get, mock_thread):
+        mock_get.return_value = http_response(200)
+        mock_get.return_value.json.side_effect = requests.JSONDecodeError("Expecting value", "", 0)
+
+        resp = self.client.get(self.url)
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn("058", {bank["code"] for bank in resp.json()["data"]})
+        # One short attempt, no retries, while the request waits.
+        mock_get.assert_called_once_with(
+            "bank", timeout=settings.BANK_LIST_COLD_TIMEOUT, idempotent=False
+        )
+
+    def test_stale_entry_is_served_while_refreshing(self, mock_get, mock_thread):
+        mock_get.return_value = http_response(200, PAYSTACK_BANKS)
+        get_bank_list()
+        entry = cache.get(BANK_LIST_CACHE_KEY)
+        entry["fetched_at"] -= settings.BANK_LIST_TTL + 1
+        cache.set(BANK_LIST_CACHE_KEY, entry)
+
+        self.assertEqual(get_bank_list()["payload"], PAYSTACK_BANKS)
+        get_bank_list()
+
+        self.assertEqual(mock_get.call_count, 1)
+        mock_thread.assert_called_once()  # one refresh despite two stale reads
+
+
+RESOLVED = {"status": True, "data": {"account_name": "ADA OBI", "account_number": "0123456789"}}
+
+
+@patch("store.banks.paystack_client.get")
+class AccountResolutionTests(APITestCase):
+    """Account lookups are memoized, negatively cached and coalesced."""
+
+    url = "/api/verify-account/"
+
+    def setUp(self):
+        cache.clear()
+
+    def test_repeat_lookups_hit_cache(self, mock_get):
+        mock_get.return_value = http_response(200, RESOLVED)
+        payload = {"account_number": "0123456789", "bank_code": "058"}
+
+        first = self.client.post(self.url, payload, format="json")
+        second = self.client.post(self.url, payload, format="json")
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.json(), RESOLVED)
+        self.assertEqual(mock_get.call_count, 1)
+
+    def test_failures_are_negatively_cached(self, mock_get):
+        mock_get.return_value = http_response(422, {"status": False, "message": "Could not resolve account name"})
+
+        resolve_account("0123456789", "058")
+        result = resolve_account("0123456789", "058")
+
+        self.assertEqual(result["status_code"], 400)
+        self.assertEqual(result["body"]["message"], "Could not resolve account name")
+        self.assertEqual(mock_get.call_count, 1)
+
+    def test_outages_and_rate_limits_are_not_cached(self, mock_get):
+        mock_get.side_effect = [
+            requests.ConnectionError("reset"),
+            http_response(429),
+            http_response(502),
+            http_response(200, RESOLVED),
+        ]
+
+        statuses = [resolve_account("0123456789", "058")["status_code"] for _ in range(4)]
+
+        self.assertEqual(statuses, [503, 503, 502, 200])
+        self.assertEqual(resolve_account("0123456789", "058")["body"], RESOLVED)
+        self.assertEqual(mock_get.call_count, 4)
+
+    def test_concurrent_lookups_share_one_call(self, mock_get):
+        release = threading.Event()
+
+        def slow_resolve(*args, **kwargs):
+            release.wait(5)
+            return http_response(200, RESOLVED)
+
+        mock_get.side_effect = slow_resolve
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(resolve_account("0123456789", "058")))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(result["status_code"] == 200 for result in results))
+        self.assertEqual(mock_get.call_count, 1)
+
+
+# ---------------------------------------------------------------------------
+# Payment reconciliation
+# ---------------------------------------------------------------------------
+
+@patch("userprofile.email_utils.send_vendor_order_notification")
+@patch("userprofile.email_utils.send_receipt_email")
+class ReconcilePaymentsTests(TestCase):
+    """Stale pending payments are settled from Paystack's view of them."""
+
+    def setUp(self):
+        self.vendor = make_vendor(make_user())
+        self.category = make_category()
+        self.buyer = make_user("buyer@example.com", "buyer")
+        self.product = make_product(self.vendor, self.category, quantity=5)
+
+    def _pending(self, ref, age):
+        order, payment = make_paid_order(self.buyer, self.product, ref=ref)
+        Payment.objects.filter(pk=payment.pk).update(created_at=timezone.now() - age)
+        return payment
+
+    def _verify(self, outcomes):
+        def verify(path, **kwargs):
+            ref = path.rsplit("/", 1)[-1]
+            outcome = outcomes[ref]
+            if isinstance(outcome, Exception):
+                raise outcome
+            return http_response(200, {"status": True, "data": {"status": outcome, "reference": ref}})
+
+        return patch("store.paystack.paystack_client.get", side_effect=verify)
+
+    def test_payments_are_settled_by_paystack_status(self, mock_receipt, mock_vendor):
+        self._pending("paid1", timedelta(hours=1))
+        self._pending("declined1", timedelta(hours=1))
+        self._pending("open1", timedelta(hours=1))
+        self._pending("old1", timedelta(days=2))
+        self._pending("flaky1", timedelta(days=2))
+        self._pending("fresh1", timedelta(minutes=1))
+        outcomes = {
+            "paid1": "success",
+            "declined1": "failed",
+            "open1": "abandoned",
+            "old1": "abandoned",
+            "flaky1": requests.ConnectionError("down"),
+        }
+
+        with self._verify(outcomes) as mock_get:
+            counts = reconcile_pending_payments(batch_size=2, max_workers=4)
+
+        self.assertEqual(counts, {"finalized": 1, "failed": 2, "pending": 1, "errors": 1})
+        self.assertEqual(mock_get.call_count, 5)  # fresh1 is still in checkout
+        statuses = dict(Payment.objects.values_list("ref", "status"))
+        self.assertEqual(
+            statuses,
+            {
+                "paid1": "paid",
+                "declined1": "failed",
+                "open1": "pending",
+                "old1": "failed",
+                "flaky1": "pending",
+                "fresh1": "pending",
+            },
+        )
+        self.assertTrue(Order.objects.get(ref="paid1").is_paid)
+
+    def test_failed_payment_releases_reservation(self, mock_receipt, mock_vendor):
+        self._pending("declined1", timedelta(hours=1))
+        reserve_stock("declined1", [{"product": self.product, "quantity": 2}])
+
+        with self._verify({"declined1": "failed"}):
+            reconcile_pending_payments()
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 5)
+
+
+# ---------------------------------------------------------------------------
+# Payment verification
+# ---------------------------------------------------------------------------
+
+@patch("userprofile.email_utils.send_vendor_order_notification")
+@patch("userprofile.email_utils.send_receipt_email")
+@patch("store.api_views.paystack_client.get")
+class VerifyPaymentAPITests(APITestCase):
+    """verify_payment_api only calls Paystack while a payment is pending."""
+
+    url = "/api/verify-payment/"
+
+    def setUp(self):
+        cache.clear()
+        self.vendor = make_vendor(make_user())
+        self.category = make_category()
+        self.buyer = make_user("buyer@example.com", "buyer")
+        self.product = make_product(self.vendor, self.category, quantity=5)
+        self.order, self.payment = make_paid_order(self.buyer, self.product)
+        self.client.force_authenticate(user=self.buyer)
+        # Cloudinary is not configured in tests.
+        thumbnail = patch.object(Product, "get_thumbnail", return_value="https://placehold.co/600x400")
+        thumbnail.start()
+        self.addCleanup(thumbnail.stop)
+
+    def _verify(self):
+        return self.client.post(self.url, {"reference": "ref123"}, format="json")
+
+    def test_paid_payment_skips_paystack(self, mock_get, mock_receipt, mock_vendor):
+        finalize_payment("ref123")
+
+        resp = self._verify()
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["status"], "paid")
+        self.assertEqual(len(resp.data["order"]["items"]), 1)
+        mock_get.assert_not_called()
+
+    def test_repeat_polls_of_paid_payment_are_one_lookup(self, mock_get, mock_receipt, mock_vendor):
+        finalize_payment("ref123")
+        self._verify()
+
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self._verify()
+
+        self.assertEqual(resp.status_code, 200)
+        payment_queries = [q for q in ctx.captured_queries if 'FROM "store_payment"' in q["sql"]]
+        self.assertEqual(len(payment_queries), 1)
+        self.assertFalse(any('FROM "store_orderitem"' in q["sql"] for q in ctx.captured_queries))
+
+    def test_pending_payment_verified_and_finalized(self, mock_get, mock_receipt, mock_vendor):
+        mock_get.return_value = http_response(
+            200, {"status": True, "data": {"status": "success", "reference": "ref123"}}
+        )
+
+        resp = self._verify()
+        self._verify()
+
+        self.assertEqual(resp.status_code, 200)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, "paid")
+        mock_get.assert_called_once()
+        mock_receipt.assert_called_once()
+
+    @override_settings(PAYMENT_VERIFY_CACHE_SECONDS=0)
+    def test_in_flight_charge_stays_pending_until_it_succeeds(self, mock_get, mock_receipt, mock_vendor):
+        mock_get.side_effect = [
+            http_response(200, {"status": True, "data": {"status": "ongoing"}}),
+            http_response(200, {"status": True, "data": {"status": "success"}}),
+        ]
+
+        first = self._verify()
+        self.payment.refresh_from_db()
+        self.assertEqual((first.status_code, first.data["status"]), (202, "pending"))
+        self.assertEqual(self.payment.status, "pending")
+
+        second = self._verify()
+        self.payment.refresh_from_db()
+        self.assertEqual((second.status_code, second.data["status"]), (200, "paid"))
+        self.assertEqual(self.payment.status, "paid")
+
+    def test_reversed_charge_is_marked_failed(self, mock_get, mock_receipt, mock_vendor):
+        mock_get.return_value = http_response(
+            200, {"status": True, "data": {"status": "reversed"}}
+        )
+
+        self.assertEqual(self._verify().data["status"], "failed")
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, "failed")
+
+    def test_pending_verification_is_cached_between_polls(self, mock_get, mock_receipt, mock_vendor):
+        mock_get.return_value = http_response(400, {"status": False, "message": "busy"})
+
+        self.assertEqual(self._verify().status_code, 400)
+        self.assertEqual(self._verify().status_code, 400)
+
+        mock_get.assert_called_once()
+
+
+# ---------------------------------------------------------------------------
+# Payment status long-poll
+# ---------------------------------------------------------------------------
+
+@patch("userprofile.email_utils.send_vendor_order_notification")
+@patch("userprofile.email_utils.send_receipt_email")
+class PaymentStatusTests(APITestCase):
+    """/api/payment-status/<ref>/ returns as soon as the status changes."""
+
+    def setUp(self):
+        cache.clear()
+        vendor = make_vendor(make_user())
+        self.buyer = make_user("buyer@example.com", "buyer")
+        product = make_product(vendor, make_category(), quantity=5)
+        self.order, self.payment = make_paid_order(self.buyer, product)
+        self.client.force_authenticate(user=self.buyer)
+
+    def _status(self, **params):
+        return self.client.get("/api/payment-status/ref123/", params)
+
+    def test_returns_immediately_when_already_changed(self, mock_receipt, mock_vendor):
+        finalize_payment("ref123")
+
+        resp = self._status(wait=20)
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data, {"reference": "ref123", "status": "paid", "changed": True})
+
+    def test_times_out_with_unchanged_status(self, mock_receipt, mock_vendor):
+        resp = self._status(wait=0)
+
+        self.assertEqual(resp.data["status"], "pending")
+        self.assertFalse(resp.data["changed"])
+
+    def test_other_users_payment_is_not_found(self, mock_receipt, mock_vendor):
+        self.client.force_authenticate(user=make_user("other@example.com", "other"))
+        self.assertEqual(self._status().status_code, 404)
+
+    def test_finalize_publishes_status_on_commit(self, mock_receipt, mock_vendor):
+        with self.captureOnCommitCallbacks(execute=True):
+            finalize_payment("ref123")
+
+        # Served from the cache marker, not the payments table.
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(current_payment_status("ref123"), "paid")
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_mark_failed_publishes_status_on_commit(self, mock_receipt, mock_vendor):
+        with self.captureOnCommitCallbacks(execute=True):
+            mark_payment_failed("ref123")
+
+        self.assertEqual(cache.get("payment:status:ref123"), "failed")
+
+    @override_settings(PAYMENT_STATUS_POLL_SECONDS=30)
+    def test_async_waiter_is_woken_by_notification(self, mock_receipt, mock_vendor):
+        timer = threading.Timer(0.2, notify_payment_status, args=("ref123", "paid"))
+        timer.start()
+        self.addCleanup(timer.cancel)
+
+        started = time.monotonic()
+        status = async_to_sync(await_payment_status)("ref123", "pending", 20)
+
+        self.assertEqual(status, "paid")
+        self.assertLess(time.monotonic() - started, 5)
+
+
+# ---------------------------------------------------------------------------
+# Order history
+# ---------------------------------------------------------------------------
+
+class OrderHistoryAPITests(APITestCase):
+    """order_history_api pages through orders with a fixed number of queries."""
+
+    url = "/api/order-history/"
+
+    def setUp(self):
+        vendor = make_vendor(make_user())
+        category = make_category()
+        self.buyer = make_user("buyer@example.com", "buyer")
+        self.products = [
+            make_product(vendor, category, title=f"Item {n}", slug=f"item-{n}")
+            for n in range(3)
+        ]
+        self.client.force_authenticate(user=self.buyer)
+        thumbnail = patch.object(Product, "get_thumbnail", return_value="https://placehold.co/600x400")
+        thumbnail.start()
+        self.addCleanup(thumbnail.stop)
+
+    def _orders(self, count, start=0):
+        for n in range(start, start + count):
+            order, payment = make_paid_order(
+                self.buyer, self.products[n % 3], ref=f"hist{n}"
+            )
+            OrderItem.objects.create(order=order, product=self.products[(n + 1) % 3], price=100)
+            payment.status = "paid"
+            payment.save()
+
+    def test_query_count_does_not_grow_with_orders(self):
+        self._orders(2)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(self.url)
+
+        self._orders(10, start=2)
+        with CaptureQueriesContext(connection) as large:
+            resp = self.client.get(self.url)
+
+        self.assertEqual(len(resp.data["orders"]), 10)
+        self.assertEqual(len(large.captured_queries), len(small.captured_queries))
+
+    def test_cursor_pages_cover_every_order_once(self):
+        self._orders(5)
+
+        refs = []
+        url = f"{self.url}?page_size=2"
+        while url:
+            resp = self.client.get(url)
+            refs += [order["ref"] for order in resp.data["orders"]]
+            url = resp.data["next"]
+
+        self.assertEqual(sorted(refs), sorted(f"hist{n}" for n in range(5)))
+
+    def test_includes_users_review_of_each_product(self):
+        self._orders(1)
+        Review.objects.create(
+            product=self.products[0], author=self.buyer, subject="Nice", rating=4
+        )
+
+        items = self.client.get(self.url).data["orders"][0]["items"]
+
+        reviews = {item["product"]["id"]: item["my_review"] for item in items}
+        self.assertEqual(reviews[self.products[0].pk]["rating"], 4)
+        self.assertIsNone(reviews[self.products[1].pk])
+
+
+# ---------------------------------------------------------------------------
+# Receipt PDFs
+# ---------------------------------------------------------------------------
+
+class ReceiptPDFTests(APITestCase):
+    """Receipts are rendered once per order and served from storage."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        storage = override_settings(
+            RECEIPT_STORAGE_ROOT=os.path.join(self.tmpdir.name, "receipts"),
+            EMAIL_OUTBOX_TRANSPORT="userprofile.email_outbox.FileTransport",
+            EMAIL_OUTBOX_FILE_PATH=os.path.join(self.tmpdir.name, "emails"),
+            ADMIN_SUBACCOUNT_CODE="ACCT_admin",
+        )
+        storage.enable()
+        self.addCleanup(storage.disable)
+
+        category = make_category()
+        self.buyer = make_user("buyer@example.com", "buyer")
+        first_vendor = make_vendor(make_user())
+        first_vendor.subaccount_code = "ACCT_first"
+        first_vendor.save()
+        first = make_product(first_vendor, category, title="Jollof")
+        other_vendor = make_vendor(make_user("two@example.com", "two"))
+        other_vendor.store_name = "Second Store"
+        other_vendor.subaccount_code = "ACCT_second"
+        other_vendor.save()
+        second = make_product(other_vendor, category, title="Zobo")
+        Product.objects.filter(pk=second.pk).update(price=500)
+        second.price = 500
+        checkout = build_checkout(
+            [{"product": first, "quantity": 1}, {"product": second, "quantity": 2}],
+            self.buyer,
+            "ref123",
+        )
+        self.order = Order.objects.create(
+            created_by=self.buyer,
+            first_name="Ada",
+            last_name="Obi",
+            phone="+2349012345678",
+            total_cost=checkout["total_price"],
+            ref="ref123",
+        )
+        create_order_items(self.order, checkout["order_items"])
+        self.payment = Payment.objects.create(
+            user=self.buyer, order=self.order, ref="ref123",
+            amount=self.order.total_cost, status="pending",
+        )
+        self.client.force_authenticate(user=self.buyer)
+        self.url = "/api/receipt/ref123/pdf/"
+
+    def _pay(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            finalize_payment("ref123")
+
+    def test_renders_multi_vendor_pdf_in_naira(self):
+        # Uncompressed page streams keep the drawn text searchable.
+        with patch("reportlab.rl_config.pageCompression", 0):
+            pdf = render_receipt_pdf(self.order)
+
+        self.assertTrue(pdf.startswith(b"%PDF"))
+        # Jollof: 1 x 1,500; Zobo: 2 x 500 = 1,000; order total 2,500.
+        self.assertIn(b"(NGN 1,500.00)", pdf)
+        self.assertIn(b"(NGN 500.00)", pdf)
+        self.assertIn(b"(NGN 1,000.00)", pdf)
+        self.assertIn(b"Total paid: NGN 2,500.00", pdf)
+
+    def test_markup_in_user_text_is_escaped(self):
+        Product.objects.filter(title="Jollof").update(title="A<B & C>")
+        Order.objects.filter(pk=self.order.pk).update(first_name="<b>Ada")
+        self.order.refresh_from_db()
+
+        with patch("reportlab.rl_config.pageCompression", 0):
+            pdf = render_receipt_pdf(self.order)
+
+        # ReportLab draws the escaped markup as literal text runs.
+        self.assertIn(b"(A) Tj (<) Tj (B & C) Tj (>) Tj", pdf)
+        self.assertIn(b"(Customer: <) Tj (b) Tj (>) Tj (Ada Obi)", pdf)
+
+    def test_unpaid_order_is_not_found(self):
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_download_served_from_storage_with_etag(self):
+        self._pay()
+
+        with patch("store.receipts.render_receipt_pdf", wraps=render_receipt_pdf) as render:
+            first = self.client.get(self.url)
+            body = b"".join(first.streaming_content)
+            second = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first["Content-Type"], "application/pdf")
+        self.assertTrue(body.startswith(b"%PDF"))
+        self.assertEqual(second.status_code, 304)
+        render.assert_called_once()
+
+    def test_email_worker_renders_once_for_email_and_download(self):
+        self._pay()
+
+        with patch("store.receipts.render_receipt_pdf", wraps=render_receipt_pdf) as render:
+            send_pending_emails()
+            resp = self.client.get(self.url)
+
+        self.assertEqual(resp.status_code, 200)
+        render.assert_called_once()
+        attachment = os.path.join(self.tmpdir.name, "emails")
+        self.assertTrue(any(name.endswith("receipt-ref123.pdf") for name in os.listdir(attachment)))
+
+    def test_payment_receipt_view(self):
+        self._pay()
+        self.client.force_login(self.buyer)
+
+        resp = self.client.get("/receipt/ref123/pdf/")
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp["Content-Type"], "application/pdf")
+
+
+# ---------------------------------------------------------------------------
+# Staff exports
+# ---------------------------------------------------------------------------
+
+class AdminExportTests(APITestCase):
+    """Staff exports stream whole tables in chunks as CSV, JSONL or gzip."""
+
+    def setUp(self):
+        category = make_category()
+        self.buyer = make_user("buyer@example.com", "buyer")
+        product = make_product(make_vendor(make_user()), category)
+        for n in range(3):
+            _, payment = make_paid_order(self.buyer, product, ref=f"ref{n}")
+            payment.paystack_response = {"data": {"channel": "card", "n": n}}
+            payment.save()
+        self.staff = make_user("staff@example.com", "staff")
+        self.staff.is_staff = True
+        self.staff.save()
+
+    def _body(self, resp):
+        return b"".join(resp.streaming_content)
+
+    def test_staff_only(self):
+        url = "/api/admin/export/payments/"
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.client.force_authenticate(user=self.buyer)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_paystack_response_is_opt_in(self):
+        import csv
+
+        self.client.force_authenticate(user=self.staff)
+
+        with override_settings(EXPORT_CHUNK_SIZE=2):
+            resp = self.client.get("/api/admin/export/payments/")
+        rows = list(csv.DictReader(self._body(resp).decode().splitlines()))
+        self.assertEqual([row["ref"] for row in rows], ["ref0", "ref1", "ref2"])
+        self.assertNotIn("paystack_response", rows[0])
+
+        resp = self.client.get(
+            "/api/admin/export/payments/", {"fmt": "jsonl", "paystack_response": "1"}
+        )
+        rows = [json.loads(line) for line in self._body(resp).decode().splitlines()]
+        self.assertEqual(rows[2]["paystack_response"], {"data": {"channel": "card", "n": 2}})
+
+    def test_gzip_and_unknown_dataset(self):
+        import gzip
+
+        self.client.force_authenticate(user=self.staff)
+
+        resp = self.client.get("/api/admin/export/order_items/", {"gzip": "true"})
+        self.assertEqual(resp["Content-Type"], "application/gzip")
+        self.assertIn(".csv.gz", resp["Content-Disposition"])
+        lines = gzip.decompress(self._body(resp)).decode().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(self.client.get("/api/admin/export/users/").status_code, 404)
+
+    def test_command_writes_file(self):
+        import gzip
+        from django.core.management import call_command
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "orders.jsonl.gz")
+            call_command(
+                "export_data", "orders", "--format", "jsonl", "--gzip",
+                "--output", path, stdout=open(os.devnull, "w"),
+            )
+            with gzip.open(path, "rt") as fileobj:
+                refs = [json.loads(line)["ref"] for line in fileobj]
+
+        self.assertEqual(refs, ["ref0", "ref1", "ref2"])
+
+    def test_command_rejects_impossible_dates(self):
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+
+        with self.assertRaisesMessage(CommandError, "--from must be a date"):
+            call_command("export_data", "orders", "--from", "2024-02-30", "--output", "-")
+
+    def test_date_range_is_inclusive(self):
+        from .admin_exports import export_rows
+
+        today = timezone.localdate()
+        Order.objects.filter(ref="ref0").update(created_at=timezone.now() - timedelta(days=3))
+
+        _, rows = export_rows("orders", start=today, end=today)
+        self.assertEqual(len(list(rows)), 2)
+        _, rows = export_rows("orders", end=today - timedelta(days=3))
+        self.assertEqual(len(list(rows)), 1)
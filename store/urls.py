@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 from . import views, api_views
 
@@ -8,6 +9,7 @@ urlpatterns = [
     path("cart/", views.cart_view, name="cart_view"),
     path("checkout/", views.checkout, name="checkout"),
     path("receipt/", views.receipt, name="receipt"),
+    path("receipt/<str:ref>/pdf/", views.payment_receipt, name="payment_receipt"),
     path("search/", views.search, name="search"),
     path("add_review/<int:pk>/", views.add_review_to_post, name="add_review"),
     path("delete_review/<int:review_id>/", views.delete_review, name="delete_review"),
@@ -66,8 +68,18 @@ urlpatterns += [
     path(
         "api/verify-payment/", api_views.verify_payment_api, name="verify_payment_api"
     ),
+    path(
+        "api/payment-status/<str:ref>/",
+        (
+            api_views.payment_status_async_api
+            if settings.PAYMENT_STATUS_ASYNC
+            else api_views.payment_status_api
+        ),
+        name="payment_status_api",
+    ),
     path("api/order-history/", api_views.order_history_api, name="order_history_api"),
     path("api/receipt/", api_views.receipt_api, name="receipt_api"),
+    path("api/receipt/<str:ref>/pdf/", api_views.receipt_pdf_api, name="receipt_pdf_api"),
     path(
         "api/paystack/callback/",
         api_views.paystack_callback_api,
@@ -76,6 +88,11 @@ urlpatterns += [
     path(
         "api/paystack_webhook/", api_views.paystack_webhook_api, name="paystack_webhook"
     ),
+    path(
+        "api/admin/export/<str:dataset>/",
+        api_views.admin_export_api,
+        name="admin_export_api",
+    ),
     # Banking endpoints
     path("api/banks/", api_views.get_banks_api, name="get_banks_api"),
     path(
@@ -1,5 +1,6 @@
 import requests
-from django.conf import settings
+
+from .paystack import paystack_client
 
 
 class PaystackError(Exception):
@@ -7,12 +8,6 @@ class PaystackError(Exception):
 
 
 def create_paystack_subaccount(vendor, account_number, bank_code):
-    url = f"{settings.PAYSTACK_BASE_URL}/subaccount"
-    headers = {
-        "Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}",
-        "Content-Type": "application/json",
-    }
-
     payload = {
         "business_name": vendor.store_name,
         "settlement_bank": bank_code,
@@ -20,7 +15,7 @@ def create_paystack_subaccount(vendor, account_number, bank_code):
         "percentage_charge": 5.0,  # adjust as needed
     }
 
-    response = requests.post(url, json=payload, headers=headers)
+    response = paystack_client.post("subaccount", json=payload)
     data = response.json()
 
     if response.status_code == 201 and data.get("status"):
@@ -56,14 +51,8 @@ def validate_paystack_subaccount(subaccount_code):
     """
     Validate if a Paystack subaccount is still active and properly configured.
     """
-    url = f"{settings.PAYSTACK_BASE_URL}/subaccount/{subaccount_code}"
-    headers = {
-        "Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}",
-        "Content-Type": "application/json",
-    }
-
     try:
-        response = requests.get(url, headers=headers)
+        response = paystack_client.get(f"subaccount/{subaccount_code}")
         data = response.json()
 
         if response.status_code == 200 and data.get("status"):
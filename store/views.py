@@ -5,24 +5,32 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.admin.views.decorators import staff_member_required
 from django.views.decorators.csrf import csrf_exempt
 from django.http import JsonResponse, HttpResponse
-from .models import Product, Category, Review, OrderItem, Order, Payment
+from .models import Product, Category, Review, OrderItem, Order, Payment, WebhookEvent
 from .forms import ReviewForm
 from userprofile.models import UserProfile
-from userprofile.email_utils import send_receipt_email
 import logging
 from .cart import Cart
 from .forms import OrderForm
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
+from .services import (
+    CheckoutError,
+    build_checkout,
+    create_order_items,
+    FAILED_CHARGE_STATUSES,
+    finalize_payment,
+    mark_payment_failed,
+)
+from .paystack import paystack_client
+from .webhooks import record_webhook_event, verify_paystack_signature
+from .inventory import InsufficientStock, release_reservations, reserve_stock
+from .receipts import receipt_response
 from django.conf import settings
 from django.urls import reverse
 import requests
-import io
 import os
-from collections import defaultdict
-import json, hmac, hashlib
+import json
 from django.views.decorators.http import require_POST
 import uuid
+from django.db import transaction
 
 logger = logging.getLogger(__name__)
 
@@ -121,93 +129,33 @@ def checkout(request):
     if request.method == "POST":
         form = OrderForm(request.POST)
         if form.is_valid():
-            total_price = sum(
-                item["product"].price * int(item["quantity"]) for item in cart
-            )
-
-            order = form.save(commit=False)
-            order.created_by = user
-            order.total_cost = total_price
+            cart_lines = list(cart)
+            cart.persist()
             ref = str(uuid.uuid4()).replace("-", "")[:20]
-            order.ref = ref
-            order.save()
-
-            for item in cart:
-                OrderItem.objects.create(
-                    order=order,
-                    product=item["product"],
-                    quantity=item["quantity"],
-                    price=item["product"].price * int(item["quantity"]),
-                )
+            try:
+                plan = build_checkout(cart_lines, user, ref)
+            except CheckoutError as e:
+                return HttpResponse(e.detail, status=e.status)
 
-            estimated_fee_kobo = int(min(0.015 * total_price * 100 + 10000, 200000))
-            amount_kobo = int(total_price * 100) + estimated_fee_kobo
+            total_price = plan["total_price"]
+            amount_kobo = plan["amount_kobo"]
+            split = plan["split"]
 
-            # Build vendor splits
-            vendor_totals = defaultdict(int)
-            products_without_subaccount = []
-            
-            for item in cart:
-                product = item["product"]
-                quantity = int(item["quantity"])
-                price_kobo = int(product.price * quantity * 100)
-
-                subaccount_code = product.vendor.subaccount_code
-                if subaccount_code:
-                    vendor_totals[subaccount_code] += price_kobo
-                else:
-                    # Track products that don't have a vendor subaccount
-                    products_without_subaccount.append(product.title)
-
-            # Get admin subaccount
-            admin_subaccount = settings.ADMIN_SUBACCOUNT_CODE
-            if admin_subaccount and isinstance(admin_subaccount, str):
-                admin_subaccount = admin_subaccount.strip()
-                if not admin_subaccount.startswith("ACCT_"):
-                    logger.error(f"Invalid admin subaccount format: {admin_subaccount}. Must start with 'ACCT_'")
-                    return HttpResponse(
-                        "Payment system configuration error. Invalid admin subaccount format.",
-                        status=500,
+            try:
+                with transaction.atomic():
+                    reserve_stock(ref, cart_lines)
+                    order = form.save(commit=False)
+                    order.created_by = user
+                    order.total_cost = total_price
+                    order.ref = ref
+                    order.save()
+                    create_order_items(order, plan["order_items"])
+                    payment = Payment.objects.create(
+                        user=user, order=order, amount=total_price, ref=ref, status="pending"
                     )
-            else:
-                admin_subaccount = None
-
-            # If any products don't have a vendor subaccount, log warning
-            if products_without_subaccount:
-                logger.warning(
-                    f"Products without subaccounts won't split: {products_without_subaccount}. "
-                    f"Those payments will go to admin wallet."
-                )
-            
-            # Create split with vendors and admin as bearer if configured
-            # Calculate what admin should receive: platform fee + products without vendor subaccounts
-            admin_amount = estimated_fee_kobo + (total_price_kobo - sum(vendor_totals.values()))
-            
-            split = None
-            split_subaccounts = list(vendor_totals.items())
-            
-            if admin_subaccount:
-                # Add admin subaccount with its total (fee + unsplit products)
-                split_subaccounts.append((admin_subaccount, admin_amount))
-            
-            # Only create split if we have subaccounts to split to
-            if split_subaccounts:
-                split = {
-                    "type": "flat",
-                    "subaccounts": [
-                        {"subaccount": sub, "share": share}
-                        for sub, share in split_subaccounts
-                    ],
-                }
-                
-                # If admin subaccount is configured, set as bearer
-                if admin_subaccount:
-                    split["bearer_type"] = "subaccount"
-                    split["bearer_subaccount"] = admin_subaccount
-
-            payment = Payment.objects.create(
-                user=user, order=order, amount=total_price, ref=ref, status="pending"
-            )
+            except InsufficientStock as e:
+                messages.error(request, str(e))
+                return redirect("cart_view")
 
             # Initialize Paystack payment
             protocol = "https" if request.is_secure() else "http"
@@ -233,22 +181,18 @@ def checkout(request):
             else:
                 logger.info(f"Payment {payment.ref}: No split configured. All funds go to main wallet.")
 
-            headers = {
-                "Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}",
-                "Content-Type": "application/json",
-            }
-
-            response = requests.post(
-                f"{settings.PAYSTACK_BASE_URL}/transaction/initialize",
-                json=payload,
-                headers=headers,
-            )
+            try:
+                response = paystack_client.post("transaction/initialize", json=payload)
+            except requests.RequestException as e:
+                release_reservations(ref)
+                return HttpResponse(f"Payment gateway unavailable: {e}", status=502)
 
             try:
                 res_data = response.json()
-                payment.paystack_init_response = res_data
-                payment.save()
+                payment.paystack_response = res_data
+                payment.save(update_fields=["paystack_response"])
             except ValueError:
+                release_reservations(ref)
                 return HttpResponse(
                     f"Paystack returned an invalid response: {response.text}",
                     status=502,
@@ -257,6 +201,7 @@ def checkout(request):
             if response.status_code == 200 and res_data.get("status"):
                 return redirect(res_data["data"]["authorization_url"])
             else:
+                release_reservations(ref)
                 return HttpResponse(
                     f"Paystack error: {res_data.get('message', 'Unknown error')}",
                     status=400,
@@ -274,11 +219,8 @@ def paystack_callback(request):
     if not ref:
         return HttpResponse("No transaction reference provided", status=400)
 
-    url = f"{settings.PAYSTACK_BASE_URL}/transaction/verify/{ref}"
-    headers = {"Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}"}
-
     try:
-        response = requests.get(url, headers=headers)
+        response = paystack_client.get(f"transaction/verify/{ref}")
         data = response.json()
     except Exception as e:
         return HttpResponse(f"Verification error: {str(e)}", status=503)
@@ -303,40 +245,23 @@ def paystack_callback(request):
         return redirect("receipt")
 
     if payment_data["status"] == "success":
-        payment.status = "paid"
-        payment.save()
-
-        order = payment.order
-        order.is_paid = True
-        order.status = "completed"
-
-        # Reduce stock for all ordered items
-        for item in order.items.all():
-            item.product.reduce_stock(item.quantity)
-
-        order.save()
-
-        # Send receipt email
-        try:
-            send_receipt_email(order)
-            messages.success(
-                request, "Payment successful! Receipt email sent to your inbox."
-            )
-        except Exception as e:
-            logger.error(
-                f"Failed to send receipt email for order {order.ref}: {str(e)}"
-            )
-            messages.success(request, "Payment successful!")
+        finalize_payment(ref, paystack_data=payment_data)
+        messages.success(
+            request, "Payment successful! Receipt email sent to your inbox."
+        )
 
         if "cart" in request.session:
             cart = Cart(request)
             cart.clear()
 
         return redirect("receipt")
-    else:
-        payment.status = "failed"
-        payment.save()
+    elif payment_data["status"] in FAILED_CHARGE_STATUSES:
+        mark_payment_failed(ref, paystack_data=payment_data)
         return HttpResponse("Payment failed or was not successful", status=400)
+    else:
+        return HttpResponse(
+            "Payment is still being processed. Please check again shortly.", status=202
+        )
 
 
 def handle_subscription_plan_change_callback(ref, payment_data, metadata):
@@ -432,79 +357,27 @@ def paystack_webhook(request):
         logger.warning("Paystack webhook called without signature")
         return HttpResponse(status=400)
 
-    payload = request.body
-    secret_key = settings.PAYSTACK_SECRET_KEY.encode("utf-8")
-    computed_hash = hmac.new(secret_key, payload, hashlib.sha512).hexdigest()
-    if not hmac.compare_digest(computed_hash, signature):
+    if not verify_paystack_signature(request.body, signature):
         logger.warning("Invalid Paystack signature")
         return HttpResponse(status=401)
 
     try:
-        data = json.loads(payload.decode("utf-8"))
+        record_webhook_event(WebhookEvent.SOURCE_STORE, request.body)
     except ValueError as e:
         logger.error(f"Invalid JSON in Paystack webhook: {e}")
         return HttpResponse(status=400)
 
-    event = data.get("event")
-    if event == "charge.success":
-        reference = data.get("data", {}).get("reference")
-        if reference:
-            try:
-                payment = Payment.objects.get(ref=reference)
-            except Payment.DoesNotExist:
-                logger.error(f"No Payment found for ref {reference}")
-            else:
-                if payment.status != "paid":
-                    payment.status = "paid"
-                    payment.save()
-                    order = payment.order
-                    if order:
-                        order.is_paid = True
-                        order.status = "completed"
-                        order.save()
-                    logger.info(f"Payment {reference} marked as paid")
-                else:
-                    logger.info(f"Payment {reference} was already marked paid")
-
     return HttpResponse(status=200)
 
 
+@login_required
 def payment_receipt(request, ref):
-    order = get_object_or_404(Order, ref=ref)
+    order = get_object_or_404(Order, ref=ref, created_by=request.user)
 
-    if not order.verified:
+    if not order.is_paid:
         return render(request, "error.html", {"error_message": "Payment not verified."})
 
-    buffer = io.BytesIO()
-    p = canvas.Canvas(buffer, pagesize=A4)
-
-    # Insert logo
-    # logo_path = os.path.join(settings.BASE_DIR, 'static', 'logo.png')
-    # if os.path.exists(logo_path):
-    #    p.drawImage(ImageReader(logo_path), 230, 750, width=120, height=60, preserveAspectRatio=True)
-
-    # Draw header text
-    p.setFont("Helvetica-Bold", 14)
-    p.drawCentredString(300, 730, "EDO UNIVERSITY IYAMHO MEDICAL STUDENTS ASSOCIATION")
-
-    # Payment info
-    p.setFont("Helvetica", 12)
-    p.drawString(100, 680, f"Name: {order.user.get_full_name()}")
-    p.drawString(100, 660, f"Email: {order.email}")
-    p.drawString(100, 640, f"Matriculation Number: {order.user.mat_no}")
-    p.drawString(100, 620, f"Amount: NGN {order.amount}")
-    p.drawString(100, 600, f"Reference: {order.ref}")
-    p.drawString(100, 580, f"Status: SUCCESSFUL")
-    p.drawString(100, 560, f"Date: {order.date_created.strftime('%d %B %Y, %I:%M %p')}")
-    # p.drawString(100, 540, f"Description: {payment.payment_for.description if payment.payment_for else 'N/A'}")
-
-    p.showPage()
-    p.save()
-
-    buffer.seek(0)
-    response = HttpResponse(buffer.getvalue(), content_type="application/pdf")
-    response["Content-Disposition"] = 'attachment; filename="payment_receipt.pdf"'
-    return response
+    return receipt_response(request, order)
 
 
 @login_required
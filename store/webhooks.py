@@ -0,0 +1,197 @@
+"""
+Paystack webhook inbox.
+
+The HTTP endpoints call ``verify_paystack_signature`` and ``record_webhook_event``
+and return 200 immediately. ``process_webhook_events`` (run by the
+``process_webhooks`` management command) later drains the inbox in batches:
+
+* each event is claimed with a conditional UPDATE, so several workers can run
+  side by side without processing an event twice;
+* handler failures are retried with jittered exponential backoff;
+* after ``WEBHOOK_MAX_ATTEMPTS`` failures the event is moved to the dead
+  letter state, where it stays until it is replayed.
+"""
+import hashlib
+import hmac
+import json
+import logging
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Payment, WebhookEvent
+from .services import finalize_payment
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_HANDLERS = {
+    WebhookEvent.SOURCE_STORE: "store.webhooks.handle_store_event",
+    WebhookEvent.SOURCE_SUBSCRIPTION: "userprofile.webhook_api.handle_subscription_event",
+}
+
+# Events left in "processing" longer than this belong to a crashed worker.
+STALE_LOCK_AFTER = timedelta(minutes=10)
+
+
+class WebhookHandlerError(Exception):
+    """Raised by a handler to request a retry."""
+
+
+def verify_paystack_signature(body, signature):
+    if not signature:
+        return False
+    computed_hash = hmac.new(
+        settings.PAYSTACK_SECRET_KEY.encode("utf-8"), body, hashlib.sha512
+    ).hexdigest()
+    return hmac.compare_digest(computed_hash, signature)
+
+
+def _event_key(source, payload, body):
+    event = payload.get("event", "unknown")
+    data = payload.get("data") or {}
+    identifier = (
+        data.get("id")
+        or data.get("reference")
+        or data.get("subscription_code")
+        or hashlib.sha256(body).hexdigest()
+    )
+    return f"{source}:{event}:{identifier}"
+
+
+def record_webhook_event(source, body):
+    """
+    Store a verified webhook body in the inbox.
+
+    Returns ``(event, created)``; ``created`` is False for a redelivery.
+    Raises ``ValueError`` if the body is not a JSON object.
+    """
+    payload = json.loads(body.decode("utf-8"))
+    if not isinstance(payload, dict):
+        raise ValueError("Webhook body must be a JSON object")
+
+    event_key = _event_key(source, payload, body)
+    try:
+        with transaction.atomic():
+            event = WebhookEvent.objects.create(
+                event_key=event_key,
+                source=source,
+                event_type=payload.get("event", ""),
+                payload=payload,
+            )
+    except IntegrityError:
+        logger.info(f"Duplicate webhook {event_key} ignored")
+        return WebhookEvent.objects.get(event_key=event_key), False
+    return event, True
+
+
+def _retry_delay(attempts):
+    base = getattr(settings, "WEBHOOK_RETRY_BASE_SECONDS", 30)
+    ceiling = min(3600, base * (2 ** (attempts - 1)))
+    return timedelta(seconds=random.uniform(ceiling / 2, ceiling))
+
+
+def _release_stale_locks(now):
+    return WebhookEvent.objects.filter(
+        status=WebhookEvent.PROCESSING, locked_at__lt=now - STALE_LOCK_AFTER
+    ).update(status=WebhookEvent.PENDING, locked_at=None)
+
+
+def _process_one(event, max_attempts):
+    handler = import_string(WEBHOOK_HANDLERS[event.source])
+    try:
+        with transaction.atomic():
+            handler(event.payload)
+    except Exception as e:
+        now = timezone.now()
+        if event.attempts >= max_attempts:
+            status_, next_attempt_at = WebhookEvent.DEAD, now
+            logger.error(
+                f"Webhook {event.event_key} dead-lettered after {event.attempts} attempt(s): {e}"
+            )
+        else:
+            status_, next_attempt_at = WebhookEvent.PENDING, now + _retry_delay(event.attempts)
+            logger.warning(
+                f"Webhook {event.event_key} attempt {event.attempts} failed: {e}"
+            )
+        WebhookEvent.objects.filter(pk=event.pk).update(
+            status=status_,
+            next_attempt_at=next_attempt_at,
+            locked_at=None,
+            last_error=f"{type(e).__name__}: {e}"[:2000],
+        )
+        return status_
+
+    WebhookEvent.objects.filter(pk=event.pk).update(
+        status=WebhookEvent.PROCESSED,
+        processed_at=timezone.now(),
+        locked_at=None,
+        last_error="",
+    )
+    return WebhookEvent.PROCESSED
+
+
+def process_webhook_events(batch_size=50, max_attempts=None):
+    """
+    Process one batch of due inbox events.
+
+    Returns a dict of counts keyed by the resulting status.
+    """
+    max_attempts = max_attempts or getattr(settings, "WEBHOOK_MAX_ATTEMPTS", 8)
+    now = timezone.now()
+    _release_stale_locks(now)
+
+    due = list(
+        WebhookEvent.objects.filter(
+            status=WebhookEvent.PENDING, next_attempt_at__lte=now
+        )
+        .order_by("received_at")
+        .values_list("pk", flat=True)[:batch_size]
+    )
+
+    counts = {WebhookEvent.PROCESSED: 0, WebhookEvent.PENDING: 0, WebhookEvent.DEAD: 0}
+    for pk in due:
+        claimed = WebhookEvent.objects.filter(pk=pk, status=WebhookEvent.PENDING).update(
+            status=WebhookEvent.PROCESSING,
+            locked_at=timezone.now(),
+            attempts=F("attempts") + 1,
+        )
+        if not claimed:
+            continue  # another worker got it first
+        event = WebhookEvent.objects.get(pk=pk)
+        counts[_process_one(event, max_attempts)] += 1
+    return counts
+
+
+def replay_webhook_events(queryset):
+    """Queue events (typically dead letters) for another round of attempts."""
+    return queryset.exclude(status=WebhookEvent.PROCESSING).update(
+        status=WebhookEvent.PENDING,
+        attempts=0,
+        next_attempt_at=timezone.now(),
+        locked_at=None,
+    )
+
+
+# ── Handlers ─────────────────────────────────────────────────────────────────
+
+
+def handle_store_event(payload):
+    """Apply a store payment webhook (currently only ``charge.success``)."""
+    if payload.get("event") != "charge.success":
+        return
+
+    data = payload.get("data") or {}
+    reference = data.get("reference")
+    if not reference:
+        return
+
+    if not Payment.objects.filter(ref=reference).exists():
+        logger.error(f"No Payment found for ref {reference}")
+        return
+
+    finalize_payment(reference, paystack_data=data)
@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import UserProfile, VendorProfile, VendorPlan
+from .models import UserProfile, VendorProfile, VendorPlan, EmailOutbox, VendorStats
+from .email_outbox import replay_emails
+from .vendor_stats import rebuild_vendor_stats
 
 
 @admin.register(UserProfile)
@@ -141,3 +143,40 @@ class VendorPlanAdmin(admin.ModelAdmin):
         self.message_user(request, f"{queryset.count()} plans deactivated.")
 
     make_inactive.short_description = "Deactivate selected plans"
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ["to_email", "subject", "template_name", "status", "attempts", "created_at"]
+    list_filter = ["status", "template_name"]
+    search_fields = ["to_email", "subject"]
+    readonly_fields = ["created_at", "sent_at", "locked_at"]
+    actions = ["replay"]
+
+    def replay(self, request, queryset):
+        count = replay_emails(queryset)
+        self.message_user(request, f"Re-queued {count} email(s).")
+
+    replay.short_description = "Resend selected emails"
+
+
+@admin.register(VendorStats)
+class VendorStatsAdmin(admin.ModelAdmin):
+    list_display = [
+        "vendor",
+        "order_count",
+        "revenue",
+        "review_count",
+        "product_count",
+        "updated_at",
+        "rebuilt_at",
+    ]
+    search_fields = ["vendor__store_name"]
+    readonly_fields = [field.name for field in VendorStats._meta.fields]
+    actions = ["rebuild"]
+
+    def rebuild(self, request, queryset):
+        count = rebuild_vendor_stats(queryset.values_list("vendor_id", flat=True))
+        self.message_user(request, f"Rebuilt stats for {count} vendor(s).")
+
+    rebuild.short_description = "Recompute selected vendor stats"
@@ -30,6 +30,7 @@ from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework_simplejwt.settings import api_settings as jwt_api_settings
 from rest_framework_simplejwt.tokens import RefreshToken
 from .throttles import SignupRateThrottle, LoginRateThrottle, PasswordResetRateThrottle
+from store.cart import merge_session_cart
 
 # ── Module-level constants ──────────────────────────────────────────────────
 OTP_LENGTH = 6
@@ -41,6 +42,14 @@ logger = logging.getLogger(__name__)
 INVALID_REFRESH_TOKEN_DETAIL = {"detail": "Refresh token expired or invalid."}
 
 
+def _merge_guest_cart(request, user):
+    """Carry an anonymous session cart over to the user's database cart."""
+    try:
+        merge_session_cart(request, user)
+    except Exception as e:
+        logger.warning(f"Failed to merge guest cart for {user.email}: {e}")
+
+
 def _blacklist_all_refresh_tokens_for_user(user_id):
     from rest_framework_simplejwt.token_blacklist.models import (
         BlacklistedToken,
@@ -271,6 +280,8 @@ def verify_signup_api(request):
     except Exception as e:
         logger.warning(f"Auto-login after email verification failed for {email}: {e}")
 
+    _merge_guest_cart(request, user)
+
     try:
         send_welcome_email(user)
     except Exception as e:
@@ -874,6 +885,8 @@ def login_api(request):
     user = authenticate(request, username=email, password=password)
 
     if user is not None:
+        _merge_guest_cart(request, user)
+
         # Generate JWT tokens
         refresh = RefreshToken.for_user(user)
         access_token = refresh.access_token
@@ -0,0 +1,281 @@
+"""
+Transactional email outbox.
+
+``queue_email`` renders a template and stores the result as an
+``EmailOutbox`` row, so request handlers never wait on the email provider.
+``send_pending_emails`` (run by the ``send_emails`` management command)
+delivers due rows concurrently through a thread pool:
+
+* each row is claimed with a conditional UPDATE, so several workers can run
+  side by side without sending a message twice;
+* delivery happens in the pool (or the transport's own ``send_many``), while
+  all database writes stay on the calling thread;
+* a failed recipient is retried with jittered exponential backoff and
+  dead-lettered after ``EMAIL_OUTBOX_MAX_ATTEMPTS`` attempts.
+
+Attachments are stored as loader specs, not bytes (see
+``EmailOutbox.attachments``). They are loaded on the calling thread just
+before delivery, so generated files such as receipt PDFs are produced by the
+worker rather than the request that queued the email. An attachment that
+fails to load is logged and the email goes out without it.
+
+The transport is chosen by ``EMAIL_OUTBOX_TRANSPORT``. ``FileTransport``
+writes each message to ``EMAIL_OUTBOX_FILE_PATH`` instead of sending it and
+is meant for tests and local development.
+"""
+import base64
+import json
+import logging
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .email_templates import render_email
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+# Rows left in "sending" longer than this belong to a crashed worker.
+STALE_LOCK_AFTER = timedelta(minutes=10)
+
+
+class EmailDeliveryError(Exception):
+    """Raised by a transport when a message was not accepted."""
+
+
+class ZeptoMailTransport:
+    """Deliver through the ZeptoMail HTTP API, batching where possible."""
+
+    def send(self, message):
+        error = self.send_many([message])[0]
+        if error is not None:
+            raise error
+
+    def send_many(self, messages, max_workers=None):
+        from .zeptomail_client import zeptomail_client
+
+        return zeptomail_client.send_many(
+            [
+                {
+                    "to_email": message.to_email,
+                    "subject": message.subject,
+                    "text_content": message.text_body,
+                    "html_content": message.html_body or None,
+                    "from_email": message.from_email or None,
+                    "from_name": message.from_name or None,
+                    "attachments": [
+                        {
+                            "name": filename,
+                            "mime_type": mime_type,
+                            "content": base64.b64encode(content).decode("ascii"),
+                        }
+                        for filename, mime_type, content in getattr(message, "files", ())
+                    ],
+                }
+                for message in messages
+            ],
+            max_workers=max_workers,
+        )
+
+
+class FileTransport:
+    """Write each message to ``EMAIL_OUTBOX_FILE_PATH`` as JSON."""
+
+    def __init__(self, path=None):
+        self.path = path or settings.EMAIL_OUTBOX_FILE_PATH
+
+    def send(self, message):
+        os.makedirs(self.path, exist_ok=True)
+        for name, _, content in getattr(message, "files", ()):
+            with open(os.path.join(self.path, f"{message.pk}-{name}"), "wb") as fh:
+                fh.write(content)
+        filename = os.path.join(self.path, f"{message.pk}.json")
+        with open(filename, "w", encoding="utf-8") as fh:
+            json.dump(
+                {
+                    "to": message.to_email,
+                    "from_email": message.from_email,
+                    "from_name": message.from_name,
+                    "subject": message.subject,
+                    "template": message.template_name,
+                    "text": message.text_body,
+                    "html": message.html_body,
+                    "attachments": [name for name, _, _ in getattr(message, "files", ())],
+                },
+                fh,
+                ensure_ascii=False,
+                indent=2,
+            )
+
+
+def get_transport():
+    return import_string(settings.EMAIL_OUTBOX_TRANSPORT)()
+
+
+def queue_email(
+    to_email,
+    subject,
+    template_name,
+    context,
+    from_email=None,
+    from_name=None,
+    attachments=None,
+):
+    """
+    Render ``emails/<template_name>.{html,txt}`` and queue it for delivery.
+
+    ``attachments`` is a list of loader specs, resolved at delivery time.
+    Called inside a transaction, the message is only delivered if that
+    transaction commits. Returns the ``EmailOutbox`` row.
+    """
+    html_body, text_body = render_email(template_name, context)
+
+    # Savepoint, so a failed insert never breaks the caller's transaction.
+    with transaction.atomic():
+        message = EmailOutbox.objects.create(
+            to_email=to_email,
+            from_email=from_email or "",
+            from_name=from_name or "",
+            subject=subject,
+            template_name=template_name,
+            text_body=text_body,
+            html_body=html_body,
+            attachments=attachments or [],
+        )
+    logger.info(f"Queued '{template_name}' email {message.pk} to {to_email}")
+    return message
+
+
+def _retry_delay(attempts):
+    base = getattr(settings, "EMAIL_OUTBOX_RETRY_BASE_SECONDS", 60)
+    ceiling = min(3600, base * (2 ** (attempts - 1)))
+    return timedelta(seconds=random.uniform(ceiling / 2, ceiling))
+
+
+def _release_stale_locks(now):
+    return EmailOutbox.objects.filter(
+        status=EmailOutbox.SENDING, locked_at__lt=now - STALE_LOCK_AFTER
+    ).update(status=EmailOutbox.PENDING, locked_at=None)
+
+
+def _claim(pks):
+    claimed = []
+    for pk in pks:
+        if EmailOutbox.objects.filter(pk=pk, status=EmailOutbox.PENDING).update(
+            status=EmailOutbox.SENDING,
+            locked_at=timezone.now(),
+            attempts=F("attempts") + 1,
+        ):
+            claimed.append(pk)
+    return list(EmailOutbox.objects.filter(pk__in=claimed))
+
+
+def _load_attachments(message):
+    """
+    Resolve ``message.attachments`` into ``message.files``.
+
+    An attachment that cannot be produced is logged and left out rather than
+    holding the email back: a receipt without its PDF beats no receipt.
+    """
+    message.files = []
+    for spec in message.attachments:
+        try:
+            message.files.append(import_string(spec["loader"])(spec["key"]))
+        except Exception:
+            logger.exception(
+                f"Email {message.pk} to {message.to_email}: could not load attachment "
+                f"{spec.get('loader')}({spec.get('key')!r}); sending without it"
+            )
+
+
+def _deliver(transport, message):
+    try:
+        transport.send(message)
+    except Exception as e:
+        return e
+    return None
+
+
+def _deliver_all(transport, messages, max_workers):
+    """Send ``messages``; returns ``None`` or the exception for each one."""
+    if hasattr(transport, "send_many"):
+        return transport.send_many(messages, max_workers=max_workers)
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(messages))) as pool:
+        return list(pool.map(lambda message: _deliver(transport, message), messages))
+
+
+def _record(message, error, max_attempts):
+    now = timezone.now()
+    if error is None:
+        EmailOutbox.objects.filter(pk=message.pk).update(
+            status=EmailOutbox.SENT, sent_at=now, locked_at=None, last_error=""
+        )
+        return EmailOutbox.SENT
+
+    if message.attempts >= max_attempts:
+        status_, next_attempt_at = EmailOutbox.DEAD, now
+        logger.error(
+            f"Email {message.pk} to {message.to_email} dead-lettered after "
+            f"{message.attempts} attempt(s): {error}"
+        )
+    else:
+        status_, next_attempt_at = EmailOutbox.PENDING, now + _retry_delay(message.attempts)
+        logger.warning(
+            f"Email {message.pk} to {message.to_email} attempt {message.attempts} failed: {error}"
+        )
+    EmailOutbox.objects.filter(pk=message.pk).update(
+        status=status_,
+        next_attempt_at=next_attempt_at,
+        locked_at=None,
+        last_error=f"{type(error).__name__}: {error}"[:2000],
+    )
+    return status_
+
+
+def send_pending_emails(batch_size=100, max_workers=None, max_attempts=None, transport=None):
+    """
+    Deliver one batch of due messages.
+
+    Returns a dict of counts keyed by the resulting status.
+    """
+    max_workers = max_workers or getattr(settings, "EMAIL_OUTBOX_WORKERS", 8)
+    max_attempts = max_attempts or getattr(settings, "EMAIL_OUTBOX_MAX_ATTEMPTS", 6)
+    transport = transport or get_transport()
+    now = timezone.now()
+    _release_stale_locks(now)
+
+    due = list(
+        EmailOutbox.objects.filter(status=EmailOutbox.PENDING, next_attempt_at__lte=now)
+        .order_by("created_at")
+        .values_list("pk", flat=True)[:batch_size]
+    )
+    messages = _claim(due)
+
+    counts = {EmailOutbox.SENT: 0, EmailOutbox.PENDING: 0, EmailOutbox.DEAD: 0}
+    if not messages:
+        return counts
+
+    for message in messages:
+        _load_attachments(message)
+
+    errors = _deliver_all(transport, messages, max_workers)
+    for message, error in zip(messages, errors):
+        counts[_record(message, error, max_attempts)] += 1
+    return counts
+
+
+def replay_emails(queryset):
+    """Queue messages (typically dead letters) for another round of attempts."""
+    return queryset.exclude(status__in=[EmailOutbox.SENDING, EmailOutbox.SENT]).update(
+        status=EmailOutbox.PENDING,
+        attempts=0,
+        next_attempt_at=timezone.now(),
+        locked_at=None,
+    )
@@ -0,0 +1,41 @@
+"""
+Precompiled email templates.
+
+``render_email`` looks each ``emails/<name>.html`` / ``emails/<name>.txt``
+pair up once per process and keeps the compiled ``Template`` objects, so a
+bulk send only pays for rendering. The plain-text part comes from its own
+``.txt`` template; if one is missing, it is generated from the HTML with
+``strip_tags``.
+"""
+import functools
+
+from django.template import TemplateDoesNotExist
+from django.template.loader import get_template
+from django.utils.html import strip_tags
+
+
+@functools.lru_cache(maxsize=None)
+def get_email_templates(template_name):
+    """Return the compiled ``(html, text)`` templates; ``text`` may be None."""
+    html = get_template(f"emails/{template_name}.html")
+    try:
+        text = get_template(f"emails/{template_name}.txt")
+    except TemplateDoesNotExist:
+        text = None
+    return html, text
+
+
+def render_email(template_name, context):
+    """Render ``template_name`` and return ``(html_body, text_body)``."""
+    html_template, text_template = get_email_templates(template_name)
+    html_body = html_template.render(context)
+    if text_template is not None:
+        text_body = text_template.render(context)
+    else:
+        text_body = strip_tags(html_body)
+    return html_body, text_body
+
+
+def clear_email_template_cache():
+    """Forget compiled templates, e.g. after editing them in development."""
+    get_email_templates.cache_clear()
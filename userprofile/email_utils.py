@@ -1,6 +1,7 @@
 """
 Email utilities for VendorXprt application
-Updated to use ZeptoMail HTTP API instead of SMTP
+Messages are rendered here and queued in the email outbox; the
+``send_emails`` command delivers them through ZeptoMail.
 """
 
 from django.conf import settings
@@ -9,7 +10,7 @@ import logging
 import random
 from django.utils import timezone
 from datetime import timedelta
-from .zeptomail_client import send_zeptomail
+from .email_outbox import queue_email
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +23,7 @@ def send_welcome_email(user):
         user: UserProfile instance of the newly registered user
 
     Returns:
-        bool: True if email sent successfully, False otherwise
+        bool: True if email queued successfully, False otherwise
     """
     try:
         subject = "🎉 Welcome to VendorXprt - Your Journey Starts Here!"
@@ -37,8 +38,8 @@ def send_welcome_email(user):
             "support_email": settings.DEFAULT_FROM_EMAIL,
         }
 
-        # Send email via ZeptoMail
-        result = send_zeptomail(
+        # Queue for background delivery
+        result = queue_email(
             to_email=user.email,
             subject=subject,
             template_name="welcome_user",
@@ -46,10 +47,10 @@ def send_welcome_email(user):
         )
 
         if result:
-            logger.info(f"Welcome email sent successfully to {user.email}")
+            logger.info(f"Welcome email queued for {user.email}")
             return True
         else:
-            logger.error(f"Failed to send welcome email to {user.email}")
+            logger.error(f"Failed to queue welcome email to {user.email}")
             return False
 
     except Exception as e:
@@ -60,7 +61,7 @@ def send_welcome_email(user):
 def send_verification_email(email, code, expires_at=None):
     """Send a 6-digit verification code to `email`.
 
-    Returns True on success, False otherwise.
+    Returns True once queued, False otherwise.
     """
     try:
         subject = "Your VendorXprt verification code"
@@ -74,8 +75,8 @@ def send_verification_email(email, code, expires_at=None):
             "support_email": settings.DEFAULT_FROM_EMAIL,
         }
 
-        # Send email via ZeptoMail
-        result = send_zeptomail(
+        # Queue for background delivery
+        result = queue_email(
             to_email=email,
             subject=subject,
             template_name="verification",
@@ -83,10 +84,10 @@ def send_verification_email(email, code, expires_at=None):
         )
 
         if result:
-            logger.info(f"Verification email sent to {email}")
+            logger.info(f"Verification email queued for {email}")
             return True
         else:
-            logger.error(f"Failed to send verification email to {email}")
+            logger.error(f"Failed to queue verification email to {email}")
             return False
     except Exception as e:
         logger.error(f"Error sending verification email to {email}: {str(e)}")
@@ -96,7 +97,7 @@ def send_verification_email(email, code, expires_at=None):
 def send_password_reset_email(email, code, expires_at=None):
     """Send a 6-digit password reset code to `email`.
 
-    Returns True on success, False otherwise.
+    Returns True once queued, False otherwise.
     """
     try:
         subject = "Reset your VendorXprt password"
@@ -110,8 +111,8 @@ def send_password_reset_email(email, code, expires_at=None):
             "support_email": settings.DEFAULT_FROM_EMAIL,
         }
 
-        # Send email via ZeptoMail
-        result = send_zeptomail(
+        # Queue for background delivery
+        result = queue_email(
             to_email=email,
             subject=subject,
             template_name="password_reset",
@@ -119,10 +120,10 @@ def send_password_reset_email(email, code, expires_at=None):
         )
 
         if result:
-            logger.info(f"Password reset email sent to {email}")
+            logger.info(f"Password reset email queued for {email}")
             return True
         else:
-            logger.error(f"Failed to send password reset email to {email}")
+            logger.error(f"Failed to queue password reset email to {email}")
             return False
     except Exception as e:
         logger.error(f"Error sending password reset email to {email}: {str(e)}")
@@ -137,7 +138,7 @@ def send_vendor_welcome_email(vendor_profile_or_user):
         vendor_profile_or_user: VendorProfile instance or UserProfile instance of the vendor
 
     Returns:
-        bool: True if email sent successfully, False otherwise
+        bool: True if email queued successfully, False otherwise
     """
     try:
         # Handle both VendorProfile and UserProfile objects
@@ -161,8 +162,8 @@ def send_vendor_welcome_email(vendor_profile_or_user):
             "support_email": settings.DEFAULT_FROM_EMAIL,
         }
 
-        # Send email via ZeptoMail
-        result = send_zeptomail(
+        # Queue for background delivery
+        result = queue_email(
             to_email=user.email,
             subject=subject,
             template_name="welcome_vendor",
@@ -170,10 +171,10 @@ def send_vendor_welcome_email(vendor_profile_or_user):
         )
 
         if result:
-            logger.info(f"Vendor welcome email sent successfully to {user.email}")
+            logger.info(f"Vendor welcome email queued for {user.email}")
             return True
         else:
-            logger.error(f"Failed to send vendor welcome email to {user.email}")
+            logger.error(f"Failed to queue vendor welcome email to {user.email}")
             return False
 
     except Exception as e:
@@ -181,15 +182,103 @@ def send_vendor_welcome_email(vendor_profile_or_user):
         return False
 
 
-def send_receipt_email(order):
+def _product_image(product):
+    # An image URL is nice to have; never let it stop the email.
+    try:
+        return product.get_thumbnail()
+    except Exception as e:
+        logger.warning(f"No image URL for product {product.pk}: {str(e)}")
+        return None
+
+
+def build_order_email_context(order):
+    """
+    Build the template context shared by every email about ``order``.
+
+    Loads all order lines (with product, vendor and vendor user) in one
+    query and groups them per vendor, so the receipt and every vendor
+    notification for the same order render from a single pass.
+
+    Args:
+        order: Order instance of the completed purchase
+
+    Returns:
+        dict: Shared context; ``vendor_groups`` holds the per-vendor lines
+    """
+    from store.models import OrderItem
+
+    order_items = OrderItem.objects.filter(order=order).select_related(
+        "product", "product__vendor", "product__vendor__user"
+    )
+
+    items_data = []
+    vendor_groups = {}
+
+    for item in order_items:
+        vendor = item.product.vendor
+        # OrderItem.price is the line total in naira (see build_checkout).
+        total_price = item.price
+        unit_price = item.price / item.quantity if item.quantity else item.price
+        items_data.append(
+            {
+                "product_name": item.product.title,
+                "vendor_name": vendor.store_name,
+                "quantity": item.quantity,
+                "unit_price": unit_price,
+                "total_price": total_price,
+                "product_image": _product_image(item.product),
+            }
+        )
+
+        group = vendor_groups.setdefault(
+            vendor.pk, {"vendor": vendor, "items": [], "total": 0}
+        )
+        group["items"].append(
+            {
+                "product_name": item.product.title,
+                "quantity": item.quantity,
+                "unit_price": unit_price,
+                "total_price": total_price,
+            }
+        )
+        group["total"] += total_price
+
+    return {
+        "order_ref": order.ref,
+        "order_date": order.created_at.strftime("%B %d, %Y at %I:%M %p"),
+        "pickup_location": dict(order.PICKUP_CHOICES).get(
+            order.pickup_location, order.pickup_location
+        ),
+        "total_amount": order.total_cost or 0,  # naira, like OrderItem.price
+        "items": items_data,
+        "vendors_list": [group["vendor"].store_name for group in vendor_groups.values()],
+        "vendor_groups": list(vendor_groups.values()),
+        "customer_phone": order.phone,
+        "customer_name": f"{order.first_name} {order.last_name}",
+        "site_name": "VendorXprt",
+        "support_email": settings.DEFAULT_FROM_EMAIL,
+    }
+
+
+def receipt_attachments(order):
+    """The receipt PDF spec, rendered by the email worker (see store.receipts)."""
+    if not getattr(settings, "RECEIPT_EMAIL_ATTACH_PDF", True):
+        return []
+    from store.receipts import receipt_attachment_spec
+
+    return [receipt_attachment_spec(order.ref)]
+
+
+def send_receipt_email(order, order_context=None):
     """
     Send a receipt email to customers after successful payment
 
     Args:
         order: Order instance of the completed purchase
+        order_context (dict, optional): Result of ``build_order_email_context``
 
     Returns:
-        bool: True if email sent successfully, False otherwise
+        bool: True if email queued successfully, False otherwise
     """
     try:
         user = order.created_by
@@ -198,71 +287,34 @@ def send_receipt_email(order):
             return False
 
         subject = f"🧾 Your VendorXprt Receipt - Order #{order.ref}"
-
-        # Calculate order totals and get items
-        from store.models import OrderItem
-
-        order_items = OrderItem.objects.filter(order=order).select_related(
-            "product", "product__vendor"
-        )
-
-        total_amount = order.total_cost or 0
-        items_data = []
-        vendors_involved = set()
-
-        for item in order_items:
-            vendors_involved.add(item.product.vendor.store_name)
-            items_data.append(
-                {
-                    "product_name": item.product.title,
-                    "vendor_name": item.product.vendor.store_name,
-                    "quantity": item.quantity,
-                    "unit_price": item.price / 100,  # Convert from kobo to naira
-                    "total_price": (item.price * item.quantity) / 100,
-                    "product_image": (
-                        item.product.get_thumbnail()
-                        if hasattr(item.product, "get_thumbnail")
-                        else None
-                    ),
-                }
-            )
+        order_context = order_context or build_order_email_context(order)
 
         # Create context for email template
         context = {
+            **order_context,
             "user_name": user.first_name or user.user_name,
             "full_name": f"{user.first_name} {user.last_name}".strip()
             or user.user_name,
             "email": user.email,
-            "order_ref": order.ref,
-            "order_date": order.created_at.strftime("%B %d, %Y at %I:%M %p"),
-            "pickup_location": dict(order.PICKUP_CHOICES).get(
-                order.pickup_location, order.pickup_location
-            ),
-            "total_amount": total_amount / 100,  # Convert from kobo to naira
-            "items": items_data,
-            "vendors_list": list(vendors_involved),
-            "customer_phone": order.phone,
-            "customer_name": f"{order.first_name} {order.last_name}",
-            "site_name": "VendorXprt",
-            "support_email": settings.DEFAULT_FROM_EMAIL,
         }
 
-        # Send email via ZeptoMail
-        result = send_zeptomail(
+        # Queue for background delivery
+        result = queue_email(
             to_email=user.email,
             subject=subject,
             template_name="receipt",
             context=context,
+            attachments=receipt_attachments(order),
         )
 
         if result:
             logger.info(
-                f"Receipt email sent successfully to {user.email} for order {order.ref}"
+                f"Receipt email queued for {user.email} for order {order.ref}"
             )
             return True
         else:
             logger.error(
-                f"Failed to send receipt email to {user.email} for order {order.ref}"
+                f"Failed to queue receipt email to {user.email} for order {order.ref}"
             )
             return False
 
@@ -271,77 +323,42 @@ def send_receipt_email(order):
         return False
 
 
-def send_vendor_order_notification(order):
+def send_vendor_order_notification(order, order_context=None):
     """
     Send order notification emails to vendors when their products are ordered
 
     Args:
         order: Order instance of the completed purchase
+        order_context (dict, optional): Result of ``build_order_email_context``
 
     Returns:
-        bool: True if all vendor emails sent successfully, False otherwise
+        bool: True if all vendor emails queued successfully, False otherwise
     """
     try:
-        from store.models import OrderItem
-        from collections import defaultdict
-
-        # Group order items by vendor
-        vendor_orders = defaultdict(list)
-        order_items = OrderItem.objects.filter(order=order).select_related(
-            "product", "product__vendor", "product__vendor__user"
-        )
-
-        for item in order_items:
-            vendor = item.product.vendor
-            vendor_orders[vendor].append(item)
-
+        order_context = order_context or build_order_email_context(order)
         all_emails_sent = True
 
         # Send email to each vendor
-        for vendor, items in vendor_orders.items():
+        for group in order_context["vendor_groups"]:
+            vendor = group["vendor"]
             try:
                 if not vendor.user or not vendor.user.email:
                     logger.error(f"No email found for vendor {vendor.store_name}")
                     continue
 
-                # Calculate vendor's total earnings from this order
-                vendor_total = (
-                    sum(item.price * item.quantity for item in items) / 100
-                )  # Convert from kobo to naira
-
-                # Prepare vendor items data
-                vendor_items_data = []
-                for item in items:
-                    vendor_items_data.append(
-                        {
-                            "product_name": item.product.title,
-                            "quantity": item.quantity,
-                            "unit_price": item.price
-                            / 100,  # Convert from kobo to naira
-                            "total_price": (item.price * item.quantity) / 100,
-                        }
-                    )
-
                 # Create context for email template
                 context = {
+                    **order_context,
                     "vendor_name": vendor.user.first_name or vendor.user.user_name,
                     "store_name": vendor.store_name,
-                    "order_ref": order.ref,
-                    "order_date": order.created_at.strftime("%B %d, %Y at %I:%M %p"),
-                    "customer_name": f"{order.first_name} {order.last_name}",
-                    "customer_phone": order.phone,
-                    "pickup_location": dict(order.PICKUP_CHOICES).get(
-                        order.pickup_location, order.pickup_location
-                    ),
-                    "vendor_items": vendor_items_data,
-                    "vendor_total": vendor_total,
-                    "support_email": settings.DEFAULT_FROM_EMAIL,
+                    "vendor_items": group["items"],
+                    "vendor_total": group["total"],
                 }
 
                 subject = f"🎉 New Order #{order.ref} - {vendor.store_name}"
 
-                # Send email via ZeptoMail
-                result = send_zeptomail(
+                # Queue for background delivery
+                result = queue_email(
                     to_email=vendor.user.email,
                     subject=subject,
                     template_name="vendor_order_notification",
@@ -350,11 +367,11 @@ def send_vendor_order_notification(order):
 
                 if result:
                     logger.info(
-                        f"Vendor notification email sent to {vendor.user.email} for order {order.ref}"
+                        f"Vendor notification email queued for {vendor.user.email} for order {order.ref}"
                     )
                 else:
                     logger.error(
-                        f"Failed to send vendor notification to {vendor.user.email} for order {order.ref}"
+                        f"Failed to queue vendor notification to {vendor.user.email} for order {order.ref}"
                     )
                     all_emails_sent = False
 
@@ -0,0 +1,76 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+
+from userprofile.email_templates import clear_email_template_cache, render_email
+
+
+def _receipt_context(index, items):
+    lines = [
+        {
+            "product_name": f"Product {n}",
+            "vendor_name": f"Store {n % 3}",
+            "quantity": n + 1,
+            "unit_price": 1500.0,
+            "total_price": 1500.0 * (n + 1),
+            "product_image": "https://placehold.co/600x400",
+        }
+        for n in range(items)
+    ]
+    return {
+        "user_name": f"Customer {index}",
+        "full_name": f"Customer {index}",
+        "email": f"customer{index}@example.com",
+        "order_ref": f"REF{index:08d}",
+        "order_date": "January 01, 2025 at 10:00 AM",
+        "pickup_location": "Main Gate",
+        "total_amount": sum(line["total_price"] for line in lines),
+        "items": lines,
+        "vendors_list": sorted({line["vendor_name"] for line in lines}),
+        "customer_phone": "+2349012345678",
+        "customer_name": f"Customer {index}",
+        "site_name": "VendorXprt",
+        "support_email": "support@vendorxprt.com",
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark rendering receipt emails (HTML and text) with the "
+        "precompiled templates against per-call render_to_string."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=10000)
+        parser.add_argument(
+            "--items", type=int, default=3, help="Order lines per receipt (default: 3)."
+        )
+        parser.add_argument(
+            "--skip-baseline",
+            action="store_true",
+            help="Only time the precompiled path.",
+        )
+
+    def _report(self, label, count, elapsed):
+        self.stdout.write(
+            f"{label:<20} {count} emails in {elapsed:.2f}s "
+            f"({count / elapsed:,.0f}/s, {elapsed / count * 1000:.3f} ms each)"
+        )
+
+    def handle(self, *args, **options):
+        count = options["count"]
+        contexts = [_receipt_context(i, options["items"]) for i in range(count)]
+
+        if not options["skip_baseline"]:
+            started = time.perf_counter()
+            for context in contexts:
+                render_to_string("emails/receipt.html", context)
+                render_to_string("emails/receipt.txt", context)
+            self._report("render_to_string", count, time.perf_counter() - started)
+
+        clear_email_template_cache()
+        started = time.perf_counter()
+        for context in contexts:
+            render_email("receipt", context)
+        self._report("precompiled", count, time.perf_counter() - started)
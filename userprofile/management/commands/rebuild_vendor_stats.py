@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from userprofile.models import VendorProfile
+from userprofile.vendor_stats import rebuild_vendor_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the materialized VendorStats counters from orders, reviews, "
+        "products and subscription history, correcting any drift."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--vendor",
+            type=int,
+            action="append",
+            dest="vendors",
+            help="Only rebuild this vendor id (repeatable). Default: every vendor.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Vendors recomputed per round of aggregate queries (default: 500).",
+        )
+
+    def handle(self, *args, **options):
+        vendor_ids = options["vendors"] or list(
+            VendorProfile.objects.order_by("pk").values_list("pk", flat=True)
+        )
+        batch_size = options["batch_size"]
+
+        rebuilt = 0
+        for start in range(0, len(vendor_ids), batch_size):
+            rebuilt += rebuild_vendor_stats(vendor_ids[start:start + batch_size])
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for {rebuilt} vendor(s)."))
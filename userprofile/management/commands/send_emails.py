@@ -0,0 +1,71 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from userprofile.email_outbox import replay_emails, send_pending_emails
+from userprofile.models import EmailOutbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver queued transactional emails. Sends due messages concurrently, "
+        "retrying failed recipients with backoff and dead-lettering messages "
+        "that keep failing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Concurrent deliveries (default: EMAIL_OUTBOX_WORKERS).",
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=None,
+            help="Attempts before a message is dead-lettered (default: EMAIL_OUTBOX_MAX_ATTEMPTS).",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling instead of exiting once the outbox is drained.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=2.0,
+            help="Seconds to wait between polls when --loop is set (default: 2).",
+        )
+        parser.add_argument(
+            "--replay-dead",
+            action="store_true",
+            help="Re-queue every dead-lettered message before sending.",
+        )
+
+    def handle(self, *args, **options):
+        if options["replay_dead"]:
+            count = replay_emails(EmailOutbox.objects.filter(status=EmailOutbox.DEAD))
+            self.stdout.write(f"Re-queued {count} dead-lettered email(s).")
+
+        while True:
+            counts = send_pending_emails(
+                batch_size=options["batch_size"],
+                max_workers=options["workers"],
+                max_attempts=options["max_attempts"],
+            )
+            handled = sum(counts.values())
+            if handled:
+                self.stdout.write(
+                    f"sent={counts[EmailOutbox.SENT]} "
+                    f"retrying={counts[EmailOutbox.PENDING]} "
+                    f"dead={counts[EmailOutbox.DEAD]}"
+                )
+            if handled >= options["batch_size"]:
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["sleep"])
+
+        self.stdout.write(self.style.SUCCESS("Email outbox drained."))
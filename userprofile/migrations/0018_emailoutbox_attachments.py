@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 01:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userprofile', '0017_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailoutbox',
+            name='attachments',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
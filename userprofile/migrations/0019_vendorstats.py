@@ -0,0 +1,120 @@
+# Generated by Django 4.2 on 2026-10-19 01:19
+
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, Q, Sum
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def build_vendor_stats(apps, schema_editor):
+    """Create every vendor's row from its existing history (see vendor_stats)."""
+    VendorProfile = apps.get_model("userprofile", "VendorProfile")
+    VendorStats = apps.get_model("userprofile", "VendorStats")
+    Review = apps.get_model("store", "Review")
+    Product = apps.get_model("store", "Product")
+    OrderItem = apps.get_model("store", "OrderItem")
+    SubscriptionHistory = apps.get_model("userprofile", "SubscriptionHistory")
+
+    stats = {pk: {} for pk in VendorProfile.objects.values_list("pk", flat=True)}
+    sources = [
+        (
+            Review.objects.filter(approved_review=True),
+            "product__vendor",
+            dict(
+                review_count=Count("pk"),
+                rating_total=Coalesce(Sum("rating"), 0.0),
+                **{f"rating_{n}": Count("pk", filter=Q(rating=n)) for n in range(1, 6)},
+            ),
+        ),
+        (
+            Product.objects.all(),
+            "vendor",
+            dict(
+                product_count=Count("pk"),
+                active_product_count=Count("pk", filter=Q(status="active")),
+                out_of_stock_count=Count("pk", filter=Q(quantity=0)),
+                low_stock_count=Count("pk", filter=Q(quantity__gt=0, quantity__lte=5)),
+                inventory_total=Coalesce(Sum("quantity"), 0),
+            ),
+        ),
+        (
+            OrderItem.objects.filter(order__is_paid=True),
+            "product__vendor",
+            dict(
+                order_count=Count("order", distinct=True),
+                revenue=Coalesce(Sum("price"), 0),
+                units_sold=Coalesce(Sum("quantity"), 0),
+            ),
+        ),
+        (
+            SubscriptionHistory.objects.all(),
+            "vendor",
+            dict(
+                subscription_payments=Count("pk", filter=Q(event_type="payment_success")),
+                failed_subscription_payments=Count("pk", filter=Q(event_type="payment_failed")),
+                subscription_payments_total=Coalesce(
+                    Sum("amount", filter=Q(event_type="payment_success")),
+                    0,
+                    output_field=DecimalField(max_digits=12, decimal_places=2),
+                ),
+                subscription_changes=Count(
+                    "pk", filter=Q(event_type__in=("plan_upgraded", "plan_downgraded"))
+                ),
+            ),
+        ),
+    ]
+    for queryset, vendor_field, aggregates in sources:
+        for row in queryset.values(vendor_field).annotate(**aggregates).order_by():
+            stats.get(row.pop(vendor_field), {}).update(row)
+
+    now = django.utils.timezone.now()
+    VendorStats.objects.bulk_create(
+        [
+            VendorStats(vendor_id=pk, rebuilt_at=now, **values)
+            for pk, values in stats.items()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userprofile', '0018_emailoutbox_attachments'),
+        ('store', '0021_vendor_order_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VendorStats',
+            fields=[
+                ('vendor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='userprofile.vendorprofile')),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('rating_total', models.FloatField(default=0)),
+                ('rating_1', models.PositiveIntegerField(default=0)),
+                ('rating_2', models.PositiveIntegerField(default=0)),
+                ('rating_3', models.PositiveIntegerField(default=0)),
+                ('rating_4', models.PositiveIntegerField(default=0)),
+                ('rating_5', models.PositiveIntegerField(default=0)),
+                ('order_count', models.PositiveIntegerField(default=0)),
+                ('revenue', models.BigIntegerField(default=0)),
+                ('units_sold', models.PositiveIntegerField(default=0)),
+                ('product_count', models.PositiveIntegerField(default=0)),
+                ('active_product_count', models.PositiveIntegerField(default=0)),
+                ('out_of_stock_count', models.PositiveIntegerField(default=0)),
+                ('low_stock_count', models.PositiveIntegerField(default=0)),
+                ('inventory_total', models.BigIntegerField(default=0)),
+                ('subscription_payments', models.PositiveIntegerField(default=0)),
+                ('failed_subscription_payments', models.PositiveIntegerField(default=0)),
+                ('subscription_payments_total', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('subscription_changes', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('rebuilt_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Vendor stats',
+            },
+        ),
+        migrations.RunPython(build_vendor_stats, migrations.RunPython.noop),
+    ]
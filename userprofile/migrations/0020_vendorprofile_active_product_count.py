@@ -0,0 +1,30 @@
+# Generated by Django 4.2 on 2026-10-19 01:44
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def count_products(apps, schema_editor):
+    VendorProfile = apps.get_model("userprofile", "VendorProfile")
+    counts = VendorProfile.objects.annotate(
+        listed=Count("product", filter=~Q(product__status="deleted"))
+    ).values_list("pk", "listed")
+    for pk, listed in counts.iterator():
+        VendorProfile.objects.filter(pk=pk).update(active_product_count=listed)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userprofile', '0019_vendorstats'),
+        ('store', '0022_daily_sales_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vendorprofile',
+            name='active_product_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_products, migrations.RunPython.noop),
+    ]
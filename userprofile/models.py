@@ -227,6 +227,9 @@ class VendorProfile(models.Model):
     pause_reason = models.CharField(max_length=255, blank=True, null=True)
     paused_at = models.DateTimeField(null=True, blank=True)
     failed_payment_count = models.PositiveIntegerField(default=0)
+    # Products that count against the plan's max_products (every status but
+    # deleted). Maintained by userprofile.product_limits.
+    active_product_count = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return f"{self.store_name} (Vendor: {self.user.user_name})"
@@ -467,4 +470,109 @@ class SubscriptionHistory(models.Model):
     @classmethod
     def log_event(cls, vendor, event_type, **kwargs):
         """Helper method to log subscription events"""
-        return cls.objects.create(vendor=vendor, event_type=event_type, **kwargs)
+        from .vendor_stats import record_subscription_event
+
+        event = cls.objects.create(vendor=vendor, event_type=event_type, **kwargs)
+        record_subscription_event(event)
+        return event
+
+
+class VendorStats(models.Model):
+    """
+    Materialized dashboard counters for one vendor.
+
+    Kept up to date by ``userprofile.vendor_stats`` as orders are paid,
+    reviews and products change and subscription events are logged, so
+    ``vendor_kpis_api`` reads a single row. ``manage.py rebuild_vendor_stats``
+    recomputes every counter from the source tables.
+    """
+
+    vendor = models.OneToOneField(
+        VendorProfile, on_delete=models.CASCADE, primary_key=True, related_name="stats"
+    )
+
+    # Approved reviews
+    review_count = models.PositiveIntegerField(default=0)
+    rating_total = models.FloatField(default=0)
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+
+    # Paid orders
+    order_count = models.PositiveIntegerField(default=0)
+    revenue = models.BigIntegerField(default=0)
+    units_sold = models.PositiveIntegerField(default=0)
+
+    # Products
+    product_count = models.PositiveIntegerField(default=0)
+    active_product_count = models.PositiveIntegerField(default=0)
+    out_of_stock_count = models.PositiveIntegerField(default=0)
+    low_stock_count = models.PositiveIntegerField(default=0)
+    inventory_total = models.BigIntegerField(default=0)
+
+    # Subscription history
+    subscription_payments = models.PositiveIntegerField(default=0)
+    failed_subscription_payments = models.PositiveIntegerField(default=0)
+    subscription_payments_total = models.DecimalField(
+        max_digits=12, decimal_places=2, default=0
+    )
+    subscription_changes = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(default=timezone.now)
+    rebuilt_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "Vendor stats"
+
+    def __str__(self):
+        return f"Stats for {self.vendor.store_name}"
+
+
+class EmailOutbox(models.Model):
+    """
+    A rendered transactional email waiting to be delivered.
+
+    Request handlers only insert rows here (see ``email_outbox.queue_email``);
+    the ``send_emails`` command delivers them in the background. One row per
+    recipient, so retries and failures are tracked per recipient.
+    """
+
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    DEAD = "dead"
+
+    STATUS_CHOICES = (
+        (PENDING, "Pending"),
+        (SENDING, "Sending"),
+        (SENT, "Sent"),
+        (DEAD, "Dead letter"),
+    )
+
+    to_email = models.EmailField()
+    from_email = models.EmailField(blank=True)
+    from_name = models.CharField(max_length=100, blank=True)
+    subject = models.CharField(max_length=255)
+    template_name = models.CharField(max_length=100, blank=True)
+    text_body = models.TextField()
+    html_body = models.TextField(blank=True)
+    # [{"loader": "<dotted path>", "key": ...}]; the worker calls
+    # loader(key) -> (filename, mime_type, bytes) at delivery time.
+    attachments = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name_plural = "Email outbox"
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to_email} ({self.status})"
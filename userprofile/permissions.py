@@ -53,9 +53,10 @@ def can_create_product(user):
     if plan.max_products is None:
         return True
 
-    # Check if vendor is within their product limit
-    current_count = vendor.product.exclude(status="deleted").count()
-    return current_count < plan.max_products
+    # Check if vendor is within their product limit. The counter is
+    # maintained by userprofile.product_limits; creation itself claims a
+    # slot atomically with product_slot().
+    return vendor.active_product_count < plan.max_products
 
 
 class VendorFeatureAccess(BasePermission):
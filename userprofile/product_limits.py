@@ -0,0 +1,72 @@
+"""
+The per-vendor product counter behind plan limits.
+
+``VendorProfile.active_product_count`` counts the vendor's products in any
+status but deleted, i.e. the products its plan's ``max_products`` applies
+to. The signals in ``userprofile.signals`` keep it current with ``F()``
+deltas whenever a product is created, deleted or changes status.
+
+Product creation goes through ``product_slot``: it claims a slot with a
+single conditional UPDATE (``active_product_count < max_products``) before
+the product is saved. The claim holds the vendor row's lock until the
+transaction commits, so parallel creates for one vendor are serialized and
+cannot exceed the limit.
+"""
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from store.models import Product
+
+from .models import VendorProfile
+
+
+class ProductLimitReached(Exception):
+    """The vendor's plan allows no more products."""
+
+
+def counts_toward_limit(status):
+    return status != Product.DELETED
+
+
+def adjust_product_count(vendor_id, delta):
+    if vendor_id is not None and delta:
+        VendorProfile.objects.filter(pk=vendor_id).update(
+            active_product_count=F("active_product_count") + delta
+        )
+
+
+def _claim_slot(vendor):
+    rows = VendorProfile.objects.filter(pk=vendor.pk)
+    plan = vendor.plan
+    if plan is not None and plan.max_products is not None:
+        rows = rows.filter(active_product_count__lt=plan.max_products)
+    return rows.update(active_product_count=F("active_product_count") + 1) == 1
+
+
+@contextmanager
+def product_slot(vendor):
+    """
+    Create a product for ``vendor`` inside the block, within its plan limit.
+
+    Raises ``ProductLimitReached`` before the block runs when the plan is
+    full. The claimed slot is handed back on exit, since saving the product
+    counts it; if the block saves nothing the count is unchanged.
+    """
+    with transaction.atomic():
+        if not _claim_slot(vendor):
+            raise ProductLimitReached
+        yield
+        adjust_product_count(vendor.pk, -1)
+
+
+def recount_products(vendor_ids):
+    """Recompute ``active_product_count`` of ``vendor_ids`` from their products."""
+    counts = (
+        VendorProfile.objects.filter(pk__in=vendor_ids)
+        .annotate(listed=Count("product", filter=~Q(product__status=Product.DELETED)))
+        .values_list("pk", "listed")
+    )
+    for vendor_id, listed in counts:
+        VendorProfile.objects.filter(pk=vendor_id).update(active_product_count=listed)
@@ -8,6 +8,7 @@ from django.utils.text import slugify
 from datetime import timedelta
 from django.utils import timezone
 from store.utils import create_paystack_subaccount, PaystackError
+from store.banks import cached_account_resolution
 import requests
 from django.core.files.base import ContentFile
 from urllib.parse import urlparse
@@ -320,6 +321,17 @@ class VendorRegisterSerializer(serializers.ModelSerializer):
         if hasattr(request.user, "vendor_profile"):
             raise serializers.ValidationError("User is already registered as a vendor")
 
+        # Reuse the onboarding form's account lookup (cache only, no extra
+        # Paystack call): an account Paystack has just rejected fails here
+        # instead of at subaccount creation.
+        resolution = cached_account_resolution(
+            data.get("account_number"), data.get("bank_code")
+        )
+        if resolution and resolution["status_code"] == 400:
+            raise serializers.ValidationError(
+                {"account_number": resolution["body"]["message"]}
+            )
+
         return data
 
     def create(self, validated_data):
@@ -727,6 +739,34 @@ class SubscriptionResponseSerializer(serializers.Serializer):
     message = serializers.CharField(help_text="Success message")
 
 
+class BulkFulfillmentSerializer(serializers.Serializer):
+    fulfilled = serializers.BooleanField(
+        default=True, help_text="Mark the items fulfilled (true) or unfulfilled (false)"
+    )
+    item_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+        allow_empty=False,
+        max_length=500,
+        help_text="Order item IDs to update",
+    )
+    order_id = serializers.IntegerField(
+        required=False, help_text="Update every item of yours in this order"
+    )
+    pickup_location = serializers.ChoiceField(
+        choices=Order.PICKUP_CHOICES,
+        required=False,
+        help_text="Update every item of yours for this pickup location",
+    )
+
+    def validate(self, attrs):
+        if not any(key in attrs for key in ("item_ids", "order_id", "pickup_location")):
+            raise serializers.ValidationError(
+                "Provide item_ids, order_id or pickup_location."
+            )
+        return attrs
+
+
 class ChangePlanSerializer(serializers.Serializer):
     plan_id = serializers.IntegerField(help_text="ID of the new plan to switch to")
     immediate = serializers.BooleanField(
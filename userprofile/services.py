@@ -7,22 +7,16 @@ import uuid
 import logging
 
 import requests
-from django.conf import settings
+from store.paystack import paystack_client
 from django.urls import reverse
 from django.utils import timezone
 from datetime import timedelta
 
 logger = logging.getLogger(__name__)
 
-PAYSTACK_BASE_URL = settings.PAYSTACK_BASE_URL
-
 
 def _isoformat_or_none(value):
     return value.isoformat() if value is not None else None
-_PAYSTACK_HEADERS = lambda: {
-    "Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}",
-    "Content-Type": "application/json",
-}
 
 
 def update_paystack_subscription(vendor, new_plan):
@@ -34,11 +28,9 @@ def update_paystack_subscription(vendor, new_plan):
     if not vendor.paystack_subscription_code or not new_plan.paystack_plan_code:
         return
 
-    response = requests.put(
-        f"{PAYSTACK_BASE_URL}/subscription/{vendor.paystack_subscription_code}",
+    response = paystack_client.put(
+        f"subscription/{vendor.paystack_subscription_code}",
         json={"plan": new_plan.paystack_plan_code},
-        headers=_PAYSTACK_HEADERS(),
-        timeout=30,
     )
 
     if response.status_code != 200:
@@ -111,12 +103,7 @@ def change_plan_with_payment(vendor, new_plan, immediate=False, request=None):
                 },
             }
 
-            response = requests.post(
-                f"{PAYSTACK_BASE_URL}/transaction/initialize",
-                json=payload,
-                headers=_PAYSTACK_HEADERS(),
-                timeout=30,
-            )
+            response = paystack_client.post("transaction/initialize", json=payload)
 
             if response.status_code != 200:
                 raise Exception("Failed to initialize payment with Paystack")
@@ -197,53 +184,26 @@ def get_vendor_kpis(vendor):
     """Return a dict of KPI metrics for the given VendorProfile.
 
     Extracted from vendor_kpis_api so the logic is independently testable.
+    Counters come from the vendor's ``VendorStats`` row (one query); see
+    ``userprofile.vendor_stats``.
     """
-    from django.db.models import Avg, Count, Sum
-    from store.models import Product, OrderItem, Review
-    from .models import SubscriptionHistory
+    from .vendor_stats import get_vendor_stats, rating_summary
 
     now = timezone.now()
-
-    # ── Ratings ──────────────────────────────────────────────────────────────
-    all_reviews = Review.objects.filter(product__vendor=vendor, approved_review=True)
-    rating_stats = all_reviews.aggregate(
-        average_rating=Avg("rating"), total_reviews=Count("id")
-    )
-    _counts = {
-        row["rating"]: row["count"]
-        for row in all_reviews.values("rating").annotate(count=Count("id"))
-    }
-    rating_breakdown = {f"{n}_star": _counts.get(n, 0) for n in range(5, 0, -1)}
-
-    # ── Sales ─────────────────────────────────────────────────────────────────
-    vendor_order_items = OrderItem.objects.filter(
-        product__vendor=vendor, order__is_paid=True
-    )
-    sales_stats = vendor_order_items.aggregate(
-        total_orders=Count("order", distinct=True),
-        total_revenue=Sum("price"),
-        total_products_sold=Sum("quantity"),
-    )
+    stats = get_vendor_stats(vendor)
 
     # ── Products ──────────────────────────────────────────────────────────────
-    vendor_products = Product.objects.filter(vendor=vendor)
     product_stats = {
-        "total_products": vendor_products.count(),
-        "active_products": vendor_products.filter(status=Product.ACTIVE).count(),
-        "out_of_stock": vendor_products.filter(quantity=0).count(),
-        "low_stock": vendor_products.filter(quantity__lte=5, quantity__gt=0).count(),
-        "total_inventory": vendor_products.aggregate(Sum("quantity"))["quantity__sum"] or 0,
+        "total_products": stats.product_count,
+        "active_products": stats.active_product_count,
+        "out_of_stock": stats.out_of_stock_count,
+        "low_stock": stats.low_stock_count,
+        "total_inventory": stats.inventory_total,
     }
 
     # ── Subscription history analytics ───────────────────────────────────────
-    history = SubscriptionHistory.objects.filter(vendor=vendor)
-    payment_success_count = history.filter(event_type="payment_success").count()
-    payment_failed_count = history.filter(event_type="payment_failed").count()
-    total_payments = (
-        history.filter(event_type="payment_success", amount__isnull=False)
-        .aggregate(Sum("amount"))["amount__sum"]
-        or 0
-    )
+    payment_success_count = stats.subscription_payments
+    total_payments = stats.subscription_payments_total
 
     trial_analytics = None
     if vendor.trial_start and vendor.trial_end:
@@ -270,12 +230,10 @@ def get_vendor_kpis(vendor):
         "failed_payment_count": vendor.failed_payment_count,
         "analytics": {
             "successful_payments": payment_success_count,
-            "failed_payments": payment_failed_count,
+            "failed_payments": stats.failed_subscription_payments,
             "total_payments_value": float(total_payments),
             "average_payment": float(total_payments / payment_success_count) if payment_success_count > 0 else 0,
-            "subscription_changes": history.filter(
-                event_type__in=["plan_upgraded", "plan_downgraded"]
-            ).count(),
+            "subscription_changes": stats.subscription_changes,
             "trial_info": trial_analytics,
         },
     }
@@ -283,15 +241,11 @@ def get_vendor_kpis(vendor):
     return {
         "vendor_id": vendor.id,
         "store_name": vendor.store_name,
-        "ratings": {
-            "average_rating": round(rating_stats["average_rating"] or 0, 1),
-            "total_reviews": rating_stats["total_reviews"] or 0,
-            "rating_breakdown": rating_breakdown,
-        },
+        "ratings": rating_summary(stats),
         "sales": {
-            "total_orders": sales_stats["total_orders"] or 0,
-            "total_revenue": float(sales_stats["total_revenue"] or 0),
-            "total_products_sold": sales_stats["total_products_sold"] or 0,
+            "total_orders": stats.order_count,
+            "total_revenue": float(stats.revenue),
+            "total_products_sold": stats.units_sold,
         },
         "products": product_stats,
         "subscription": subscription_info,
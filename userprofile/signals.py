@@ -0,0 +1,126 @@
+"""
+Keep ``VendorStats`` and ``VendorProfile.active_product_count`` in step
+with reviews and products.
+
+Both are saved from many places (API views, template views, serializers,
+admin), so their counters are updated from model signals rather than at
+each call site. See ``userprofile.vendor_stats`` and
+``userprofile.product_limits``.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .product_limits import adjust_product_count, counts_toward_limit
+from .vendor_reviews import invalidate_public_reviews
+from .vendor_stats import create_vendor_stats, record_product_change, record_review_change
+
+
+def _counted_review(product_id, rating, approved):
+    """``(vendor_id, rating)`` when the review counts towards its vendor's histogram."""
+    from store.models import Product
+
+    if not approved:
+        return None
+    vendor_id = (
+        Product.objects.filter(pk=product_id).values_list("vendor_id", flat=True).first()
+    )
+    return None if vendor_id is None else (vendor_id, rating)
+
+
+def _invalidate_after_commit(vendor_ids):
+    for vendor_id in {vendor_id for vendor_id in vendor_ids if vendor_id is not None}:
+        transaction.on_commit(lambda vendor_id=vendor_id: invalidate_public_reviews(vendor_id))
+
+
+@receiver(post_save, sender="userprofile.VendorProfile")
+def vendor_created(sender, instance, created, **kwargs):
+    if created and not kwargs.get("raw"):
+        create_vendor_stats(instance.pk)
+
+
+@receiver(pre_save, sender="store.Review")
+def review_saving(sender, instance, **kwargs):
+    from store.models import Review
+
+    previous = None
+    if instance.pk is not None and not kwargs.get("raw"):
+        previous = (
+            Review.objects.filter(pk=instance.pk)
+            .values_list("product__vendor", "rating", "approved_review")
+            .first()
+        )
+    instance._counted_before = (
+        previous[:2] if previous is not None and previous[2] and previous[0] else None
+    )
+
+
+@receiver(post_save, sender="store.Review")
+def review_saved(sender, instance, **kwargs):
+    if kwargs.get("raw"):
+        return
+    before = getattr(instance, "_counted_before", None)
+    after = _counted_review(instance.product_id, instance.rating, instance.approved_review)
+    record_review_change(before, after)
+    _invalidate_after_commit([before and before[0], after and after[0]])
+
+
+@receiver(post_delete, sender="store.Review")
+def review_deleted(sender, instance, **kwargs):
+    before = _counted_review(instance.product_id, instance.rating, instance.approved_review)
+    record_review_change(before, None)
+    _invalidate_after_commit([before and before[0]])
+
+
+@receiver(pre_save, sender="store.Product")
+def product_saving(sender, instance, **kwargs):
+    from store.models import Product
+
+    previous = None
+    if instance.pk is not None and not kwargs.get("raw"):
+        previous = (
+            Product.objects.filter(pk=instance.pk)
+            .values_list("vendor_id", "status", "quantity")
+            .first()
+        )
+    instance._stats_before = previous
+    instance._counted_before = (
+        previous[0] if previous is not None and counts_toward_limit(previous[1]) else None
+    )
+
+
+@receiver(post_save, sender="store.Product")
+def product_saved(sender, instance, **kwargs):
+    if kwargs.get("raw"):
+        return
+    before = getattr(instance, "_counted_before", None)
+    after = instance.vendor_id if counts_toward_limit(instance.status) else None
+    if before != after:
+        adjust_product_count(before, -1)
+        adjust_product_count(after, 1)
+    record_product_change(
+        getattr(instance, "_stats_before", None),
+        (instance.vendor_id, instance.status, instance.quantity),
+    )
+    _invalidate_after_commit([instance.vendor_id])
+
+
+@receiver(pre_delete, sender="store.Product")
+def product_deleting(sender, instance, **kwargs):
+    from store.models import Product
+
+    # Stock moves by queryset UPDATE leave loaded instances stale; subtract
+    # what the counters actually hold for this row.
+    instance._stats_before = (
+        Product.objects.filter(pk=instance.pk)
+        .values_list("vendor_id", "status", "quantity")
+        .first()
+    )
+
+
+@receiver(post_delete, sender="store.Product")
+def product_deleted(sender, instance, **kwargs):
+    if counts_toward_limit(instance.status):
+        adjust_product_count(instance.vendor_id, -1)
+    record_product_change(getattr(instance, "_stats_before", None), None)
+    _invalidate_after_commit([instance.vendor_id])
@@ -4,7 +4,6 @@ from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from django.db import transaction
 from django.utils import timezone
-from django.conf import settings
 from django.urls import reverse
 import requests
 import uuid
@@ -21,6 +20,7 @@ from .models import VendorProfile, VendorPlan
 from store.pagination import StandardResultsPagination
 from .permissions import VendorFeatureAccess
 from .auth_api import SUBSCRIPTION_RENEWAL_DAYS
+from store.paystack import paystack_client
 
 logger = logging.getLogger(__name__)
 
@@ -124,19 +124,15 @@ def resubscribe_api(request):
         "callback_url": callback_url,
     }
 
-    headers = {
-        "Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}",
-        "Content-Type": "application/json",
-    }
-
-    response = requests.post(
-        f"{settings.PAYSTACK_BASE_URL}/transaction/initialize", json=payload, headers=headers
-    )
-
     try:
+        response = paystack_client.post("transaction/initialize", json=payload)
         res_data = response.json()
+    # requests.JSONDecodeError subclasses both ValueError and
+    # RequestException, so it has to be caught first.
     except ValueError:
         return Response({"error": "Invalid response from Paystack"}, status=502)
+    except requests.RequestException:
+        return Response({"error": "Could not reach Paystack"}, status=502)
 
     if response.status_code == 200 and res_data.get("status"):
         vendor.pending_ref = ref
@@ -203,15 +199,14 @@ def cancel_subscription_api(request):
 
     subscription_code = getattr(vendor, "paystack_subscription_code", None)
     if subscription_code:
-        url = f"{settings.PAYSTACK_BASE_URL}/subscription/disable"
-        headers = {
-            "Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}",
-            "Content-Type": "application/json",
-        }
         payload = {"code": subscription_code, "token": vendor.user.email}
 
-        res = requests.post(url, json=payload, headers=headers)
-        if res.status_code != 200:
+        try:
+            # Disabling is safe to repeat, so let the client retry it.
+            res = paystack_client.post("subscription/disable", json=payload, idempotent=True)
+        except requests.RequestException:
+            res = None
+        if res is None or res.status_code != 200:
             return Response(
                 {"error": "Failed to cancel subscription on Paystack"}, status=502
             )
@@ -1,4 +1,12 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.cache import cache
+from django.template import TemplateDoesNotExist, engines
+from django.test import TestCase, override_settings
 from django.utils import timezone
 from datetime import timedelta
 from unittest.mock import patch, MagicMock
@@ -7,7 +15,11 @@ from rest_framework import serializers
 from rest_framework.test import APITestCase
 from rest_framework import status
 
-from .models import UserProfile, VendorProfile, VendorPlan, SubscriptionHistory
+from .models import UserProfile, VendorProfile, VendorPlan, SubscriptionHistory, EmailOutbox
+from .email_outbox import queue_email, send_pending_emails
+from .email_utils import send_verification_email
+from .email_templates import clear_email_template_cache, get_email_templates, render_email
+from .zeptomail_client import ZeptoMailClient, ZeptoMailError
 from .phone_utils import normalize_and_validate_nigerian_phone
 from store.utils import PaystackError
 
@@ -111,6 +123,21 @@ class VendorRegistrationAPITests(APITestCase):
         self.assertTrue(UserProfile.objects.get(pk=self.user.pk).is_vendor)
         self.assertTrue(VendorProfile.objects.filter(user=self.user).exists())
 
+    @patch("userprofile.serializers.create_paystack_subaccount")
+    @patch("userprofile.api_views.send_vendor_welcome_email")
+    def test_account_rejected_by_resolve_is_refused(self, mock_email, mock_paystack):
+        cache.set(
+            "paystack:resolve:044:1234567890",
+            {"status_code": 400, "body": {"status": False, "message": "Could not resolve account name"}},
+        )
+        self.addCleanup(cache.clear)
+
+        resp = self.client.post(self.url, VENDOR_POST_DATA, format="json")
+
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        mock_paystack.assert_not_called()
+        self.assertFalse(VendorProfile.objects.filter(user=self.user).exists())
+
     def test_unauthenticated_request_rejected(self):
         self.client.force_authenticate(user=None)
         resp = self.client.post(self.url, VENDOR_POST_DATA, format="json")
@@ -232,7 +259,7 @@ class ChangePlanServiceTests(TestCase):
         self.vendor.refresh_from_db()
         self.assertEqual(self.vendor.plan, free_plan)
 
-    @patch("userprofile.services.requests.post")
+    @patch("userprofile.services.paystack_client.post")
     def test_trial_upgrade_initialises_paystack_payment(self, mock_post):
         from .services import change_plan_with_payment
 
@@ -259,3 +286,965 @@ class ChangePlanServiceTests(TestCase):
         self.assertEqual(result["payment_status"], "payment_required")
         self.assertIn("authorization_url", result)
         mock_post.assert_called_once()
+
+    @patch("userprofile.subscription_api.paystack_client.post")
+    def test_resubscribe_reports_non_json_paystack_body(self, mock_post):
+        import requests
+        from rest_framework.test import APIClient
+
+        mock_post.return_value.json.side_effect = requests.JSONDecodeError("Expecting value", "", 0)
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+
+        resp = client.post("/api/resubscribe/", {"plan_id": self.pro_plan.id}, format="json")
+
+        self.assertEqual(resp.status_code, 502)
+        self.assertEqual(resp.data["error"], "Invalid response from Paystack")
+
+
+# ---------------------------------------------------------------------------
+# Email outbox
+# ---------------------------------------------------------------------------
+
+class FlakyTransport:
+    def __init__(self, fail_for=()):
+        self.fail_for = set(fail_for)
+        self.sent = []
+
+    def send(self, message):
+        if message.to_email in self.fail_for:
+            raise ConnectionError("provider unavailable")
+        self.sent.append(message.to_email)
+
+
+class EmailOutboxTests(TestCase):
+    """Emails are queued on the request path and delivered by the worker."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    @patch("userprofile.zeptomail_client.zeptomail_client.session.post")
+    def test_sending_only_queues(self, mock_post):
+        self.assertTrue(send_verification_email("a@example.com", "123456"))
+
+        mock_post.assert_not_called()
+        message = EmailOutbox.objects.get()
+        self.assertEqual(message.status, EmailOutbox.PENDING)
+        self.assertIn("123456", message.text_body)
+
+    def test_file_transport_writes_messages(self):
+        send_verification_email("a@example.com", "123456")
+        send_verification_email("b@example.com", "654321")
+
+        with override_settings(
+            EMAIL_OUTBOX_TRANSPORT="userprofile.email_outbox.FileTransport",
+            EMAIL_OUTBOX_FILE_PATH=self.tmpdir.name,
+        ):
+            counts = send_pending_emails()
+
+        self.assertEqual(counts[EmailOutbox.SENT], 2)
+        self.assertEqual(EmailOutbox.objects.filter(status=EmailOutbox.SENT).count(), 2)
+        files = sorted(os.listdir(self.tmpdir.name))
+        self.assertEqual(len(files), 2)
+        with open(os.path.join(self.tmpdir.name, files[0]), encoding="utf-8") as fh:
+            self.assertEqual(json.load(fh)["to"], "a@example.com")
+
+    def test_attachment_failure_sends_without_it(self):
+        queue_email(
+            "a@example.com",
+            "Receipt",
+            "verification",
+            {"code": "123456"},
+            attachments=[{"loader": "store.receipts.receipt_attachment", "key": "missing"}],
+        )
+        transport = FlakyTransport()
+
+        with self.assertLogs("userprofile.email_outbox", "ERROR") as logs:
+            counts = send_pending_emails(transport=transport)
+
+        self.assertEqual(counts[EmailOutbox.SENT], 1)
+        self.assertEqual(len(transport.sent), 1)
+        self.assertIn("sending without it", logs.output[0])
+
+    def test_failed_recipient_retries_then_dead_letters(self):
+        send_verification_email("ok@example.com", "111111")
+        send_verification_email("down@example.com", "222222")
+        transport = FlakyTransport(fail_for={"down@example.com"})
+
+        counts = send_pending_emails(max_attempts=2, transport=transport)
+
+        self.assertEqual(counts, {EmailOutbox.SENT: 1, EmailOutbox.PENDING: 1, EmailOutbox.DEAD: 0})
+        failed = EmailOutbox.objects.get(to_email="down@example.com")
+        self.assertGreater(failed.next_attempt_at, timezone.now())
+        self.assertIn("provider unavailable", failed.last_error)
+
+        EmailOutbox.objects.filter(pk=failed.pk).update(next_attempt_at=timezone.now())
+        send_pending_emails(max_attempts=2, transport=transport)
+
+        failed.refresh_from_db()
+        self.assertEqual(failed.status, EmailOutbox.DEAD)
+        self.assertEqual(transport.sent, ["ok@example.com"])
+
+
+class ZeptoMailStub(BaseHTTPRequestHandler):
+    """Records every POST; answers 500 for recipients in ``fail_for``."""
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.calls.append((self.path, payload))
+        recipients = [to["email_address"]["address"] for to in payload["to"]]
+        failed = any(address in self.server.fail_for for address in recipients)
+        self.send_response(500 if failed else 201)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(b'{"data": [], "message": "OK"}')
+
+    def log_message(self, *args):
+        pass
+
+
+class ZeptoMailClientTests(TestCase):
+    """The pooled client against a local HTTP stub."""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), ZeptoMailStub)
+        self.server.calls = []
+        self.server.fail_for = set()
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.client = ZeptoMailClient(
+            api_key="key",
+            base_url=f"http://127.0.0.1:{self.server.server_port}/v1.1/email",
+        )
+
+    def _message(self, to_email, subject="Hello"):
+        return {"to_email": to_email, "subject": subject, "text_content": "Hi"}
+
+    def test_send_email_reuses_session_and_records_latency(self):
+        self.assertTrue(self.client.send_email("a@example.com", "Hello", "Hi"))
+        self.assertTrue(self.client.send_email("b@example.com", "Hello", "Hi"))
+
+        self.assertEqual(len(self.server.calls), 2)
+        self.assertEqual(self.server.calls[0][0], "/v1.1/email")
+        stats = self.client.metrics.snapshot()["email"]
+        self.assertEqual(stats["calls"], 2)
+        self.assertEqual(stats["errors"], 0)
+
+    def test_identical_messages_are_batched(self):
+        errors = self.client.send_many(
+            [self._message("a@example.com"), self._message("b@example.com")]
+        )
+
+        self.assertEqual(errors, [None, None])
+        self.assertEqual(len(self.server.calls), 1)
+        path, payload = self.server.calls[0]
+        self.assertEqual(path, "/v1.1/email/batch")
+        self.assertEqual(len(payload["to"]), 2)
+
+    def test_distinct_messages_fan_out_with_per_message_errors(self):
+        self.server.fail_for = {"down@example.com"}
+        messages = [
+            self._message("a@example.com", subject="Order 1"),
+            self._message("down@example.com", subject="Order 2"),
+            self._message("c@example.com", subject="Order 3"),
+        ]
+
+        errors = self.client.send_many(messages, max_workers=3)
+
+        self.assertEqual(len(self.server.calls), 3)
+        self.assertIsNone(errors[0])
+        self.assertIsInstance(errors[1], ZeptoMailError)
+        self.assertIsNone(errors[2])
+        self.assertEqual(self.client.metrics.snapshot()["email"]["errors"], 1)
+
+
+class EmailTemplateTests(TestCase):
+    def setUp(self):
+        clear_email_template_cache()
+        self.addCleanup(clear_email_template_cache)
+
+    def test_templates_are_compiled_once(self):
+        context = {"code": "123456", "email": "a@example.com", "expires_at": "soon"}
+        render_email("verification", context)
+        html_body, text_body = render_email("verification", context)
+
+        self.assertEqual(get_email_templates.cache_info().misses, 1)
+        self.assertIn("123456", html_body)
+        self.assertIn("123456", text_body)
+
+    def test_missing_text_template_is_generated_from_html(self):
+        html = engines["django"].from_string("<p>Hi <b>{{ name }}</b></p>")
+
+        def fake_get_template(name):
+            if name.endswith(".txt"):
+                raise TemplateDoesNotExist(name)
+            return html
+
+        with patch("userprofile.email_templates.get_template", side_effect=fake_get_template):
+            html_body, text_body = render_email("promo", {"name": "Ada"})
+
+        self.assertEqual(html_body, "<p>Hi <b>Ada</b></p>")
+        self.assertEqual(text_body, "Hi Ada")
+
+
+# ---------------------------------------------------------------------------
+# Vendor order dashboard
+# ---------------------------------------------------------------------------
+
+class VendorOrderListAPITests(APITestCase):
+    """vendor_order_list_api computes its KPIs in one aggregate query."""
+
+    url = "/api/my-order/"
+
+    def setUp(self):
+        from store.models import Order, OrderItem, Payment
+        from store.tests import make_category, make_product
+
+        user = make_user()
+        self.vendor = VendorProfile.objects.create(
+            user=user,
+            store_name="My Store",
+            store_description="Great store",
+            plan=make_basic_plan(),
+            subscription_status="active",
+            subscription_expiry=timezone.now() + timedelta(days=20),
+            is_verified=True,
+        )
+        product = make_product(self.vendor, make_category())
+        buyer = make_user("buyer@example.com", "buyer")
+
+        def order(ref, location, payment_status, fulfilled, price):
+            order = Order.objects.create(
+                created_by=buyer,
+                first_name="Ada",
+                last_name="Obi",
+                pickup_location=location,
+                is_paid=payment_status == "paid",
+                ref=ref,
+            )
+            OrderItem.objects.create(order=order, product=product, price=price, fulfilled=fulfilled)
+            if payment_status:
+                Payment.objects.create(
+                    user=buyer, order=order, ref=ref, amount=price, status=payment_status
+                )
+            return order
+
+        order("a", Order.ADMIN, "paid", True, 1000)
+        order("b", Order.HALL_1, "paid", True, 2500)
+        order("c", Order.HALL_1, "paid", False, 700)
+        order("d", Order.ADMIN, "failed", False, 300)
+        order("e", Order.ADMIN, None, False, 400)
+        old = order("f", Order.ADMIN, "paid", True, 5000)
+        Order.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=40))
+
+        self.client.force_authenticate(user=user)
+
+    def test_kpis(self):
+        kpis = self.client.get(self.url).data["kpis"]
+
+        self.assertEqual(
+            kpis,
+            {
+                "total_orders": 6,
+                "pending_orders": 3,
+                "completed_orders": 3,
+                "cancelled_orders": 2,
+                "total_revenue": 8500,
+                "completion_rate": 50.0,
+            },
+        )
+
+    def test_kpis_are_one_query(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.url)
+
+        orderitem_queries = [q for q in ctx.captured_queries if 'FROM "store_orderitem"' in q["sql"]]
+        # KPI aggregate, page count and the page itself.
+        self.assertEqual(len(orderitem_queries), 3)
+
+    def test_filters_narrow_list_and_kpis(self):
+        since = (timezone.now() - timedelta(days=7)).date().isoformat()
+        resp = self.client.get(
+            self.url, {"pickup_location": "admin", "fulfilled": "false", "date_from": since}
+        )
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["count"], 2)
+        self.assertEqual(resp.data["kpis"]["cancelled_orders"], 2)
+        self.assertEqual(resp.data["kpis"]["total_revenue"], 0)
+
+    def test_date_range_is_inclusive_and_uses_created_at_directly(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        old_day = (timezone.localtime() - timedelta(days=40)).date().isoformat()
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(self.url, {"date_from": old_day, "date_to": old_day})
+
+        self.assertEqual(resp.data["count"], 1)
+        self.assertEqual(resp.data["kpis"]["total_revenue"], 5000)
+        sql = " ".join(q["sql"] for q in ctx.captured_queries)
+        self.assertNotIn("django_datetime_cast_date", sql)
+
+    def test_invalid_filter_is_rejected(self):
+        resp = self.client.get(self.url, {"date_from": "last week"})
+
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("date_from", resp.data["error"])
+
+
+# ---------------------------------------------------------------------------
+# Vendor stats
+# ---------------------------------------------------------------------------
+
+@patch("userprofile.email_utils.send_vendor_order_notification")
+@patch("userprofile.email_utils.send_receipt_email")
+class VendorStatsTests(APITestCase):
+    """VendorStats counters track their source tables incrementally."""
+
+    url = "/api/vendor-kpis/"
+
+    def setUp(self):
+        from store.tests import make_category, make_paid_order, make_product
+
+        self.user = make_user()
+        self.vendor = VendorProfile.objects.create(
+            user=self.user,
+            store_name="My Store",
+            store_description="Great store",
+            plan=make_basic_plan(),
+            subscription_status="active",
+            subscription_expiry=timezone.now() + timedelta(days=20),
+            is_verified=True,
+        )
+        self.buyer = make_user("buyer@example.com", "buyer")
+        category = make_category()
+        self.mug = make_product(self.vendor, category, title="Mug", quantity=10)
+        self.lamp = make_product(self.vendor, category, title="Lamp", quantity=3)
+        self.make_paid_order = make_paid_order
+
+    def _activity(self):
+        from store.models import Review
+        from store.services import finalize_payment
+
+        self.make_paid_order(self.buyer, self.mug, ref="one", quantity=2)
+        self.make_paid_order(self.buyer, self.lamp, ref="two")
+        with self.captureOnCommitCallbacks(execute=True):
+            finalize_payment("one")
+            finalize_payment("two")
+        Review.objects.create(product=self.mug, author=self.buyer, subject="Good", rating=5)
+        review = Review.objects.create(product=self.lamp, author=self.buyer, subject="Ok", rating=3)
+        review.rating = 4
+        review.save()
+        SubscriptionHistory.log_event(self.vendor, "payment_success", amount=2000)
+        SubscriptionHistory.log_event(self.vendor, "payment_failed")
+        SubscriptionHistory.log_event(self.vendor, "plan_upgraded")
+
+    def _counters(self):
+        from .models import VendorStats
+
+        stats = VendorStats.objects.get(vendor=self.vendor)
+        return {
+            field.name: getattr(stats, field.name)
+            for field in VendorStats._meta.fields
+            if field.name not in ("vendor", "updated_at", "rebuilt_at")
+        }
+
+    def test_incremental_counters_match_rebuild(self, mock_receipt, mock_vendor):
+        from .vendor_stats import rebuild_vendor_stats
+
+        self._activity()
+        incremental = self._counters()
+        rebuild_vendor_stats([self.vendor.pk])
+
+        self.assertEqual(incremental, self._counters())
+        self.assertEqual(incremental["order_count"], 2)
+        self.assertEqual(incremental["revenue"], 1500 * 2 + 1500)
+        self.assertEqual(incremental["rating_4"], 1)
+
+    def test_history_before_first_stats_row_is_kept(self, mock_receipt, mock_vendor):
+        from .models import VendorStats
+        from .vendor_stats import get_vendor_stats
+
+        # A vendor from before VendorStats existed: history, but no row.
+        VendorStats.objects.filter(vendor=self.vendor).delete()
+        self._activity()
+        self.assertFalse(VendorStats.objects.filter(vendor=self.vendor).exists())
+
+        stats = get_vendor_stats(self.vendor)
+
+        self.assertEqual((stats.order_count, stats.revenue, stats.review_count), (2, 4500, 2))
+        self.assertEqual(stats.product_count, 2)
+
+    def test_migration_builds_rows_from_history(self, mock_receipt, mock_vendor):
+        import importlib
+        from django.apps import apps
+        from .models import VendorStats
+        from .vendor_stats import rebuild_vendor_stats
+
+        migration = importlib.import_module("userprofile.migrations.0019_vendorstats")
+        VendorStats.objects.filter(vendor=self.vendor).delete()
+        self._activity()
+
+        migration.build_vendor_stats(apps, None)
+        migrated = self._counters()
+        rebuild_vendor_stats([self.vendor.pk])
+
+        self.assertEqual(migrated, self._counters())
+        self.assertEqual(migrated["order_count"], 2)
+
+    def test_kpis_read_one_stats_row(self, mock_receipt, mock_vendor):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        self._activity()
+        self.client.force_authenticate(user=self.user)
+
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(self.url)
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["ratings"]["average_rating"], 4.5)
+        self.assertEqual(resp.data["sales"]["total_products_sold"], 3)
+        self.assertEqual(resp.data["subscription"]["analytics"]["subscription_changes"], 1)
+        source_tables = ("store_review", "store_orderitem", "store_product", "subscriptionhistory")
+        self.assertFalse(
+            [q for q in ctx.captured_queries if any(table in q["sql"] for table in source_tables)]
+        )
+
+    def test_stock_moves_apply_after_commit(self, mock_receipt, mock_vendor):
+        from store.inventory import reserve_stock
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reserve_stock("hold1", [{"product": self.lamp, "quantity": 3}])
+
+        counters = self._counters()
+        self.assertEqual(counters["out_of_stock_count"], 1)
+        self.assertEqual(counters["inventory_total"], 10)
+
+    def test_product_changes_apply_deltas_without_aggregating(self, mock_receipt, mock_vendor):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from store.inventory import release_reservations, reserve_stock
+        from store.models import Product
+        from .vendor_stats import rebuild_vendor_stats
+
+        stale_mug = Product.objects.get(pk=self.mug.pk)
+        with CaptureQueriesContext(connection) as ctx, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.lamp.quantity = 4
+            self.lamp.status = Product.DRAFT
+            self.lamp.save()
+            reserve_stock("hold1", [{"product": self.mug, "quantity": 6}])
+            reserve_stock("hold2", [{"product": self.lamp, "quantity": 4}])
+            release_reservations("hold2")
+            stale_mug.delete()  # loaded before the reservation took 6 units
+
+        self.assertFalse(
+            [q for q in ctx.captured_queries if 'FROM "store_product"' in q["sql"] and "GROUP BY" in q["sql"]]
+        )
+        incremental = self._counters()
+        rebuild_vendor_stats([self.vendor.pk])
+        self.assertEqual(incremental, self._counters())
+        self.assertEqual(
+            (incremental["product_count"], incremental["active_product_count"], incremental["low_stock_count"]),
+            (1, 0, 1),
+        )
+
+    def test_rebuild_command_corrects_drift(self, mock_receipt, mock_vendor):
+        from django.core.management import call_command
+        from .models import VendorStats
+
+        self._activity()
+        VendorStats.objects.filter(vendor=self.vendor).update(order_count=99, revenue=0)
+
+        call_command("rebuild_vendor_stats", stdout=open(os.devnull, "w"))
+
+        self.assertEqual(self._counters()["order_count"], 2)
+        self.assertEqual(self._counters()["revenue"], 4500)
+
+
+# ---------------------------------------------------------------------------
+# Vendor analytics
+# ---------------------------------------------------------------------------
+
+@patch("userprofile.email_utils.send_vendor_order_notification")
+@patch("userprofile.email_utils.send_receipt_email")
+class VendorAnalyticsAPITests(APITestCase):
+    """Daily sales rollups and the time-series endpoint that reads them."""
+
+    url = "/api/vendor-analytics/"
+
+    def setUp(self):
+        from store.tests import make_category, make_paid_order, make_product
+
+        self.user = make_user()
+        self.vendor = VendorProfile.objects.create(
+            user=self.user,
+            store_name="My Store",
+            store_description="Great store",
+            plan=make_basic_plan(),
+            subscription_status="active",
+            subscription_expiry=timezone.now() + timedelta(days=20),
+            is_verified=True,
+        )
+        self.buyer = make_user("buyer@example.com", "buyer")
+        category = make_category()
+        self.mug = make_product(self.vendor, category, title="Mug", quantity=20)
+        self.lamp = make_product(self.vendor, category, title="Lamp", quantity=20)
+        self.make_paid_order = make_paid_order
+        self.today = timezone.localdate()
+
+    def _sell(self, product, ref, days_ago=0, quantity=1):
+        from store.models import Order
+        from store.services import finalize_payment
+
+        self.make_paid_order(self.buyer, product, ref=ref, quantity=quantity)
+        Order.objects.filter(ref=ref).update(
+            created_at=timezone.now() - timedelta(days=days_ago)
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            finalize_payment(ref)
+
+    def _rollups(self):
+        from store.models import ProductDailySales, VendorDailySales
+
+        fields = ("date", "orders", "units_sold", "revenue")
+        return (
+            sorted(VendorDailySales.objects.values_list(*fields)),
+            sorted(ProductDailySales.objects.values_list("product_id", *fields)),
+        )
+
+    def test_finalize_increments_rollups_and_backfill_matches(self, mock_receipt, mock_vendor):
+        from django.core.management import call_command
+        from store.models import ProductDailySales, VendorDailySales
+
+        self._sell(self.mug, "one", quantity=2)
+        self._sell(self.lamp, "two")
+        self._sell(self.mug, "three", days_ago=3)
+        incremental = self._rollups()
+
+        today = VendorDailySales.objects.get(vendor=self.vendor, date=self.today)
+        self.assertEqual((today.orders, today.units_sold, today.revenue), (2, 3, 4500))
+
+        VendorDailySales.objects.all().delete()
+        ProductDailySales.objects.all().delete()
+        call_command("backfill_sales_rollups", stdout=open(os.devnull, "w"))
+
+        self.assertEqual(incremental, self._rollups())
+
+    def test_series_is_zero_filled_from_rollups_only(self, mock_receipt, mock_vendor):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        self._sell(self.mug, "one", quantity=2)
+        self._sell(self.lamp, "two", days_ago=2)
+        self.client.force_authenticate(user=self.user)
+        start = self.today - timedelta(days=3)
+
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(self.url, {"from": start.isoformat(), "to": self.today.isoformat()})
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(
+            [(point["period"], point["revenue"]) for point in resp.data["series"]],
+            [
+                (start.isoformat(), 0),
+                ((start + timedelta(days=1)).isoformat(), 1500),
+                ((start + timedelta(days=2)).isoformat(), 0),
+                (self.today.isoformat(), 3000),
+            ],
+        )
+        self.assertEqual(resp.data["totals"], {"orders": 2, "units_sold": 3, "revenue": 4500})
+        self.assertEqual(resp.data["top_products"][0]["title"], "Mug")
+        self.assertFalse([q for q in ctx.captured_queries if "store_orderitem" in q["sql"]])
+
+    def test_month_granularity_buckets_by_month(self, mock_receipt, mock_vendor):
+        self._sell(self.mug, "one")
+        self._sell(self.lamp, "two", days_ago=40)
+        self.client.force_authenticate(user=self.user)
+        start = self.today - timedelta(days=60)
+
+        resp = self.client.get(
+            self.url,
+            {"granularity": "month", "from": start.isoformat(), "to": self.today.isoformat()},
+        )
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["series"][0]["period"], start.replace(day=1).isoformat())
+        self.assertEqual(resp.data["series"][-1]["period"], self.today.replace(day=1).isoformat())
+        self.assertEqual(sum(point["orders"] for point in resp.data["series"]), 2)
+
+    def test_invalid_params_return_400(self, mock_receipt, mock_vendor):
+        self.client.force_authenticate(user=self.user)
+
+        for params in (
+            {"granularity": "hour"},
+            {"from": "yesterday"},
+            {"from": "2026-02-01", "to": "2026-01-01"},
+            {"from": "2020-01-01", "to": "2026-01-01"},
+        ):
+            resp = self.client.get(self.url, params)
+            self.assertEqual(resp.status_code, 400, params)
+
+
+# ---------------------------------------------------------------------------
+# Vendor reviews
+# ---------------------------------------------------------------------------
+
+class VendorReviewsAPITests(APITestCase):
+    """Review listings read the VendorStats histogram; public pages are cached."""
+
+    def setUp(self):
+        from store.tests import make_category, make_product
+
+        cache.clear()
+        self.user = make_user()
+        self.vendor = VendorProfile.objects.create(
+            user=self.user,
+            store_name="My Store",
+            store_description="Great store",
+            plan=make_basic_plan(),
+            subscription_status="active",
+            subscription_expiry=timezone.now() + timedelta(days=20),
+            is_verified=True,
+        )
+        self.buyer = make_user("buyer@example.com", "buyer")
+        category = make_category()
+        self.mug = make_product(self.vendor, category, title="Mug")
+        self.lamp = make_product(self.vendor, category, title="Lamp")
+        self.url = f"/api/vendor/{self.vendor.pk}/reviews/"
+
+    def _review(self, product, rating, **kwargs):
+        from store.models import Review
+
+        with self.captureOnCommitCallbacks(execute=True):
+            return Review.objects.create(
+                product=product, author=self.buyer, subject="Review", rating=rating, **kwargs
+            )
+
+    def _histogram(self):
+        from .models import VendorStats
+
+        return VendorStats.objects.filter(vendor=self.vendor).values(
+            "review_count", "rating_total", "rating_1", "rating_2", "rating_3", "rating_4", "rating_5"
+        ).get()
+
+    def test_histogram_follows_review_changes(self):
+        from .vendor_stats import rebuild_vendor_stats
+
+        self._review(self.mug, 5)
+        edited = self._review(self.lamp, 2)
+        edited.rating = 4
+        edited.save()
+        self._review(self.mug, 1).disapprove()
+        self._review(self.lamp, 3).delete()
+        incremental = self._histogram()
+
+        rebuild_vendor_stats([self.vendor.pk])
+
+        self.assertEqual(incremental, self._histogram())
+        self.assertEqual(incremental["review_count"], 2)
+        self.assertEqual((incremental["rating_4"], incremental["rating_5"]), (1, 1))
+
+    def test_public_pages_are_cached_until_a_review_changes(self):
+        self._review(self.mug, 5)
+        self._review(self.lamp, 1, approved_review=False)
+
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            cached = self.client.get(self.url)
+
+        self.assertEqual(first.data, cached.data)
+        self.assertEqual(cached.data["count"], 1)
+        self.assertEqual(cached.data["rating_stats"]["rating_breakdown"]["5_star"], 1)
+        self.assertIn("public", cached["Cache-Control"])
+
+        self._review(self.lamp, 4)
+        resp = self.client.get(self.url)
+
+        self.assertEqual(resp.data["count"], 2)
+        self.assertEqual(resp.data["rating_stats"]["average_rating"], 4.5)
+        self.assertEqual(self.client.get(self.url, {"rating": 4}).data["count"], 1)
+
+    def test_vendor_listing_uses_histogram(self):
+        self._review(self.mug, 5)
+        self._review(self.lamp, 3)
+        self.client.force_authenticate(user=self.user)
+
+        resp = self.client.get("/api/my-reviews/")
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["count"], 2)
+        self.assertEqual(resp.data["results"][0]["author"]["id"], self.buyer.pk)
+        self.assertEqual(
+            resp.data["rating_stats"],
+            {
+                "average_rating": 4.0,
+                "total_reviews": 2,
+                "rating_breakdown": {"5_star": 1, "4_star": 0, "3_star": 1, "2_star": 0, "1_star": 0},
+            },
+        )
+
+    def test_unknown_vendor_is_404(self):
+        self.assertEqual(self.client.get("/api/vendor/9999/reviews/").status_code, 404)
+
+    def test_deleting_vendor_with_reviews(self):
+        self._review(self.mug, 5)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        self.assertFalse(VendorProfile.objects.exists())
+
+
+# ---------------------------------------------------------------------------
+# Bulk fulfillment
+# ---------------------------------------------------------------------------
+
+class BulkFulfillmentAPITests(APITestCase):
+    """Fulfillment for many order lines is set with one scoped UPDATE."""
+
+    url = "/api/bulk-fulfillment/"
+
+    def setUp(self):
+        from store.models import Order, OrderItem
+        from store.tests import make_category, make_product
+
+        self.user = make_user()
+        self.vendor = VendorProfile.objects.create(
+            user=self.user,
+            store_name="My Store",
+            store_description="Great store",
+            plan=make_basic_plan(),
+            subscription_status="active",
+            subscription_expiry=timezone.now() + timedelta(days=20),
+            is_verified=True,
+        )
+        category = make_category()
+        product = make_product(self.vendor, category)
+        other_vendor = VendorProfile.objects.create(
+            user=make_user("other@example.com", "other"), store_name="Other", store_description="x"
+        )
+        other_product = make_product(other_vendor, category, title="Other")
+        buyer = make_user("buyer@example.com", "buyer")
+
+        def order(ref, location, paid=True):
+            order = Order.objects.create(
+                created_by=buyer, first_name="Ada", last_name="Obi",
+                pickup_location=location, is_paid=paid, ref=ref,
+            )
+            mine = OrderItem.objects.create(order=order, product=product, price=1500)
+            theirs = OrderItem.objects.create(order=order, product=other_product, price=900)
+            return order, mine, theirs
+
+        self.hall, self.hall_item, self.other_item = order("a", Order.HALL_1)
+        _, self.admin_item, _ = order("b", Order.ADMIN)
+        _, self.unpaid_item, _ = order("c", Order.HALL_1, paid=False)
+        self.client.force_authenticate(user=self.user)
+
+    def _fulfilled(self):
+        from store.models import OrderItem
+
+        return set(OrderItem.objects.filter(fulfilled=True).values_list("pk", flat=True))
+
+    def test_item_ids_update_only_own_paid_items_in_one_query(self):
+        from .vendor_orders import set_fulfillment
+
+        ids = [self.hall_item.pk, self.admin_item.pk, self.unpaid_item.pk, self.other_item.pk]
+
+        with self.assertNumQueries(1):
+            updated = set_fulfillment(self.vendor, True, item_ids=ids)
+
+        self.assertEqual(updated, 2)
+        self.assertEqual(self._fulfilled(), {self.hall_item.pk, self.admin_item.pk})
+
+    def test_pickup_location_and_unfulfil(self):
+        from store.models import Order
+
+        resp = self.client.post(self.url, {"pickup_location": Order.HALL_1}, format="json")
+        self.assertEqual(resp.data, {"success": True, "fulfilled": True, "updated": 1})
+        self.assertEqual(self._fulfilled(), {self.hall_item.pk})
+
+        resp = self.client.post(
+            self.url, {"pickup_location": Order.HALL_1, "fulfilled": False}, format="json"
+        )
+        self.assertEqual(resp.data["updated"], 1)
+        self.assertEqual(self._fulfilled(), set())
+
+    def test_requires_a_scope(self):
+        resp = self.client.post(self.url, {"fulfilled": True}, format="json")
+        self.assertEqual(resp.status_code, 400)
+
+    def test_order_endpoint(self):
+        resp = self.client.post(f"/api/order/{self.hall.pk}/fulfillment/", {}, format="json")
+
+        self.assertEqual(resp.data["updated"], 1)
+        self.assertEqual(self._fulfilled(), {self.hall_item.pk})
+        unpaid = self.unpaid_item.order_id
+        self.assertEqual(
+            self.client.post(f"/api/order/{unpaid}/fulfillment/", {}, format="json").status_code, 400
+        )
+        self.assertEqual(
+            self.client.post("/api/order/9999/fulfillment/", {}, format="json").status_code, 404
+        )
+
+
+# ---------------------------------------------------------------------------
+# Vendor order export
+# ---------------------------------------------------------------------------
+
+class VendorOrderExportAPITests(APITestCase):
+    """/api/my-order/export/ streams the vendor's order lines as CSV or JSONL."""
+
+    url = "/api/my-order/export/"
+
+    def setUp(self):
+        from store.models import Order, OrderItem
+        from store.tests import make_category, make_product
+
+        self.user = make_user()
+        self.vendor = VendorProfile.objects.create(
+            user=self.user,
+            store_name="My Store",
+            store_description="Great store",
+            plan=make_basic_plan(),
+            subscription_status="active",
+            subscription_expiry=timezone.now() + timedelta(days=20),
+            is_verified=True,
+        )
+        category = make_category()
+        product = make_product(self.vendor, category, title="Mug")
+        other_vendor = VendorProfile.objects.create(
+            user=make_user("other@example.com", "other"), store_name="Other", store_description="x"
+        )
+        other_product = make_product(other_vendor, category, title="Other")
+
+        for ref, first_name, days_ago in (("a", "Ada", 0), ("b", "=HYPERLINK()", 10)):
+            order = Order.objects.create(
+                first_name=first_name, last_name="Obi", is_paid=True, ref=ref,
+            )
+            Order.objects.filter(pk=order.pk).update(
+                created_at=timezone.now() - timedelta(days=days_ago)
+            )
+            OrderItem.objects.create(order=order, product=product, price=1500, quantity=2)
+            OrderItem.objects.create(order=order, product=other_product, price=900)
+        self.client.force_authenticate(user=self.user)
+
+    def _body(self, resp):
+        return b"".join(resp.streaming_content).decode()
+
+    def test_csv_export_streams_own_rows(self):
+        import csv
+
+        resp = self.client.get(self.url)
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.streaming)
+        self.assertEqual(resp["Content-Type"], "text/csv; charset=utf-8")
+        self.assertIn("attachment;", resp["Content-Disposition"])
+        rows = list(csv.DictReader(self._body(resp).splitlines()))
+        self.assertEqual([row["order_ref"] for row in rows], ["a", "b"])
+        self.assertEqual(rows[0]["product_title"], "Mug")
+        self.assertEqual(rows[1]["first_name"], "'=HYPERLINK()")
+
+    def test_jsonl_export_with_date_filter(self):
+        since = (timezone.localdate() - timedelta(days=2)).isoformat()
+
+        resp = self.client.get(self.url, {"fmt": "jsonl", "date_from": since})
+
+        self.assertEqual(resp["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in self._body(resp).splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual((rows[0]["order_ref"], rows[0]["quantity"], rows[0]["price"]), ("a", 2, 1500))
+        self.assertTrue(rows[0]["paid"])
+
+    def test_invalid_format_or_filter_is_400(self):
+        self.assertEqual(self.client.get(self.url, {"fmt": "xlsx"}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"date_from": "soon"}).status_code, 400)
+
+
+# ---------------------------------------------------------------------------
+# Product limits
+# ---------------------------------------------------------------------------
+
+class ProductLimitTests(APITestCase):
+    """VendorProfile.active_product_count backs the plan's max_products check."""
+
+    def setUp(self):
+        from store.tests import make_category, make_product
+
+        plan = make_basic_plan()
+        plan.max_products = 2
+        plan.save()
+        self.user = make_user()
+        self.vendor = VendorProfile.objects.create(
+            user=self.user,
+            store_name="My Store",
+            store_description="Great store",
+            plan=plan,
+            subscription_status="active",
+            subscription_expiry=timezone.now() + timedelta(days=20),
+            is_verified=True,
+        )
+        self.category = make_category()
+        self.make_product = make_product
+
+    def _count(self):
+        self.vendor.refresh_from_db()
+        return self.vendor.active_product_count
+
+    def test_counter_follows_create_status_and_delete(self):
+        from store.models import Product
+
+        mug = self.make_product(self.vendor, self.category, title="Mug")
+        lamp = self.make_product(self.vendor, self.category, title="Lamp", status=Product.DRAFT)
+        self.assertEqual(self._count(), 2)
+
+        with patch.object(Product, "full_clean"):
+            mug.status = Product.DELETED
+            mug.save()
+            self.assertEqual(self._count(), 1)
+            mug.status = Product.ACTIVE
+            mug.save()
+            self.assertEqual(self._count(), 2)
+        lamp.delete()
+        self.assertEqual(self._count(), 1)
+
+    def test_product_slot_enforces_limit(self):
+        from .permissions import can_create_product
+        from .product_limits import ProductLimitReached, product_slot
+
+        for title in ("Mug", "Lamp"):
+            with product_slot(self.vendor):
+                self.make_product(self.vendor, self.category, title=title)
+        self.assertEqual(self._count(), 2)
+
+        self.user.refresh_from_db()
+        self.assertFalse(can_create_product(self.user))
+        with self.assertRaises(ProductLimitReached):
+            with product_slot(self.vendor):
+                self.make_product(self.vendor, self.category, title="Chair")
+        self.assertEqual(self._count(), 2)
+
+    def test_endpoints_read_counter(self):
+        self.make_product(self.vendor, self.category, title="Mug")
+        self.client.force_authenticate(user=UserProfile.objects.get(pk=self.user.pk))
+
+        usage = self.client.get("/api/my-subscription/").data["product_usage"]
+        self.assertEqual(usage, {"current_count": 1, "max_allowed": 2, "remaining": 1})
+        self.assertEqual(self.client.get("/api/my-store/").data["product_count"], 1)
+
+    def test_rebuild_corrects_drift(self):
+        from .vendor_stats import rebuild_vendor_stats
+
+        self.make_product(self.vendor, self.category, title="Mug")
+        VendorProfile.objects.filter(pk=self.vendor.pk).update(active_product_count=7)
+
+        rebuild_vendor_stats([self.vendor.pk])
+
+        self.assertEqual(self._count(), 1)
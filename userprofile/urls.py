@@ -94,6 +94,11 @@ urlpatterns += [
         name="delete_product_api",
     ),
     path("api/my-order/", api_views.vendor_order_list_api, name="my_order_api"),
+    path(
+        "api/my-order/export/",
+        api_views.vendor_order_export_api,
+        name="vendor_order_export_api",
+    ),
     path("api/order/<int:pk>/", api_views.order_detail_api, name="order_detail_api"),
     path("api/my-reviews/", api_views.vendor_reviews_api, name="vendor_reviews_api"),
     path(
@@ -101,8 +106,23 @@ urlpatterns += [
         api_views.toggle_fulfillment_api,
         name="toggle_fulfillment_api",
     ),
+    path(
+        "api/bulk-fulfillment/",
+        api_views.bulk_fulfillment_api,
+        name="bulk_fulfillment_api",
+    ),
+    path(
+        "api/order/<int:pk>/fulfillment/",
+        api_views.order_fulfillment_api,
+        name="order_fulfillment_api",
+    ),
     path("api/vendor-plans/", api_views.vendor_plans_api, name="vendor_plans_api"),
     path("api/vendor-kpis/", api_views.vendor_kpis_api, name="vendor_kpis_api"),
+    path(
+        "api/vendor-analytics/",
+        api_views.vendor_analytics_api,
+        name="vendor_analytics_api",
+    ),
     path(
         "api/my-subscription/",
         api_views.my_subscription_status_api,
@@ -4,8 +4,10 @@ from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from django.db import transaction
-from django.db.models import Count, Q
+from django.core.cache import cache
+from django.db.models import Count
 from django.utils import timezone
+from django.utils.cache import patch_cache_control
 from django.conf import settings
 from django.urls import reverse
 import requests
@@ -27,17 +29,39 @@ from .serializers import (
     VendorPlanSerializer,
     SubscriptionInitiateSerializer,
     ChangePlanSerializer,
+    BulkFulfillmentSerializer,
 )
 from .models import VendorProfile, VendorPlan
 from store.models import OrderItem, Order, Review
+from store.analytics import DAY, GRANULARITIES, vendor_sales_series
+from store.exports import CSV, FORMATS as EXPORT_FORMATS, streaming_export
 from .views import get_object_or_404
 from store.pagination import StandardResultsPagination
 from .permissions import can_create_product, HasActiveSubscription, VendorFeatureAccess
 from .email_utils import send_vendor_welcome_email
+from .vendor_orders import (
+    OrderFilterError,
+    parse_date_param,
+    set_fulfillment,
+    vendor_export_rows,
+    vendor_order_items,
+    vendor_order_kpis,
+)
+from .vendor_reviews import (
+    parse_rating_filter,
+    public_reviews_cache_key,
+    serialize_review,
+    vendor_reviews,
+)
+from .vendor_stats import get_vendor_stats, rating_summary
+from .product_limits import ProductLimitReached, product_slot
 from .auth_api import _vendor_subscription_payload, _isoformat_or_none, SUBSCRIPTION_RENEWAL_DAYS
 
 logger = logging.getLogger(__name__)
 
+# Longest range vendor_analytics_api serves in one request.
+ANALYTICS_MAX_DAYS = 731
+
 
 @swagger_auto_schema(
     method="post",
@@ -419,22 +443,10 @@ def my_store_api(request):
             )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-    # Get product count (excluding deleted products)
-    product_count = (
-        Product.objects.filter(vendor=vendor_profile)
-        .exclude(status=Product.DELETED)
-        .count()
-    )
+    # Products not deleted, maintained by userprofile.product_limits
+    product_count = vendor_profile.active_product_count
 
-    # Calculate average rating and total reviews
-    from django.db.models import Avg, Count
-
-    reviews_stats = Review.objects.filter(
-        product__vendor=vendor_profile, approved_review=True
-    ).aggregate(average_rating=Avg("rating"), total_reviews=Count("id"))
-
-    average_rating = reviews_stats["average_rating"] or 0.0
-    total_reviews = reviews_stats["total_reviews"] or 0
+    ratings = rating_summary(get_vendor_stats(vendor_profile))
 
     # Get vendor's full name
     vendor_name = f"{request.user.first_name} {request.user.last_name}".strip()
@@ -461,8 +473,8 @@ def my_store_api(request):
         "instagram_handle": vendor_profile.instagram_handle,
         "tiktok_handle": vendor_profile.tiktok_handle,
         "is_verified": vendor_profile.is_verified,
-        "average_rating": round(average_rating, 1),
-        "total_reviews": total_reviews,
+        "average_rating": ratings["average_rating"],
+        "total_reviews": ratings["total_reviews"],
         "product_count": product_count,
         **_vendor_subscription_payload(vendor_profile),
     }
@@ -652,10 +664,8 @@ def my_subscription_status_api(request):
             "max_products": vendor.plan.max_products,
         }
 
-    # Product usage statistics
-    current_product_count = Product.objects.filter(
-        vendor=vendor, status=Product.ACTIVE
-    ).count()
+    # Product usage statistics: the same count the plan limit is checked against
+    current_product_count = vendor.active_product_count
 
     max_allowed = vendor.plan.max_products if vendor.plan else 0
     remaining = max(0, max_allowed - current_product_count)
@@ -773,13 +783,22 @@ def my_subscription_status_api(request):
 @permission_classes([IsAuthenticated, HasActiveSubscription, VendorFeatureAccess])
 @parser_classes([MultiPartParser, FormParser])
 def add_product_api(request):
+    limit_reached = Response(
+        {"error": "Product limit reached for your plan."}, status=status.HTTP_403_FORBIDDEN
+    )
     if not can_create_product(request.user):
-        return Response({"error": "Product limit reached for your plan."}, status=status.HTTP_403_FORBIDDEN)
+        return limit_reached
     serializer = ProductCreateSerializer(data=request.data)
-    if serializer.is_valid():
-        product = serializer.save(vendor=request.user.vendor_profile)
-        return Response({"success": True, "product_id": product.id})
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    vendor = request.user.vendor_profile
+    try:
+        with product_slot(vendor):
+            product = serializer.save(vendor=vendor)
+    except ProductLimitReached:
+        return limit_reached
+    return Response({"success": True, "product_id": product.id})
 
 
 @swagger_auto_schema(
@@ -906,9 +925,48 @@ def delete_product_api(request, pk):
     )
 
 
+# Query filters shared by the vendor order list and export (see vendor_orders).
+_order_filter_parameters = [
+    openapi.Parameter(
+        "fulfilled",
+        openapi.IN_QUERY,
+        description="Only fulfilled (true) or unfulfilled (false) items",
+        type=openapi.TYPE_BOOLEAN,
+        required=False,
+    ),
+    openapi.Parameter(
+        "date_from",
+        openapi.IN_QUERY,
+        description="Orders placed on or after this date (YYYY-MM-DD)",
+        type=openapi.TYPE_STRING,
+        format=openapi.FORMAT_DATE,
+        required=False,
+    ),
+    openapi.Parameter(
+        "date_to",
+        openapi.IN_QUERY,
+        description="Orders placed on or before this date (YYYY-MM-DD)",
+        type=openapi.TYPE_STRING,
+        format=openapi.FORMAT_DATE,
+        required=False,
+    ),
+    openapi.Parameter(
+        "pickup_location",
+        openapi.IN_QUERY,
+        description="Only orders for this pickup location",
+        type=openapi.TYPE_STRING,
+        enum=[choice for choice, _ in Order.PICKUP_CHOICES],
+        required=False,
+    ),
+]
+
+
 @swagger_auto_schema(
     method="get",
-    operation_description="Get all orders for a vendor with KPIs",
+    operation_description=(
+        "Get all orders for a vendor with KPIs. The optional filters narrow "
+        "both the order list and the KPIs."
+    ),
     security=[{"Bearer": []}],
     manual_parameters=[
         openapi.Parameter(
@@ -918,6 +976,7 @@ def delete_product_api(request, pk):
             type=openapi.TYPE_INTEGER,
             required=False,
         ),
+        *_order_filter_parameters,
     ],
     responses={
         200: openapi.Response(
@@ -950,6 +1009,7 @@ def delete_product_api(request, pk):
                 },
             ),
         ),
+        400: openapi.Response(description="Invalid filter"),
         403: openapi.Response(description="User is not a vendor"),
         401: openapi.Response(description="Authentication required"),
     },
@@ -965,31 +1025,13 @@ def vendor_order_list_api(request):
         )
 
     vendor = request.user.vendor_profile
-    order_items = (
-        OrderItem.objects.filter(product__vendor=vendor)
-        .select_related("order", "product")
-        .order_by("-order__created_at")
-    )
-
-    # Calculate KPIs
-    total_orders = order_items.count()
-    pending_orders = order_items.filter(fulfilled=False).count()
-    completed_orders = order_items.filter(fulfilled=True).count()
-
-    # Get unique orders for this vendor and calculate cancelled orders
-    vendor_orders = Order.objects.filter(items__product__vendor=vendor).distinct()
-
-    # Cancelled orders are those with failed payments or no payments
-    cancelled_orders = (
-        vendor_orders.filter(
-            Q(payments__status="failed") | Q(payments__isnull=True, is_paid=False)
-        )
-        .distinct()
-        .count()
-    )
+    try:
+        order_items = vendor_order_items(vendor, request.GET)
+    except OrderFilterError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-    # Total revenue from completed orders
-    total_revenue = sum(item.price for item in order_items.filter(fulfilled=True))
+    # All KPIs in one aggregate query
+    kpis = vendor_order_kpis(order_items)
 
     # Paginate order items
     paginator = StandardResultsPagination()
@@ -997,18 +1039,6 @@ def vendor_order_list_api(request):
 
     serializer = VendorOrderItemSerializer(result_page, many=True)
 
-    # Create response with KPIs
-    kpis = {
-        "total_orders": total_orders,
-        "pending_orders": pending_orders,
-        "completed_orders": completed_orders,
-        "cancelled_orders": cancelled_orders,
-        "total_revenue": total_revenue,
-        "completion_rate": round(
-            (completed_orders / total_orders * 100) if total_orders > 0 else 0, 2
-        ),
-    }
-
     # Create custom response data
     response_data = {
         "count": paginator.page.paginator.count,
@@ -1021,6 +1051,57 @@ def vendor_order_list_api(request):
     return Response(response_data)
 
 
+@swagger_auto_schema(
+    method="get",
+    operation_summary="Export vendor orders",
+    operation_description=(
+        "Stream every order item of the authenticated vendor, newest first, "
+        "as CSV or JSON Lines. Takes the same filters as the order list; "
+        "rows are streamed in chunks, so exports of any size use constant "
+        "memory."
+    ),
+    security=[{"Bearer": []}],
+    manual_parameters=[
+        openapi.Parameter(
+            "fmt",
+            openapi.IN_QUERY,
+            description="Export format (default: csv)",
+            type=openapi.TYPE_STRING,
+            enum=list(EXPORT_FORMATS),
+            required=False,
+        ),
+        *_order_filter_parameters,
+    ],
+    responses={
+        200: openapi.Response(description="CSV or JSON Lines file"),
+        400: openapi.Response(description="Invalid format or filter"),
+        403: openapi.Response(description="User is not a vendor"),
+    },
+    tags=["Vendor Orders"],
+)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, VendorFeatureAccess])
+def vendor_order_export_api(request):
+    # "format" is DRF's renderer override parameter, hence "fmt".
+    fmt = request.GET.get("fmt", CSV)
+    if fmt not in EXPORT_FORMATS:
+        return Response(
+            {"error": "fmt must be one of: csv, jsonl."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    vendor = request.user.vendor_profile
+    try:
+        columns, rows = vendor_export_rows(
+            vendor, request.GET, chunk_size=settings.EXPORT_CHUNK_SIZE
+        )
+    except OrderFilterError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    filename = f"orders-{vendor.pk}-{timezone.localdate().isoformat()}"
+    return streaming_export(columns, rows, fmt, filename)
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated, VendorFeatureAccess])
 def order_detail_api(request, pk):
@@ -1074,6 +1155,107 @@ def toggle_fulfillment_api(request, pk):
     )
 
 
+_fulfillment_response = openapi.Response(
+    description="Number of order items changed",
+    schema=openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        properties={
+            "success": openapi.Schema(type=openapi.TYPE_BOOLEAN),
+            "fulfilled": openapi.Schema(type=openapi.TYPE_BOOLEAN),
+            "updated": openapi.Schema(type=openapi.TYPE_INTEGER),
+        },
+    ),
+)
+
+
+@swagger_auto_schema(
+    method="post",
+    operation_summary="Set fulfillment for many order items",
+    operation_description=(
+        "Mark the authenticated vendor's paid order items fulfilled or "
+        "unfulfilled in one update. Items are selected by item_ids, order_id "
+        "and/or pickup_location; when several are given an item must match "
+        "all of them. Items of other vendors or unpaid orders are skipped."
+    ),
+    security=[{"Bearer": []}],
+    request_body=BulkFulfillmentSerializer,
+    responses={
+        200: _fulfillment_response,
+        400: openapi.Response(description="Invalid request body"),
+        403: openapi.Response(description="User is not a vendor"),
+    },
+    tags=["Vendor Orders"],
+)
+@api_view(["POST"])
+@permission_classes([IsAuthenticated, VendorFeatureAccess])
+def bulk_fulfillment_api(request):
+    serializer = BulkFulfillmentSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    fulfilled = serializer.validated_data.pop("fulfilled")
+    updated = set_fulfillment(
+        request.user.vendor_profile, fulfilled, **serializer.validated_data
+    )
+    return Response(
+        {"success": True, "fulfilled": fulfilled, "updated": updated},
+        status=status.HTTP_200_OK,
+    )
+
+
+@swagger_auto_schema(
+    method="post",
+    operation_summary="Set fulfillment for an order",
+    operation_description=(
+        "Mark every item of the authenticated vendor in a paid order "
+        "fulfilled (default) or unfulfilled."
+    ),
+    security=[{"Bearer": []}],
+    request_body=openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        properties={"fulfilled": openapi.Schema(type=openapi.TYPE_BOOLEAN, default=True)},
+    ),
+    responses={
+        200: _fulfillment_response,
+        400: openapi.Response(description="Order not paid"),
+        404: openapi.Response(description="Order not found or has none of your items"),
+    },
+    tags=["Vendor Orders"],
+)
+@api_view(["POST"])
+@permission_classes([IsAuthenticated, VendorFeatureAccess])
+def order_fulfillment_api(request, pk):
+    vendor = request.user.vendor_profile
+    order = (
+        Order.objects.filter(pk=pk, items__product__vendor=vendor)
+        .only("pk", "is_paid")
+        .first()
+    )
+    if order is None:
+        return Response(
+            {"error": "Order not found or unauthorized."},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+    if not order.is_paid:
+        return Response(
+            {"success": False, "message": "Order not paid."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    serializer = BulkFulfillmentSerializer(
+        data={"order_id": order.pk, "fulfilled": request.data.get("fulfilled", True)}
+    )
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    fulfilled = serializer.validated_data["fulfilled"]
+    updated = set_fulfillment(vendor, fulfilled, order_id=order.pk)
+    return Response(
+        {"success": True, "fulfilled": fulfilled, "updated": updated},
+        status=status.HTTP_200_OK,
+    )
+
+
 @swagger_auto_schema(
     method="get",
     operation_description="Get all reviews for a vendor's products",
@@ -1170,82 +1352,22 @@ def vendor_reviews_api(request):
 
     vendor = request.user.vendor_profile
 
-    # Get all reviews for this vendor's products
-    from store.models import Review
-    from django.db.models import Avg, Count
-
-    all_reviews = Review.objects.filter(product__vendor=vendor).select_related(
-        "product", "author"
-    )
-
-    # Calculate rating statistics
-    rating_stats = all_reviews.aggregate(
-        average_rating=Avg("rating"), total_reviews=Count("id")
-    )
-
-    # Get rating breakdown in a single query, then unpack.
-    counts_by_rating = {
-        row["rating"]: row["count"]
-        for row in all_reviews.values("rating").annotate(count=Count("id"))
-    }
-    rating_breakdown = {
-        f"{n}_star": counts_by_rating.get(n, 0) for n in range(5, 0, -1)
-    }
-
-    # Get reviews for pagination (after calculating stats)
-    reviews = all_reviews.order_by("-created_date")
-
-    # Filter by rating if provided
-    rating = request.GET.get("rating")
-    if rating:
-        try:
-            rating = int(rating)
-            if 1 <= rating <= 5:
-                reviews = reviews.filter(rating=rating)
-        except (ValueError, TypeError):
-            pass  # Invalid rating, ignore filter
+    reviews = vendor_reviews(vendor, rating=parse_rating_filter(request.GET.get("rating")))
 
     paginator = StandardResultsPagination()
     result_page = paginator.paginate_queryset(reviews, request)
 
-    # Create custom serialized data
-    serialized_reviews = []
-    if result_page is not None:
-        for review in result_page:
-            serialized_reviews.append(
-                {
-                    "id": review.id,
-                    "product": {
-                        "id": review.product.id,
-                        "title": review.product.title,
-                        "slug": review.product.slug,
-                    },
-                    "author": {
-                        "id": review.author.id,
-                        "name": f"{review.author.first_name} {review.author.last_name}".strip()
-                        or review.author.user_name,
-                    },
-                    "rating": review.rating,
-                    "text": review.text,
-                    "created_at": review.created_date,
-                }
-            )
+    serialized_reviews = [
+        serialize_review(review, include_author_id=True) for review in result_page or []
+    ]
 
-    # Prepare response data with statistics
+    # Statistics come from the vendor's rating histogram, not a scan of Review.
     response_data = {
         "count": paginator.page.paginator.count if result_page is not None else 0,
         "next": paginator.get_next_link() if result_page is not None else None,
         "previous": paginator.get_previous_link() if result_page is not None else None,
         "results": serialized_reviews,
-        "rating_stats": {
-            "average_rating": (
-                round(rating_stats["average_rating"], 1)
-                if rating_stats["average_rating"]
-                else 0.0
-            ),
-            "total_reviews": rating_stats["total_reviews"],
-            "rating_breakdown": rating_breakdown,
-        },
+        "rating_stats": rating_summary(get_vendor_stats(vendor)),
     }
 
     return Response(response_data, status=status.HTTP_200_OK)
@@ -1290,6 +1412,7 @@ def vendor_reviews_api(request):
                         type=openapi.TYPE_ARRAY,
                         items=openapi.Schema(type=openapi.TYPE_OBJECT),
                     ),
+                    "rating_stats": openapi.Schema(type=openapi.TYPE_OBJECT),
                 },
             ),
         ),
@@ -1302,62 +1425,44 @@ def vendor_reviews_public_api(request, vendor_id):
     """
     Get all reviews for a specific vendor's products (public endpoint).
 
-    Returns a paginated list of all reviews for products belonging to the specified vendor.
-    This is a public endpoint that doesn't require authentication.
+    Returns a paginated list of approved reviews for products belonging to the
+    specified vendor, with its rating statistics. This is a public endpoint
+    that doesn't require authentication; pages are cached per vendor, page and
+    rating filter until one of the vendor's reviews or products changes.
     """
-    try:
-        vendor = VendorProfile.objects.get(id=vendor_id)
-    except VendorProfile.DoesNotExist:
-        return Response(
-            {"error": "Vendor not found."},
-            status=status.HTTP_404_NOT_FOUND,
-        )
-
-    # Get all reviews for this vendor's products
-    from store.models import Review
-
-    reviews = (
-        Review.objects.filter(product__vendor=vendor)
-        .select_related("product", "author")
-        .order_by("-created_date")
+    rating = parse_rating_filter(request.GET.get("rating"))
+    paginator = StandardResultsPagination()
+    cache_key = public_reviews_cache_key(
+        vendor_id,
+        request.GET.get(paginator.page_query_param, 1),
+        paginator.get_page_size(request),
+        rating,
     )
 
-    # Filter by rating if provided
-    rating = request.GET.get("rating")
-    if rating:
+    data = cache.get(cache_key)
+    if data is None:
         try:
-            rating = int(rating)
-            if 1 <= rating <= 5:
-                reviews = reviews.filter(rating=rating)
-        except (ValueError, TypeError):
-            pass  # Invalid rating, ignore filter
-
-    paginator = StandardResultsPagination()
-    result_page = paginator.paginate_queryset(reviews, request)
-
-    # Create custom serialized data
-    serialized_reviews = []
-    if result_page is not None:
-        for review in result_page:
-            serialized_reviews.append(
-                {
-                    "id": review.id,
-                    "product": {
-                        "id": review.product.id,
-                        "title": review.product.title,
-                        "slug": review.product.slug,
-                    },
-                    "author": {
-                        "name": f"{review.author.first_name} {review.author.last_name}".strip()
-                        or review.author.user_name,
-                    },
-                    "rating": review.rating,
-                    "text": review.text,
-                    "created_at": review.created_date,
-                }
+            vendor = VendorProfile.objects.get(id=vendor_id)
+        except VendorProfile.DoesNotExist:
+            return Response(
+                {"error": "Vendor not found."},
+                status=status.HTTP_404_NOT_FOUND,
             )
 
-    return paginator.get_paginated_response(serialized_reviews)
+        reviews = vendor_reviews(vendor, rating=rating, approved_only=True)
+        result_page = paginator.paginate_queryset(reviews, request)
+        data = {
+            "count": paginator.page.paginator.count,
+            "next": paginator.get_next_link(),
+            "previous": paginator.get_previous_link(),
+            "results": [serialize_review(review) for review in result_page],
+            "rating_stats": rating_summary(get_vendor_stats(vendor)),
+        }
+        cache.set(cache_key, data, settings.VENDOR_REVIEWS_CACHE_SECONDS)
+
+    response = Response(data, status=status.HTTP_200_OK)
+    patch_cache_control(response, public=True, max_age=settings.VENDOR_REVIEWS_CACHE_SECONDS)
+    return response
 
 
 @swagger_auto_schema(
@@ -1487,3 +1592,119 @@ def vendor_kpis_api(request):
 
     from .services import get_vendor_kpis
     return Response(get_vendor_kpis(vendor), status=status.HTTP_200_OK)
+
+
+@swagger_auto_schema(
+    method="get",
+    operation_summary="Vendor sales time series",
+    operation_description=(
+        "Paid orders, units sold and revenue for the authenticated vendor by "
+        "day, week (starting Monday) or month, plus totals and top products "
+        "for the range. Read from the daily sales rollups, so the cost does "
+        "not grow with order history. Defaults to the last 30 days."
+    ),
+    security=[{"Bearer": []}],
+    manual_parameters=[
+        openapi.Parameter(
+            "granularity",
+            openapi.IN_QUERY,
+            description="Bucket size (default: day)",
+            type=openapi.TYPE_STRING,
+            enum=["day", "week", "month"],
+            required=False,
+        ),
+        openapi.Parameter(
+            "from",
+            openapi.IN_QUERY,
+            description="First day, inclusive (YYYY-MM-DD)",
+            type=openapi.TYPE_STRING,
+            format=openapi.FORMAT_DATE,
+            required=False,
+        ),
+        openapi.Parameter(
+            "to",
+            openapi.IN_QUERY,
+            description="Last day, inclusive (YYYY-MM-DD, default: today)",
+            type=openapi.TYPE_STRING,
+            format=openapi.FORMAT_DATE,
+            required=False,
+        ),
+    ],
+    responses={
+        200: openapi.Response(
+            description="Sales series",
+            schema=openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    "granularity": openapi.Schema(type=openapi.TYPE_STRING),
+                    "from": openapi.Schema(type=openapi.TYPE_STRING),
+                    "to": openapi.Schema(type=openapi.TYPE_STRING),
+                    "series": openapi.Schema(
+                        type=openapi.TYPE_ARRAY,
+                        items=openapi.Schema(
+                            type=openapi.TYPE_OBJECT,
+                            properties={
+                                "period": openapi.Schema(type=openapi.TYPE_STRING),
+                                "orders": openapi.Schema(type=openapi.TYPE_INTEGER),
+                                "units_sold": openapi.Schema(type=openapi.TYPE_INTEGER),
+                                "revenue": openapi.Schema(type=openapi.TYPE_INTEGER),
+                            },
+                        ),
+                    ),
+                    "totals": openapi.Schema(type=openapi.TYPE_OBJECT),
+                    "top_products": openapi.Schema(
+                        type=openapi.TYPE_ARRAY,
+                        items=openapi.Schema(type=openapi.TYPE_OBJECT),
+                    ),
+                },
+            ),
+        ),
+        400: openapi.Response(description="Invalid granularity or date range"),
+        403: openapi.Response(description="User is not a vendor"),
+    },
+    tags=["Vendor KPIs"],
+)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated, VendorFeatureAccess])
+def vendor_analytics_api(request):
+    vendor = request.user.vendor_profile
+
+    granularity = request.GET.get("granularity", DAY)
+    if granularity not in GRANULARITIES:
+        return Response(
+            {"error": "granularity must be one of: day, week, month."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    try:
+        end = timezone.localdate()
+        if request.GET.get("to"):
+            end = parse_date_param("to", request.GET["to"])
+        start = end - timedelta(days=29)
+        if request.GET.get("from"):
+            start = parse_date_param("from", request.GET["from"])
+    except OrderFilterError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if start > end:
+        return Response(
+            {"error": "'from' must not be after 'to'."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if (end - start).days >= ANALYTICS_MAX_DAYS:
+        return Response(
+            {"error": f"Date range is limited to {ANALYTICS_MAX_DAYS} days."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    data = vendor_sales_series(vendor, granularity, start, end)
+    return Response(
+        {
+            "granularity": granularity,
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            **data,
+        },
+        status=status.HTTP_200_OK,
+    )
+
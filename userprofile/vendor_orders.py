@@ -0,0 +1,154 @@
+"""
+Vendor order queries shared by the vendor order endpoints.
+
+``vendor_order_items`` applies the dashboard's optional filters, and
+``vendor_order_kpis`` computes every KPI in a single conditional-aggregate
+query, so the dashboard costs the same number of queries however many
+order lines a vendor has. ``set_fulfillment`` marks a batch of order lines
+with one scoped UPDATE, and ``vendor_export_rows`` feeds the streaming
+order export.
+"""
+from django.db.models import Count, Exists, OuterRef, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils.dateparse import parse_date
+
+from store.dates import date_range_lookups
+from store.models import Order, OrderItem, Payment
+
+
+class OrderFilterError(ValueError):
+    """Raised for an invalid filter query parameter."""
+
+
+def _parse_bool(name, value):
+    lowered = value.lower()
+    if lowered in ("true", "1", "yes"):
+        return True
+    if lowered in ("false", "0", "no"):
+        return False
+    raise OrderFilterError(f"'{name}' must be true or false.")
+
+
+def parse_date_param(name, value):
+    """Parse a YYYY-MM-DD query parameter or raise ``OrderFilterError``."""
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise OrderFilterError(f"'{name}' must be a date in YYYY-MM-DD format.")
+    return parsed
+
+
+def vendor_order_items(vendor, params=None):
+    """
+    Order lines for ``vendor``, newest order first, with optional filters.
+
+    ``params`` is a query dict that may contain ``fulfilled`` (true/false),
+    ``date_from`` / ``date_to`` (inclusive, YYYY-MM-DD, on the order date)
+    and ``pickup_location``. Raises ``OrderFilterError`` for invalid values.
+    """
+    params = params or {}
+    items = OrderItem.objects.filter(product__vendor=vendor)
+
+    if params.get("fulfilled"):
+        items = items.filter(fulfilled=_parse_bool("fulfilled", params["fulfilled"]))
+    date_from = params.get("date_from")
+    date_to = params.get("date_to")
+    if date_from or date_to:
+        # A datetime range, not __date, so the Order.created_at indexes apply.
+        items = items.filter(
+            **date_range_lookups(
+                "order__created_at",
+                start=parse_date_param("date_from", date_from) if date_from else None,
+                end=parse_date_param("date_to", date_to) if date_to else None,
+            )
+        )
+    if params.get("pickup_location"):
+        location = params["pickup_location"]
+        if location not in dict(Order.PICKUP_CHOICES):
+            raise OrderFilterError(f"Unknown pickup_location '{location}'.")
+        items = items.filter(order__pickup_location=location)
+
+    return items.select_related("order", "product").order_by("-order__created_at", "-pk")
+
+
+def vendor_order_kpis(items):
+    """
+    Dashboard KPIs for the order lines in ``items``, in one query.
+
+    An order counts as cancelled when one of its payments failed, or when
+    it is unpaid and has no payment at all.
+    """
+    failed_payment = Payment.objects.filter(order=OuterRef("order"), status="failed")
+    any_payment = Payment.objects.filter(order=OuterRef("order"))
+
+    totals = items.order_by().aggregate(
+        total_orders=Count("pk"),
+        pending_orders=Count("pk", filter=Q(fulfilled=False)),
+        completed_orders=Count("pk", filter=Q(fulfilled=True)),
+        cancelled_orders=Count(
+            "order",
+            distinct=True,
+            filter=Q(Exists(failed_payment))
+            | Q(~Exists(any_payment), order__is_paid=False),
+        ),
+        total_revenue=Coalesce(Sum("price", filter=Q(fulfilled=True)), 0),
+    )
+    total, completed = totals["total_orders"], totals["completed_orders"]
+    totals["completion_rate"] = round((completed / total * 100) if total > 0 else 0, 2)
+    return totals
+
+
+EXPORT_COLUMNS = (
+    ("item_id", "pk"),
+    ("order_ref", "order__ref"),
+    ("order_date", "order__created_at"),
+    ("paid", "order__is_paid"),
+    ("product_id", "product_id"),
+    ("product_title", "product__title"),
+    ("quantity", "quantity"),
+    ("price", "price"),
+    ("fulfilled", "fulfilled"),
+    ("first_name", "order__first_name"),
+    ("last_name", "order__last_name"),
+    ("phone", "order__phone"),
+    ("pickup_location", "order__pickup_location"),
+)
+
+
+def vendor_export_rows(vendor, params=None, chunk_size=2000):
+    """
+    Column names and a row iterator for exporting ``vendor``'s order lines.
+
+    Accepts the ``vendor_order_items`` filters. Rows are plain tuples
+    streamed from the database ``chunk_size`` at a time.
+    """
+    items = vendor_order_items(vendor, params)
+    columns = [name for name, _ in EXPORT_COLUMNS]
+    rows = items.values_list(*(lookup for _, lookup in EXPORT_COLUMNS)).iterator(
+        chunk_size=chunk_size
+    )
+    return columns, rows
+
+
+def set_fulfillment(vendor, fulfilled, item_ids=None, order_id=None, pickup_location=None):
+    """
+    Set ``fulfilled`` on ``vendor``'s paid order lines in one UPDATE.
+
+    The lines are narrowed by every scope given: explicit ``item_ids``, one
+    order, and/or a pickup location. Lines of other vendors and of unpaid
+    orders are never touched. Returns the number of lines changed.
+
+    VendorStats keeps no fulfillment counters (dashboard fulfillment KPIs
+    are aggregated live by ``vendor_order_kpis``), so nothing else needs
+    adjusting here.
+    """
+    items = OrderItem.objects.filter(product__vendor=vendor, order__is_paid=True)
+    if item_ids is not None:
+        items = items.filter(pk__in=item_ids)
+    if order_id is not None:
+        items = items.filter(order_id=order_id)
+    if pickup_location is not None:
+        items = items.filter(order__pickup_location=pickup_location)
+    return items.exclude(fulfilled=fulfilled).update(fulfilled=fulfilled)
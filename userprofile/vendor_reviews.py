@@ -0,0 +1,71 @@
+"""
+Review listings for the vendor review endpoints.
+
+The rating histogram shown with each listing comes from ``VendorStats`` (see
+``userprofile.vendor_stats``). Public pages are cached under a per-vendor
+version token that ``invalidate_public_reviews`` replaces whenever one of
+the vendor's reviews or products changes, so stale pages are never read
+again and simply expire.
+"""
+import time
+
+from django.core.cache import cache
+
+
+def parse_rating_filter(value):
+    """The ``rating`` query parameter as 1-5, or ``None`` to show every rating."""
+    try:
+        rating = int(value)
+    except (TypeError, ValueError):
+        return None
+    return rating if 1 <= rating <= 5 else None
+
+
+def vendor_reviews(vendor, rating=None, approved_only=False):
+    """Reviews of ``vendor``'s products, newest first, with author and product loaded."""
+    from store.models import Review
+
+    reviews = Review.objects.filter(product__vendor=vendor)
+    if approved_only:
+        reviews = reviews.filter(approved_review=True)
+    if rating is not None:
+        reviews = reviews.filter(rating=rating)
+    return reviews.select_related("author", "product").order_by("-created_date", "-pk")
+
+
+def serialize_review(review, include_author_id=False):
+    author = {
+        "name": f"{review.author.first_name} {review.author.last_name}".strip()
+        or review.author.user_name,
+    }
+    if include_author_id:
+        author = {"id": review.author.id, **author}
+    return {
+        "id": review.id,
+        "product": {
+            "id": review.product.id,
+            "title": review.product.title,
+            "slug": review.product.slug,
+        },
+        "author": author,
+        "rating": review.rating,
+        "text": review.text,
+        "created_at": review.created_date,
+    }
+
+
+# ── Public page cache ────────────────────────────────────────────────────────
+
+
+def _version_key(vendor_id):
+    return f"vendor_reviews:{vendor_id}:version"
+
+
+def public_reviews_cache_key(vendor_id, page, page_size, rating):
+    version = cache.get_or_set(_version_key(vendor_id), time.time_ns, None)
+    return f"vendor_reviews:{vendor_id}:{version}:{page}:{page_size}:{rating}"
+
+
+def invalidate_public_reviews(vendor_id):
+    """Retire every cached public review page of ``vendor_id``."""
+    cache.set(_version_key(vendor_id), time.time_ns(), None)
@@ -0,0 +1,353 @@
+"""
+Incrementally maintained vendor dashboard counters (``VendorStats``).
+
+* Paid orders and subscription events are append-only, so they are applied
+  as ``F()`` deltas: ``record_order_paid`` runs inside ``finalize_payment``'s
+  transaction and ``record_subscription_event`` inside
+  ``SubscriptionHistory.log_event``.
+* Reviews are edited in place (views, serializers, admin); the signals in
+  ``userprofile.signals`` remember a review's previous rating and
+  ``record_review_change`` applies the difference to the rating histogram.
+* Products are handled the same way: the signals remember a product's
+  previous vendor, status and quantity and ``record_product_change`` moves
+  its contribution. Stock moves made with queryset UPDATEs report the change
+  they applied to ``product_stock_changed``, whose deltas are applied once
+  the transaction commits so checkouts do not hold the stats row.
+
+A vendor's row is created empty with the vendor, or by a full rebuild;
+updates skip vendors without a row, since adding a delta to a fresh row
+would drop everything before it (``get_vendor_stats`` rebuilds missing rows
+on first use). ``rebuild_vendor_stats`` recomputes everything from the
+source tables and corrects any drift (run by ``manage.py
+rebuild_vendor_stats``).
+"""
+import logging
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import VendorProfile, VendorStats
+from .product_limits import recount_products
+
+logger = logging.getLogger(__name__)
+
+LOW_STOCK_THRESHOLD = 5
+
+SUBSCRIPTION_CHANGE_EVENTS = ("plan_upgraded", "plan_downgraded")
+
+
+def create_vendor_stats(vendor_id):
+    """Start the counters of a new vendor, which has nothing to count yet."""
+    _ensure_rows([vendor_id])
+
+
+def _ensure_rows(vendor_ids):
+    VendorStats.objects.bulk_create(
+        [VendorStats(vendor_id=vendor_id) for vendor_id in vendor_ids],
+        ignore_conflicts=True,
+    )
+
+
+def _update(vendor_id, **values):
+    VendorStats.objects.filter(vendor_id=vendor_id).update(
+        updated_at=timezone.now(), **values
+    )
+
+
+# ── Aggregates ───────────────────────────────────────────────────────────────
+
+
+def _rating_stats(vendor_ids):
+    from store.models import Review
+
+    rows = (
+        Review.objects.filter(product__vendor__in=vendor_ids, approved_review=True)
+        .values("product__vendor")
+        .annotate(
+            review_count=Count("pk"),
+            rating_total=Coalesce(Sum("rating"), 0.0),
+            **{
+                f"rating_{n}": Count("pk", filter=Q(rating=n))
+                for n in range(1, 6)
+            },
+        )
+    )
+    empty = {"review_count": 0, "rating_total": 0.0, **{f"rating_{n}": 0 for n in range(1, 6)}}
+    stats = {vendor_id: dict(empty) for vendor_id in vendor_ids}
+    for row in rows:
+        stats[row.pop("product__vendor")] = row
+    return stats
+
+
+def _product_stats(vendor_ids):
+    from store.models import Product
+
+    rows = (
+        Product.objects.filter(vendor__in=vendor_ids)
+        .values("vendor")
+        .annotate(
+            product_count=Count("pk"),
+            active_product_count=Count("pk", filter=Q(status=Product.ACTIVE)),
+            out_of_stock_count=Count("pk", filter=Q(quantity=0)),
+            low_stock_count=Count(
+                "pk", filter=Q(quantity__gt=0, quantity__lte=LOW_STOCK_THRESHOLD)
+            ),
+            inventory_total=Coalesce(Sum("quantity"), 0),
+        )
+    )
+    empty = {
+        "product_count": 0,
+        "active_product_count": 0,
+        "out_of_stock_count": 0,
+        "low_stock_count": 0,
+        "inventory_total": 0,
+    }
+    stats = {vendor_id: dict(empty) for vendor_id in vendor_ids}
+    for row in rows:
+        stats[row.pop("vendor")] = row
+    return stats
+
+
+def _sales_stats(vendor_ids):
+    from store.models import OrderItem
+
+    rows = (
+        OrderItem.objects.filter(product__vendor__in=vendor_ids, order__is_paid=True)
+        .values("product__vendor")
+        .annotate(
+            order_count=Count("order", distinct=True),
+            revenue=Coalesce(Sum("price"), 0),
+            units_sold=Coalesce(Sum("quantity"), 0),
+        )
+    )
+    stats = {
+        vendor_id: {"order_count": 0, "revenue": 0, "units_sold": 0}
+        for vendor_id in vendor_ids
+    }
+    for row in rows:
+        stats[row.pop("product__vendor")] = row
+    return stats
+
+
+def _subscription_stats(vendor_ids):
+    from .models import SubscriptionHistory
+
+    rows = (
+        SubscriptionHistory.objects.filter(vendor__in=vendor_ids)
+        .values("vendor")
+        .annotate(
+            subscription_payments=Count("pk", filter=Q(event_type="payment_success")),
+            failed_subscription_payments=Count("pk", filter=Q(event_type="payment_failed")),
+            subscription_payments_total=Coalesce(
+                Sum("amount", filter=Q(event_type="payment_success")),
+                0,
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            ),
+            subscription_changes=Count(
+                "pk", filter=Q(event_type__in=SUBSCRIPTION_CHANGE_EVENTS)
+            ),
+        )
+    )
+    stats = {
+        vendor_id: {
+            "subscription_payments": 0,
+            "failed_subscription_payments": 0,
+            "subscription_payments_total": 0,
+            "subscription_changes": 0,
+        }
+        for vendor_id in vendor_ids
+    }
+    for row in rows:
+        stats[row.pop("vendor")] = row
+    return stats
+
+
+# ── Incremental updates ──────────────────────────────────────────────────────
+
+
+def _apply_deltas(deltas):
+    """``deltas`` is ``{vendor_id: {field: change}}``; zero changes are skipped."""
+    for vendor_id, fields in deltas.items():
+        values = {field: F(field) + delta for field, delta in fields.items() if delta}
+        if values:
+            _update(vendor_id, **values)
+
+
+def _stock_counters(quantity):
+    return {
+        "out_of_stock_count": int(quantity == 0),
+        "low_stock_count": int(0 < quantity <= LOW_STOCK_THRESHOLD),
+        "inventory_total": quantity,
+    }
+
+
+def _product_counters(status, quantity):
+    from store.models import Product
+
+    return {
+        "product_count": 1,
+        "active_product_count": int(status == Product.ACTIVE),
+        **_stock_counters(quantity),
+    }
+
+
+def record_order_paid(order, lines=None):
+    """
+    Add a newly paid order to each of its vendors' sales counters.
+
+    ``lines`` is ``store.analytics.order_sales_lines(order)``, when the
+    caller already has it.
+    """
+    from store.analytics import order_sales_lines
+
+    lines = order_sales_lines(order) if lines is None else lines
+    vendors = defaultdict(lambda: {"revenue": 0, "units": 0})
+    for line in lines:
+        vendors[line["vendor_id"]]["revenue"] += line["revenue"]
+        vendors[line["vendor_id"]]["units"] += line["units"]
+
+    for vendor_id, totals in vendors.items():
+        _update(
+            vendor_id,
+            order_count=F("order_count") + 1,
+            revenue=F("revenue") + totals["revenue"],
+            units_sold=F("units_sold") + totals["units"],
+        )
+
+
+def record_subscription_event(event):
+    """Apply one ``SubscriptionHistory`` row to its vendor's counters."""
+    if event.event_type == "payment_success":
+        values = {"subscription_payments": F("subscription_payments") + 1}
+        if event.amount is not None:
+            values["subscription_payments_total"] = (
+                F("subscription_payments_total") + event.amount
+            )
+    elif event.event_type == "payment_failed":
+        values = {"failed_subscription_payments": F("failed_subscription_payments") + 1}
+    elif event.event_type in SUBSCRIPTION_CHANGE_EVENTS:
+        values = {"subscription_changes": F("subscription_changes") + 1}
+    else:
+        return
+    _update(event.vendor_id, **values)
+
+
+def record_review_change(before, after):
+    """
+    Move one review's contribution to the rating histogram.
+
+    ``before`` and ``after`` are ``(vendor_id, rating)`` for the review as it
+    was counted before and after the change, or ``None`` when it was not
+    counted (new, deleted or unapproved).
+    """
+    if before == after:
+        return
+    deltas = defaultdict(lambda: defaultdict(int))
+    for counted, sign in ((before, -1), (after, 1)):
+        if counted is None:
+            continue
+        vendor_id, rating = counted
+        deltas[vendor_id]["review_count"] += sign
+        deltas[vendor_id]["rating_total"] += sign * rating
+        if rating in range(1, 6):
+            deltas[vendor_id][f"rating_{int(rating)}"] += sign
+    _apply_deltas(deltas)
+
+
+def record_product_change(before, after):
+    """
+    Move one product's contribution to the product and inventory counters.
+
+    ``before`` and ``after`` are ``(vendor_id, status, quantity)`` for the
+    product before and after the change, or ``None`` when it did not exist.
+    """
+    if before == after:
+        return
+    deltas = defaultdict(lambda: defaultdict(int))
+    for counted, sign in ((before, -1), (after, 1)):
+        if counted is None:
+            continue
+        vendor_id, status, quantity = counted
+        for field, value in _product_counters(status, quantity).items():
+            deltas[vendor_id][field] += sign * value
+    _apply_deltas(deltas)
+
+
+def product_stock_changed(changes):
+    """
+    Apply stock moved by queryset UPDATEs to the inventory counters.
+
+    ``changes`` maps product id to the change in quantity just applied
+    (negative when units were taken). Call it in the transaction that ran
+    the UPDATE, while those rows are still locked, so each old quantity is
+    the current one minus its change. The deltas are applied after commit.
+    """
+    from store.models import Product
+
+    deltas = defaultdict(lambda: defaultdict(int))
+    rows = Product.objects.filter(pk__in=list(changes)).values_list("pk", "vendor_id", "quantity")
+    for product_id, vendor_id, quantity in rows:
+        before = _stock_counters(quantity - changes[product_id])
+        for field, value in _stock_counters(quantity).items():
+            deltas[vendor_id][field] += value - before[field]
+    if deltas:
+        transaction.on_commit(lambda: _apply_deltas(deltas))
+
+
+def rating_summary(stats):
+    """Average, count and per-star breakdown of approved reviews, from ``stats``."""
+    average = stats.rating_total / stats.review_count if stats.review_count else 0
+    return {
+        "average_rating": round(average, 1),
+        "total_reviews": stats.review_count,
+        "rating_breakdown": {
+            f"{n}_star": getattr(stats, f"rating_{n}") for n in range(5, 0, -1)
+        },
+    }
+
+
+# ── Rebuild ──────────────────────────────────────────────────────────────────
+
+
+def rebuild_vendor_stats(vendor_ids=None):
+    """
+    Recompute every counter from the source tables, along with
+    ``VendorProfile.active_product_count``.
+
+    Rebuilds ``vendor_ids`` (default: every vendor). Returns the number of
+    vendors rebuilt.
+    """
+    if vendor_ids is None:
+        vendor_ids = list(VendorProfile.objects.values_list("pk", flat=True))
+    vendor_ids = list(vendor_ids)
+    if not vendor_ids:
+        return 0
+
+    _ensure_rows(vendor_ids)
+    parts = [
+        _rating_stats(vendor_ids),
+        _product_stats(vendor_ids),
+        _sales_stats(vendor_ids),
+        _subscription_stats(vendor_ids),
+    ]
+    now = timezone.now()
+    with transaction.atomic():
+        for vendor_id in vendor_ids:
+            values = {}
+            for part in parts:
+                values.update(part[vendor_id])
+            _update(vendor_id, rebuilt_at=now, **values)
+        recount_products(vendor_ids)
+    return len(vendor_ids)
+
+
+def get_vendor_stats(vendor):
+    """The vendor's ``VendorStats`` row, built on first use."""
+    stats = VendorStats.objects.filter(vendor=vendor).first()
+    if stats is None:
+        rebuild_vendor_stats([vendor.pk])
+        stats = VendorStats.objects.get(vendor=vendor)
+    return stats
@@ -2,6 +2,7 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from .models import UserProfile, VendorProfile
 from .custom_dec import vendor_required
+from .product_limits import ProductLimitReached, product_slot
 from store.models import Product, OrderItem, Order
 from .forms import UserProfileSignupForm
 from django.contrib.auth import login
@@ -63,7 +64,12 @@ def add_product(request):
             title = request.POST.get("title")
             product = form.save(commit=False)
             product.vendor = request.user.vendor_profile
-            product.save()  # Slug will be auto-generated in the model's save method
+            try:
+                with product_slot(product.vendor):
+                    product.save()  # Slug will be auto-generated in the model's save method
+            except ProductLimitReached:
+                messages.error(request, "Product limit reached for your plan.")
+                return redirect("my_store")
             messages.success(request, f"{title} was added successfully")
 
             return redirect("my_store")
@@ -1,42 +1,58 @@
-import hmac
-import hashlib
-import json
 import logging
 import requests
 from datetime import timedelta
 
-from django.conf import settings
 from django.http import HttpResponse
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 
 from .models import VendorProfile
 from .auth_api import SUBSCRIPTION_RENEWAL_DAYS
+from store.models import WebhookEvent
+from store.webhooks import (
+    WebhookHandlerError,
+    record_webhook_event,
+    verify_paystack_signature,
+)
 
 logger = logging.getLogger(__name__)
 
 
 @csrf_exempt
 def paystack_webhook(request):
+    """
+    Record a subscription webhook in the inbox and acknowledge it at once.
+
+    The event is applied later by the ``process_webhooks`` command via
+    ``handle_subscription_event``.
+    """
     signature = request.headers.get("x-paystack-signature")
     if not signature:
         return HttpResponse(status=400)
 
-    payload = request.body
-    computed_hash = hmac.new(
-        settings.PAYSTACK_SECRET_KEY.encode(), payload, hashlib.sha512
-    ).hexdigest()
-
-    if not hmac.compare_digest(computed_hash, signature):
+    if not verify_paystack_signature(request.body, signature):
         logger.warning("Invalid Paystack signature")
         return HttpResponse(status=403)
 
     try:
-        event_data = json.loads(payload.decode("utf-8"))
-    except json.JSONDecodeError as e:
+        record_webhook_event(WebhookEvent.SOURCE_SUBSCRIPTION, request.body)
+    except ValueError as e:
         logger.error(f"Webhook JSON error: {e}")
         return HttpResponse(status=400)
 
+    return HttpResponse(status=200)
+
+
+def handle_subscription_event(event_data):
+    """Inbox handler for subscription webhooks; raises to request a retry."""
+    response = dispatch_subscription_event(event_data)
+    if response.status_code >= 500:
+        raise WebhookHandlerError(
+            f"Subscription handler returned HTTP {response.status_code}"
+        )
+
+
+def dispatch_subscription_event(event_data):
     event = event_data.get("event")
     data = event_data.get("data", {})
 
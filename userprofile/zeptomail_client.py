@@ -1,32 +1,142 @@
 """
 ZeptoMail HTTP API Integration for VendorXprt
 Replaces SMTP with ZeptoMail's REST API for better deliverability
+
+The client keeps one pooled, keep-alive ``requests.Session`` and records
+per-send latency in ``zeptomail_client.metrics``. ``send_many`` fans several
+messages out concurrently (bounded by ``ZEPTOMAIL_MAX_WORKERS``) and sends
+identical messages to several recipients through the batch endpoint in a
+single call. ``ZEPTOMAIL_API_URL`` can point at a local HTTP stub in tests.
 """
 
 import requests
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from django.conf import settings
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
+from requests.adapters import HTTPAdapter
 import json
 
+from vendorxpert.http_metrics import HttpClientMetrics
+
+from .email_templates import render_email
+
 logger = logging.getLogger(__name__)
 
+DEFAULT_API_URL = "https://api.zeptomail.com/v1.1/email"
+
+# ZeptoMail accepts at most this many recipients per batch request.
+BATCH_RECIPIENT_LIMIT = 500
+
+
+class ZeptoMailError(Exception):
+    """Raised when ZeptoMail does not accept a message."""
+
 
 class ZeptoMailClient:
     """ZeptoMail HTTP API client for sending emails"""
 
-    def __init__(self):
-        self.api_key = getattr(settings, "ZEPTOMAIL_API_KEY", "")
+    def __init__(
+        self,
+        api_key=None,
+        base_url=None,
+        timeout=None,
+        max_workers=None,
+        pool_maxsize=20,
+    ):
+        self.api_key = api_key or getattr(settings, "ZEPTOMAIL_API_KEY", "")
         self.from_name = getattr(settings, "ZEPTOMAIL_FROM_NAME", "VendorXprt")
         self.from_email = getattr(
             settings, "ZEPTOMAIL_FROM_EMAIL", "noreply@vendorxprt.com"
         )
-        self.base_url = "https://api.zeptomail.com/v1.1/email"
+        self.base_url = (
+            base_url or getattr(settings, "ZEPTOMAIL_API_URL", DEFAULT_API_URL)
+        ).rstrip("/")
+        self.timeout = timeout or getattr(settings, "ZEPTOMAIL_TIMEOUT", (5, 30))
+        self.max_workers = max_workers or getattr(settings, "ZEPTOMAIL_MAX_WORKERS", 8)
+        # Same per-endpoint call/error/latency counters as the Paystack client.
+        self.metrics = HttpClientMetrics()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(
+            {
+                "accept": "application/json",
+                "content-type": "application/json",
+                "authorization": f"Zoho-enczapikey {self.api_key}",
+            }
+        )
 
         if not self.api_key:
             raise ValueError("ZEPTOMAIL_API_KEY not configured in settings")
 
+    def build_payload(
+        self,
+        to_email,
+        subject,
+        text_content,
+        html_content=None,
+        from_email=None,
+        from_name=None,
+        attachments=None,
+    ):
+        """
+        Build a send payload. ``to_email`` may be a single address or a list;
+        ``attachments`` are ZeptoMail ``{name, mime_type, content}`` dicts.
+        """
+        recipients = [to_email] if isinstance(to_email, str) else list(to_email)
+        payload = {
+            "from": {
+                "address": from_email or self.from_email,
+                "name": from_name or self.from_name,
+            },
+            "to": [
+                {"email_address": {"address": address, "name": ""}}
+                for address in recipients
+            ],
+            "subject": subject,
+            "textbody": text_content,
+        }
+        if html_content:
+            payload["htmlbody"] = html_content
+        if attachments:
+            payload["attachments"] = attachments
+        return payload
+
+    def deliver(self, payload, batch=False):
+        """
+        POST one payload, to the batch endpoint if ``batch`` is set.
+
+        Raises ``ZeptoMailError`` on a rejected message and
+        ``requests.RequestException`` on network failures.
+        """
+        endpoint = "batch" if batch else "email"
+        url = f"{self.base_url}/batch" if batch else self.base_url
+        started = time.monotonic()
+        try:
+            response = self.session.post(
+                url, data=json.dumps(payload), timeout=self.timeout
+            )
+        except requests.RequestException:
+            self.metrics.record(endpoint, (time.monotonic() - started) * 1000, error=True)
+            raise
+
+        elapsed_ms = (time.monotonic() - started) * 1000
+        # ZeptoMail returns 200 or 201 for success
+        ok = response.status_code in (200, 201)
+        self.metrics.record(endpoint, elapsed_ms, error=not ok)
+        logger.debug(
+            f"ZeptoMail {endpoint} to {len(payload['to'])} recipient(s) -> "
+            f"{response.status_code} in {elapsed_ms:.0f}ms"
+        )
+        if not ok:
+            raise ZeptoMailError(
+                f"ZeptoMail API error {response.status_code}: {response.text}"
+            )
+        return response.json()
+
     def send_email(
         self,
         to_email,
@@ -50,50 +160,20 @@ class ZeptoMailClient:
         Returns:
             bool: True if successful, False otherwise
         """
-
-        # Prepare sender information
-        sender_email = from_email or self.from_email
-        sender_name = from_name or self.from_name
-
-        # Build email payload
-        payload = {
-            "from": {"address": sender_email, "name": sender_name},
-            "to": [{"email_address": {"address": to_email, "name": ""}}],
-            "subject": subject,
-            "textbody": text_content,
-        }
-
-        # Add HTML content if provided
-        if html_content:
-            payload["htmlbody"] = html_content
-
-        # Prepare headers
-        headers = {
-            "accept": "application/json",
-            "content-type": "application/json",
-            "authorization": f"Zoho-enczapikey {self.api_key}",
-        }
+        payload = self.build_payload(
+            to_email, subject, text_content, html_content, from_email, from_name
+        )
 
         try:
             logger.info(f"Sending email via ZeptoMail to {to_email}")
             logger.debug(f"Subject: {subject}")
+            result = self.deliver(payload)
+            logger.info(f"Email sent successfully to {to_email}: {result}")
+            return True
 
-            # Send request to ZeptoMail API
-            response = requests.post(
-                self.base_url, data=json.dumps(payload), headers=headers, timeout=30
-            )
-
-            # Check response - ZeptoMail returns 200 or 201 for success
-            if response.status_code in [200, 201]:
-                result = response.json()
-                logger.info(f"Email sent successfully to {to_email}: {result}")
-                return True
-            else:
-                logger.error(
-                    f"ZeptoMail API error {response.status_code}: {response.text}"
-                )
-                return False
-
+        except ZeptoMailError as e:
+            logger.error(str(e))
+            return False
         except requests.exceptions.Timeout:
             logger.error(f"Timeout sending email to {to_email}")
             return False
@@ -104,6 +184,67 @@ class ZeptoMailClient:
             logger.error(f"Unexpected error sending email to {to_email}: {str(e)}")
             return False
 
+    def send_many(self, messages, max_workers=None):
+        """
+        Send several messages concurrently.
+
+        ``messages`` is a list of ``send_email`` keyword dicts. Messages with
+        identical sender, subject and bodies are merged into batch requests;
+        everything else is sent individually. Requests run in a thread pool
+        of at most ``max_workers`` (default ``ZEPTOMAIL_MAX_WORKERS``).
+
+        Returns a list aligned with ``messages``: ``None`` for each message
+        that was accepted, otherwise the exception that stopped it.
+        """
+        groups = {}
+        for index, message in enumerate(messages):
+            if message.get("attachments"):
+                # Attachments are per-recipient (e.g. receipts): never batched.
+                groups[("single", index)] = [index]
+                continue
+            key = (
+                message.get("from_email"),
+                message.get("from_name"),
+                message["subject"],
+                message["text_content"],
+                message.get("html_content"),
+            )
+            groups.setdefault(key, []).append(index)
+
+        jobs = []
+        for indexes in groups.values():
+            for start in range(0, len(indexes), BATCH_RECIPIENT_LIMIT):
+                chunk = indexes[start:start + BATCH_RECIPIENT_LIMIT]
+                first = messages[chunk[0]]
+                payload = self.build_payload(
+                    [messages[i]["to_email"] for i in chunk],
+                    first["subject"],
+                    first["text_content"],
+                    first.get("html_content"),
+                    first.get("from_email"),
+                    first.get("from_name"),
+                    first.get("attachments"),
+                )
+                jobs.append((chunk, payload, len(chunk) > 1))
+
+        def run(job):
+            _, payload, batch = job
+            try:
+                self.deliver(payload, batch=batch)
+            except Exception as e:
+                return e
+            return None
+
+        results = [None] * len(messages)
+        if not jobs:
+            return results
+        workers = min(max_workers or self.max_workers, len(jobs))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for (chunk, _, _), error in zip(jobs, pool.map(run, jobs)):
+                for index in chunk:
+                    results[index] = error
+        return results
+
     def send_template_email(
         self, to_email, subject, template_name, context, from_email=None, from_name=None
     ):
@@ -122,9 +263,8 @@ class ZeptoMailClient:
             bool: True if successful, False otherwise
         """
         try:
-            # Render templates
-            html_content = render_to_string(f"emails/{template_name}.html", context)
-            text_content = render_to_string(f"emails/{template_name}.txt", context)
+            # Render the precompiled templates
+            html_content, text_content = render_email(template_name, context)
 
             # Send email
             return self.send_email(
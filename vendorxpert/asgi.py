@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'vendorxpert.settings')
+# Serve long-poll endpoints with async views that don't hold a thread.
+os.environ.setdefault('PAYMENT_STATUS_ASYNC', 'True')
 
 application = get_asgi_application()
@@ -0,0 +1,44 @@
+"""
+Latency and error counters shared by the outbound HTTP clients.
+
+``store.paystack.PaystackClient`` and
+``userprofile.zeptomail_client.ZeptoMailClient`` each keep one
+``HttpClientMetrics`` as ``client.metrics``, keyed by endpoint.
+"""
+import threading
+from collections import defaultdict
+
+
+class HttpClientMetrics:
+    """Thread-safe per-endpoint call counts, error counts and latency totals."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._stats = defaultdict(
+                lambda: {"calls": 0, "errors": 0, "retries": 0, "total_ms": 0.0, "max_ms": 0.0}
+            )
+
+    def record(self, endpoint, elapsed_ms, error=False, retry=False):
+        with self._lock:
+            stats = self._stats[endpoint]
+            stats["calls"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            if error:
+                stats["errors"] += 1
+            if retry:
+                stats["retries"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                endpoint: {
+                    **stats,
+                    "avg_ms": round(stats["total_ms"] / stats["calls"], 2) if stats["calls"] else 0.0,
+                }
+                for endpoint, stats in self._stats.items()
+            }
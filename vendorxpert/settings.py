@@ -39,6 +39,18 @@ ALLOWED_HOSTS = [
 CART_SESSION_ID = "cart"
 SESSION_COOKIE_AGE = 86400
 
+# Cart storage for authenticated users. Use
+# "store.cart_storage.CacheCartStorage" to keep carts in the cache and write
+# them behind to CartItem every CART_WRITE_BEHIND_SECONDS. That backend
+# needs a cache shared between processes (set CACHE_BACKEND): the
+# flush_cart_storage command cannot see the default LocMemCache, and the
+# store.E001 system check refuses the combination.
+CART_STORAGE_BACKEND = config(
+    "CART_STORAGE_BACKEND", default="store.cart_storage.DatabaseCartStorage"
+)
+CART_CACHE_ALIAS = "default"
+CART_WRITE_BEHIND_SECONDS = config("CART_WRITE_BEHIND_SECONDS", default=30, cast=int)
+
 
 LOGIN_URL = "login"
 LOGOUT_REDIRECT_URL = "frontpage"
@@ -113,6 +125,20 @@ DATABASES = {
     }
 }
 
+# Cache
+# Local memory by default; point CACHE_BACKEND/CACHE_LOCATION at a shared
+# backend (file, Redis, Memcached) in production so every worker sees the
+# same cached carts.
+
+CACHES = {
+    "default": {
+        "BACKEND": config(
+            "CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": config("CACHE_LOCATION", default="vendorxpert"),
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -182,6 +208,49 @@ AUTH_USER_MODEL = "userprofile.UserProfile"
 
 PAYSTACK_SECRET_KEY = config("PAYSTACK_SECRET_KEY")
 PAYSTACK_BASE_URL = "https://api.paystack.co"
+PAYSTACK_TIMEOUT = (5, 30)  # (connect, read) seconds
+PAYSTACK_MAX_RETRIES = 2  # extra attempts for idempotent calls only
+
+# Bank list cache: served fresh for BANK_LIST_TTL, then stale (while one
+# background refresh runs) until BANK_LIST_STALE_TTL.
+BANK_LIST_TTL = 60 * 60 * 24
+BANK_LIST_STALE_TTL = 60 * 60 * 24 * 7
+BANK_LIST_FALLBACK_TTL = 60 * 5
+# A cold-cache request makes one Paystack attempt with this timeout before
+# falling back to the bundled table.
+BANK_LIST_COLD_TIMEOUT = 3
+BANK_LIST_BROWSER_MAX_AGE = 60 * 60
+
+# Account-name lookups (bank/resolve), cached per bank code + account number.
+ACCOUNT_RESOLVE_TTL = 60 * 60 * 24
+ACCOUNT_RESOLVE_NEGATIVE_TTL = 30
+
+# How long checkout holds stock for an unpaid order before
+# release_expired_reservations hands it back.
+STOCK_RESERVATION_MINUTES = config("STOCK_RESERVATION_MINUTES", default=30, cast=int)
+
+# verify_payment_api: reuse a pending payment's Paystack verification for a
+# few seconds, and serve a paid payment's response from the cache.
+PAYMENT_VERIFY_CACHE_SECONDS = 10
+PAYMENT_VERIFY_RESULT_TTL = 60 * 5
+
+# /api/vendor/<id>/reviews/: pages are cached per vendor, page and filter
+# until a review or product of that vendor changes, and sent with a public
+# Cache-Control max-age so shared caches can serve them too.
+VENDOR_REVIEWS_CACHE_SECONDS = config("VENDOR_REVIEWS_CACHE_SECONDS", default=300, cast=int)
+
+# Rows fetched per database round trip by the streaming CSV/JSONL exports.
+EXPORT_CHUNK_SIZE = 2000
+
+# /api/payment-status/<ref>/ long-poll. vendorxpert/asgi.py turns on the
+# async view; under WSGI the sync view re-checks every POLL_SECONDS.
+PAYMENT_STATUS_ASYNC = config("PAYMENT_STATUS_ASYNC", default=False, cast=bool)
+PAYMENT_STATUS_MAX_WAIT = 25
+PAYMENT_STATUS_POLL_SECONDS = 1.0
+
+# Webhook inbox worker (manage.py process_webhooks)
+WEBHOOK_MAX_ATTEMPTS = 8
+WEBHOOK_RETRY_BASE_SECONDS = 30
 
 ADMIN_SUBACCOUNT_CODE = config("ADMIN_SUBACCOUNT_CODE")
 
@@ -326,3 +395,23 @@ SERVER_EMAIL = config("SERVER_EMAIL", default=EMAIL_HOST_USER)
 # ZeptoMail Configuration
 ZEPTOMAIL_API_KEY = config("ZEPTOMAIL_API_KEY", default="")
 ZEPTOMAIL_FROM_NAME = config("ZEPTOMAIL_FROM_NAME", default="VendorXprt")
+ZEPTOMAIL_API_URL = config(
+    "ZEPTOMAIL_API_URL", default="https://api.zeptomail.com/v1.1/email"
+)
+ZEPTOMAIL_TIMEOUT = (5, 30)  # (connect, read) seconds
+ZEPTOMAIL_MAX_WORKERS = config("ZEPTOMAIL_MAX_WORKERS", default=8, cast=int)
+
+# Transactional email outbox (drained by `manage.py send_emails`)
+EMAIL_OUTBOX_TRANSPORT = config(
+    "EMAIL_OUTBOX_TRANSPORT", default="userprofile.email_outbox.ZeptoMailTransport"
+)
+EMAIL_OUTBOX_FILE_PATH = config(
+    "EMAIL_OUTBOX_FILE_PATH", default=str(BASE_DIR / "tmp" / "emails")
+)
+EMAIL_OUTBOX_WORKERS = config("EMAIL_OUTBOX_WORKERS", default=8, cast=int)
+EMAIL_OUTBOX_MAX_ATTEMPTS = 6
+EMAIL_OUTBOX_RETRY_BASE_SECONDS = 60
+
+# Receipt PDFs are rendered once per order and stored here (store/receipts.py)
+RECEIPT_STORAGE_ROOT = config("RECEIPT_STORAGE_ROOT", default=str(BASE_DIR / "tmp" / "receipts"))
+RECEIPT_EMAIL_ATTACH_PDF = config("RECEIPT_EMAIL_ATTACH_PDF", default=True, cast=bool)